@@ -1,19 +1,25 @@
+import hashlib
 import logging
+import secrets
 from datetime import \
     timezone  # Import timezone for creating aware datetime objects
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import jwt
 from jwt import InvalidTokenError
-from passlib.context import CryptContext
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import database, models, schemas
+from .cache import user_cache
 from .config import settings
+from .hashing import PasswordHashingBusy, password_hasher, pwd_context  # noqa: F401
+from .tracing import span
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -22,9 +28,7 @@ logger = logging.getLogger(__name__)
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 
 # OAuth2 with Password flow
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
@@ -41,7 +45,31 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         True if the password matches, False otherwise
     """
     try:
-        return pwd_context.verify(plain_password, hashed_password)
+        return password_hasher.verify(plain_password, hashed_password)
+    except PasswordHashingBusy:
+        raise
+    except Exception:
+        logger.error("Error verifying password")
+        return False
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash on the password worker pool.
+
+    Args:
+        plain_password: The plain text password
+        hashed_password: The hashed password to compare against
+
+    Returns:
+        True if the password matches, False otherwise
+
+    Raises:
+        PasswordHashingBusy: If the worker pool queue is full
+    """
+    try:
+        return await password_hasher.verify_async(plain_password, hashed_password)
+    except PasswordHashingBusy:
+        raise
     except Exception:
         logger.error("Error verifying password")
         return False
@@ -56,7 +84,22 @@ def get_password_hash(password: str) -> str:
     Returns:
         The hashed password
     """
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password for storage on the password worker pool.
+
+    Args:
+        password: The plain text password to hash
+
+    Returns:
+        The hashed password
+
+    Raises:
+        PasswordHashingBusy: If the worker pool queue is full
+    """
+    return await password_hasher.hash_async(password)
 
 
 def get_user(db: Session, username: str) -> Optional[models.User]:
@@ -79,6 +122,26 @@ def get_user(db: Session, username: str) -> Optional[models.User]:
         return None
 
 
+async def get_user_async(db: AsyncSession, username: str) -> Optional[models.User]:
+    """Get a user by username without blocking the event loop.
+
+    Args:
+        db: Async database session
+        username: Username to search for
+
+    Returns:
+        User object if found, None otherwise
+    """
+    try:
+        result = await db.execute(select(models.User).where(models.User.username == username))
+        return result.scalars().first()
+    except SQLAlchemyError:
+        # Avoid logging sensitive data (CWE-117)
+        logger.error("Database error retrieving user by username")
+        await db.rollback()
+        return None
+
+
 def authenticate_user(db: Session, username: str, password: str) -> Union[models.User, bool]:
     """Authenticate a user with username and password.
 
@@ -100,6 +163,40 @@ def authenticate_user(db: Session, username: str, password: str) -> Union[models
         if not verify_password(password, user.hashed_password):
             return False
         return user
+    except PasswordHashingBusy:
+        raise
+    except Exception:
+        logger.error("Error authenticating user")
+        return False
+
+
+async def authenticate_user_async(
+        db: AsyncSession, username: str, password: str) -> Union[models.User, bool]:
+    """Authenticate a user without blocking the event loop.
+
+    Args:
+        db: Async database session
+        username: Username to authenticate
+        password: Password to verify
+
+    Returns:
+        User object if authentication succeeds, False otherwise
+
+    Raises:
+        PasswordHashingBusy: If the password worker pool queue is full
+    """
+    if not username or not password:
+        return False
+
+    try:
+        user = await get_user_async(db, username)
+        if not user:
+            return False
+        if not await verify_password_async(password, user.hashed_password):
+            return False
+        return user
+    except PasswordHashingBusy:
+        raise
     except Exception:
         logger.error("Error authenticating user")
         return False
@@ -132,15 +229,40 @@ def create_access_token(
         raise
 
 
+def hash_refresh_token(token: str) -> str:
+    """Digest a refresh token for storage and lookup.
+
+    Refresh tokens are long random values, so a single SHA-256 is enough;
+    unlike passwords they do not need a slow hash.
+
+    Args:
+        token: The opaque refresh token
+
+    Returns:
+        Hex SHA-256 digest of the token
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def generate_refresh_token() -> Tuple[str, str]:
+    """Create a new opaque refresh token.
+
+    Returns:
+        Tuple of (token for the client, digest for the database)
+    """
+    token = secrets.token_urlsafe(32)
+    return token, hash_refresh_token(token)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_async_db)
 ) -> models.User:
     """Get the current user from a JWT token.
 
     Args:
         token: JWT token from request
-        db: Database session
+        db: Async database session
 
     Returns:
         User object if token is valid
@@ -164,7 +286,8 @@ async def get_current_user(
             logger.warning("Invalid token format")
             raise credentials_exception
 
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with span("auth.decode_token"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             logger.warning("Token missing subject claim")
@@ -182,11 +305,19 @@ async def get_current_user(
         logger.error("JWT validation error")
         raise credentials_exception
 
-    user = get_user(db, username=token_data.username)
-    if user is None:
-        # Avoid logging sensitive data (CWE-117)
-        logger.warning("User from token not found")
-        raise credentials_exception
+    with span("auth.get_user") as user_span:
+        user = user_cache.get(token_data.username)
+        if user_span is not None:
+            user_span.set("cache_hit", user is not None)
+        if user is None:
+            user = await get_user_async(db, username=token_data.username)
+            if user is None:
+                # Avoid logging sensitive data (CWE-117)
+                logger.warning("User from token not found")
+                raise credentials_exception
+            # Detach so the cached instance is not tied to this request's session
+            db.expunge(user)
+            user_cache.set(token_data.username, user)
     return user
 
 
@@ -0,0 +1,191 @@
+"""Ordered sub-operations run by POST /batch for one user on one session.
+
+Each operation gets its own result carrying the status it would have had
+as a separate request. By default every write commits as it goes and a
+failed operation does not affect the others. With `atomic`, writes are
+only flushed; the batch commits once at the end, and the first failure
+rolls everything back and leaves the remaining operations unrun.
+
+The crud helpers handle a database error by rolling back the session and
+returning an empty result, which inside an atomic batch would silently
+discard the earlier writes. An atomic batch therefore watches the session
+for rollbacks and fails the operation that caused one.
+"""
+import logging
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud_async, models, plots, schemas
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[AsyncSession, models.User, schemas.BatchOperation, bool], Awaitable[Any]]
+
+
+def _row(obj: Any, columns) -> Dict[str, Any]:
+    return {column.key: getattr(obj, column.key) for column in columns}
+
+
+def _require(operation: schemas.BatchOperation, field: str) -> int:
+    value = getattr(operation, field)
+    if value is None:
+        raise HTTPException(status_code=422, detail=f"{field} is required for {operation.op}")
+    return value
+
+
+def _body(model: type, operation: schemas.BatchOperation) -> BaseModel:
+    try:
+        return model.model_validate(operation.body or {})
+    except ValidationError as exc:
+        raise HTTPException(status_code=422,
+                            detail=exc.errors(include_url=False, include_context=False))
+
+
+async def _owned_cat_id(db: AsyncSession, user: models.User,
+                        operation: schemas.BatchOperation) -> int:
+    cat_id = _require(operation, "cat_id")
+    if await crud_async.get_cat(db, cat_id=cat_id, user_id=user.id) is None:
+        raise HTTPException(status_code=404, detail="Cat not found")
+    return cat_id
+
+
+async def _create_cat(db, user, operation, commit):
+    cat = _body(schemas.CatCreate, operation)
+    errors = schemas.cat_errors(cat)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[0])
+    db_cat = await crud_async.create_cat(db, cat=cat, user_id=user.id, commit=commit)
+    if db_cat is None:
+        raise HTTPException(status_code=500, detail="Failed to create cat")
+    return _row(db_cat, crud_async.CAT_COLUMNS)
+
+
+async def _read_cat(db, user, operation, commit):
+    cat = await crud_async.get_cat_with_record_rows(
+        db, cat_id=_require(operation, "cat_id"), user_id=user.id)
+    if cat is None:
+        raise HTTPException(status_code=404, detail="Cat not found")
+    return cat
+
+
+async def _list_cats(db, user, operation, commit):
+    return await crud_async.get_cat_rows(db, user_id=user.id)
+
+
+async def _delete_cat(db, user, operation, commit):
+    if not await crud_async.delete_cat(db, cat_id=_require(operation, "cat_id"),
+                                       user_id=user.id, commit=commit):
+        raise HTTPException(status_code=404, detail="Cat not found")
+    return {"detail": "Cat deleted successfully"}
+
+
+async def _create_weight_record(db, user, operation, commit):
+    record = _body(schemas.WeightRecordCreate, operation)
+    errors = schemas.weight_record_errors(record)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[0])
+    cat_id = _require(operation, "cat_id")
+    db_record = await crud_async.create_weight_record(
+        db, weight_record=record, cat_id=cat_id, commit=commit, user_id=user.id)
+    if db_record is None:
+        if not await crud_async.get_owned_cat_ids(db, user.id, [cat_id]):
+            raise HTTPException(status_code=404, detail="Cat not found")
+        raise HTTPException(status_code=500, detail="Failed to create weight record")
+    return _row(db_record, crud_async.WEIGHT_RECORD_COLUMNS)
+
+
+async def _list_weight_records(db, user, operation, commit):
+    cat_id = await _owned_cat_id(db, user, operation)
+    return await crud_async.get_weight_record_rows(db, cat_id=cat_id)
+
+
+async def _delete_weight_record(db, user, operation, commit):
+    if not await crud_async.delete_weight_record(db, record_id=_require(operation, "record_id"),
+                                                 user_id=user.id, commit=commit):
+        raise HTTPException(status_code=404, detail="Weight record not found")
+    return {"detail": "Weight record deleted successfully"}
+
+
+async def _read_plot(db, user, operation, commit):
+    cat_id = await _owned_cat_id(db, user, operation)
+    plot_data = await plots.generate_weight_plot_async(db, cat_id)
+    if plot_data is None:
+        raise HTTPException(status_code=404, detail="Failed to generate plot data")
+    return plot_data
+
+
+HANDLERS: Dict[str, Handler] = {
+    "cat.create": _create_cat,
+    "cat.read": _read_cat,
+    "cat.list": _list_cats,
+    "cat.delete": _delete_cat,
+    "weight.create": _create_weight_record,
+    "weight.list": _list_weight_records,
+    "weight.delete": _delete_weight_record,
+    "plot.read": _read_plot,
+}
+
+
+@contextmanager
+def _watch_rollbacks(db: AsyncSession) -> Iterator[List[bool]]:
+    """Yield a list that gets an entry each time the session's transaction rolls back."""
+    rollbacks: List[bool] = []
+
+    def on_rollback(session) -> None:
+        rollbacks.append(True)
+
+    event.listen(db.sync_session, "after_rollback", on_rollback)
+    try:
+        yield rollbacks
+    finally:
+        event.remove(db.sync_session, "after_rollback", on_rollback)
+
+
+async def run_batch(db: AsyncSession, user: models.User,
+                    operations: List[schemas.BatchOperation],
+                    atomic: bool = False) -> Dict[str, Any]:
+    """Run operations in order and return the schemas.BatchResponse body.
+
+    Raises:
+        HTTPException: 500 if the atomic commit at the end fails
+    """
+    results: List[Dict[str, Any]] = []
+    failed = None
+    with _watch_rollbacks(db) as rollbacks:
+        for index, operation in enumerate(operations):
+            if failed is not None:
+                results.append({"status": 424,
+                                "body": {"detail": f"Not run: operation {failed} failed"}})
+                continue
+            try:
+                with span(f"batch {operation.op}"):
+                    body = await HANDLERS[operation.op](db, user, operation, not atomic)
+                result = {"status": 200, "body": body}
+            except HTTPException as exc:
+                result = {"status": exc.status_code, "body": {"detail": exc.detail}}
+            if atomic and rollbacks:
+                # A helper hit a database error and rolled back the earlier writes
+                result = {"status": 500, "body": {"detail": "Database error; batch rolled back"}}
+            results.append(result)
+            if atomic and result["status"] != 200:
+                failed = index
+
+    if atomic:
+        if failed is not None:
+            await db.rollback()
+            return {"results": results, "committed": False}
+        try:
+            await db.commit()
+        except SQLAlchemyError as e:
+            logger.error("Database error committing batch of %d operations: %s",
+                         len(operations), str(e))
+            await db.rollback()
+            raise HTTPException(status_code=500, detail="Failed to commit batch")
+    return {"results": results, "committed": True}
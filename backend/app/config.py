@@ -1,14 +1,109 @@
 import os
 from secrets import token_hex
 
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable, falling back to a default."""
+    try:
+        value = os.environ.get(name)
+        return int(value) if value and value.strip() else default
+    except (ValueError, TypeError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float environment variable, falling back to a default."""
+    try:
+        value = os.environ.get(name)
+        return float(value) if value and value.strip() else default
+    except (ValueError, TypeError):
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean environment variable ('true'/'false'), falling back to a default."""
+    value = os.environ.get(name, '').strip().lower()
+    if not value:
+        return default
+    return value == 'true'
+
+
+def _default_database_url() -> str:
+    """Build the database URL from the legacy DB_* variables."""
+    db_user = os.environ.get("DB_USER", "postgres")
+    db_password = os.environ.get("DB_PASSWORD", "postgres")
+    db_host = os.environ.get("DB_HOST", "db")
+    db_port = os.environ.get("DB_PORT", "5432")
+    db_name = os.environ.get("DB_NAME", "cat_weight_tracker")
+    return f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+
 
 class Settings:
     """Application settings."""
 
     def __init__(self):
-        # Database settings
-        self.DATABASE_URL = os.environ.get(
-            'DATABASE_URL') or 'postgresql://postgres:postgres@db:5432/cat_weight_tracker'
+        # Database settings (DATABASE_URL wins over the individual DB_* variables)
+        self.DATABASE_URL = os.environ.get('DATABASE_URL') or _default_database_url()
+
+        # Connection pool settings
+        self.DB_POOL_SIZE = _env_int('DB_POOL_SIZE', 5)
+        self.DB_MAX_OVERFLOW = _env_int('DB_MAX_OVERFLOW', 10)
+        self.DB_POOL_TIMEOUT = _env_float('DB_POOL_TIMEOUT', 30.0)
+        self.DB_POOL_RECYCLE = _env_int('DB_POOL_RECYCLE', 1800)  # seconds, -1 disables
+        self.DB_POOL_PRE_PING = _env_bool('DB_POOL_PRE_PING', True)
+
+        # Event loop lag monitoring (seconds)
+        self.LOOP_LAG_MONITOR_ENABLED = _env_bool('LOOP_LAG_MONITOR_ENABLED', True)
+        self.LOOP_LAG_INTERVAL = _env_float('LOOP_LAG_INTERVAL', 0.1)
+        self.LOOP_LAG_THRESHOLD = _env_float('LOOP_LAG_THRESHOLD', 0.1)
+
+        # Authenticated-user cache (TTL in seconds, 0 disables)
+        self.USER_CACHE_TTL = _env_float('USER_CACHE_TTL', 30.0)
+        self.USER_CACHE_SIZE = _env_int('USER_CACHE_SIZE', 1024)
+
+        # bcrypt worker pool; requests beyond workers + queue limit get a 503
+        self.PASSWORD_HASH_WORKERS = _env_int('PASSWORD_HASH_WORKERS', 2)
+        self.PASSWORD_HASH_QUEUE_LIMIT = _env_int('PASSWORD_HASH_QUEUE_LIMIT', 32)
+
+        # Logging: queue capacity before records are dropped, fraction of
+        # successful requests written to the access log, and the duration
+        # (seconds) above which a request is always logged
+        self.LOG_QUEUE_SIZE = _env_int('LOG_QUEUE_SIZE', 10000)
+        self.ACCESS_LOG_SAMPLE_RATE = _env_float('ACCESS_LOG_SAMPLE_RATE', 1.0)
+        self.ACCESS_LOG_SLOW_THRESHOLD = _env_float('ACCESS_LOG_SLOW_THRESHOLD', 1.0)
+
+        # Statements at least this slow (seconds) go to the slow query log; 0 disables
+        self.SLOW_QUERY_THRESHOLD = _env_float('SLOW_QUERY_THRESHOLD', 0.2)
+
+        # Tracing: exporter ("none" or "jsonl"), output file and fraction of
+        # requests sampled (incoming traceparent headers keep their own decision)
+        self.TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER', 'none').strip().lower()
+        self.TRACING_FILE = os.environ.get('TRACING_FILE', 'traces.jsonl')
+        self.TRACING_SAMPLE_RATE = _env_float('TRACING_SAMPLE_RATE', 0.01)
+
+        # Response compression: bodies below the minimum size (bytes) are sent as is
+        self.COMPRESSION_MINIMUM_SIZE = _env_int('COMPRESSION_MINIMUM_SIZE', 1024)
+        self.COMPRESSION_GZIP_LEVEL = _env_int('COMPRESSION_GZIP_LEVEL', 6)
+        self.COMPRESSION_BROTLI_QUALITY = _env_int('COMPRESSION_BROTLI_QUALITY', 4)
+
+        # Rate limiting (requests per minute, 0 disables). RATE_LIMIT_ROUTES is a
+        # comma-separated list such as "POST /auth/login=10".
+        self.RATE_LIMIT_PER_MINUTE = _env_int('RATE_LIMIT_PER_MINUTE', 0)
+        self.RATE_LIMIT_USER_PER_MINUTE = _env_int('RATE_LIMIT_USER_PER_MINUTE', 0)
+        self.RATE_LIMIT_ROUTES = os.environ.get('RATE_LIMIT_ROUTES', '')
+        self.RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory').strip().lower()
+        self.RATE_LIMIT_SQLITE_PATH = os.environ.get('RATE_LIMIT_SQLITE_PATH', '')
+        self.RATE_LIMIT_MAX_KEYS = _env_int('RATE_LIMIT_MAX_KEYS', 10000)
+
+        # Most sub-operations accepted by one POST /batch request
+        self.BATCH_MAX_OPERATIONS = _env_int('BATCH_MAX_OPERATIONS', 100)
+
+        # Internal (operator-only) endpoints such as pool statistics
+        self.INTERNAL_ENDPOINTS_ENABLED = _env_bool('INTERNAL_ENDPOINTS_ENABLED', False)
 
         # JWT settings
         self.SECRET_KEY = os.environ.get('SECRET_KEY') or token_hex(32)
@@ -22,6 +117,9 @@ class Settings:
         except (ValueError, TypeError):
             self.ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+        # Rotating refresh tokens
+        self.REFRESH_TOKEN_EXPIRE_DAYS = _env_int('REFRESH_TOKEN_EXPIRE_DAYS', 30)
+
         # Handle boolean conversion safely
         registration_enabled = os.environ.get('REGISTRATION_ENABLED', '').lower()
         self.REGISTRATION_ENABLED = registration_enabled == 'true'
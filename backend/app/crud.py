@@ -1,11 +1,14 @@
 import logging
+from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import delete, exists, insert, or_, update
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 
 from . import models, schemas
 from .auth import get_password_hash, verify_password
+from .cache import user_cache
 
 logger = logging.getLogger(__name__)
 
@@ -94,14 +97,12 @@ def create_user(db: Session, user: schemas.UserCreate) -> Optional[models.User]:
             return None
 
         hashed_password = get_password_hash(user.password)
-        db_user = models.User(
-            username=username,
-            email=email,
-            hashed_password=hashed_password
-        )
-        db.add(db_user)
+        db_user = db.scalars(
+            insert(models.User)
+            .values(username=username, email=email, hashed_password=hashed_password)
+            .returning(models.User)
+        ).one()
         db.commit()
-        db.refresh(db_user)
         return db_user
     except SQLAlchemyError:
         # Avoid logging sensitive data (CWE-117)
@@ -110,39 +111,55 @@ def create_user(db: Session, user: schemas.UserCreate) -> Optional[models.User]:
         return None
 
 
-def update_user(db: Session, user_id: int,
-                user_update: schemas.UserUpdate) -> Optional[models.User]:
+def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate,
+                current_user: Optional[models.User] = None) -> Optional[models.User]:
     """Update user information.
 
+    The uniqueness checks are a NOT EXISTS guard on the UPDATE itself, so a
+    change is one UPDATE ... RETURNING statement.
+
     Args:
         db: Database session
         user_id: ID of user to update
         user_update: Updated user data
+        current_user: The user as already loaded (e.g. by authentication);
+            saves looking it up again
 
     Returns:
-        Updated user object or None if user not found or update failed
+        Updated user object or None if user not found, username or email
+        already taken, or update failed
     """
     try:
-        db_user = get_user(db, user_id)
+        db_user = current_user if current_user is not None else get_user(db, user_id)
         if not db_user:
             return None
+        previous_username = db_user.username
 
-        # Check if username is being updated and is not already taken
+        changes = {}
         if user_update.username and user_update.username != db_user.username:
-            existing_user = get_user_by_username(db, user_update.username)
-            if existing_user:
-                return None  # Username already taken
-            db_user.username = user_update.username
-
-        # Check if email is being updated and is not already taken
+            changes["username"] = user_update.username
         if user_update.email and user_update.email != db_user.email:
-            existing_user = get_user_by_email(db, user_update.email)
-            if existing_user:
-                return None  # Email already taken
-            db_user.email = user_update.email
-
+            changes["email"] = user_update.email
+        if not changes:
+            return db_user
+
+        other = aliased(models.User)
+        taken = exists().where(
+            other.id != user_id,
+            or_(*(getattr(other, field) == value for field, value in changes.items())))
+        db_user = db.scalars(
+            update(models.User)
+            .where(models.User.id == user_id, ~taken)
+            .values(**changes)
+            .returning(models.User)
+        ).first()
+        if db_user is None:
+            return None  # Username or email already taken
+        # Detach so the commit does not expire the values RETURNING loaded
+        db.expunge(db_user)
         db.commit()
-        db.refresh(db_user)
+        user_cache.invalidate(previous_username)
+        user_cache.invalidate(db_user.username)
         return db_user
     except SQLAlchemyError as e:
         # import logging  # Used for secure logging
@@ -181,7 +198,10 @@ def change_user_password(
 
         # Update password
         db_user.hashed_password = get_password_hash(new_password)
+        # Sign out other sessions: their refresh tokens stop working
+        revoke_user_refresh_tokens(db, user_id, commit=False)
         db.commit()
+        user_cache.invalidate(db_user.username)
         return True
     except SQLAlchemyError as e:
         # Use %s placeholder for safe string formatting
@@ -190,6 +210,76 @@ def change_user_password(
         return False
 
 
+def deactivate_user(db: Session, user_id: int) -> bool:
+    """Deactivate a user account.
+
+    Args:
+        db: Database session
+        user_id: ID of user to deactivate
+
+    Returns:
+        True if the user was deactivated, False otherwise
+    """
+    try:
+        db_user = get_user(db, user_id)
+        if not db_user:
+            return False
+
+        db_user.is_active = False
+        revoke_user_refresh_tokens(db, user_id, commit=False)
+        db.commit()
+        # Drop the cached user so the change applies to the next request
+        user_cache.invalidate(db_user.username)
+        return True
+    except SQLAlchemyError as e:
+        logger.error("Database error deactivating user %s: %s", user_id, str(e))
+        db.rollback()
+        return False
+
+
+# Refresh token maintenance
+def revoke_user_refresh_tokens(db: Session, user_id: int, commit: bool = True) -> None:
+    """Revoke all live refresh tokens for a user.
+
+    Args:
+        db: Database session
+        user_id: User whose tokens are revoked
+        commit: Commit immediately; pass False to join the caller's transaction
+    """
+    db.execute(
+        update(models.RefreshToken).where(
+            models.RefreshToken.user_id == user_id,
+            models.RefreshToken.revoked_at.is_(None),
+        ).values(revoked_at=datetime.utcnow())
+    )
+    if commit:
+        db.commit()
+
+
+def purge_refresh_tokens(db: Session) -> int:
+    """Delete expired refresh tokens so the table stays small.
+
+    Revoked tokens are kept until they expire so reuse can still be detected.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of rows deleted
+    """
+    try:
+        result = db.execute(
+            delete(models.RefreshToken).where(
+                models.RefreshToken.expires_at <= datetime.utcnow())
+        )
+        db.commit()
+        return result.rowcount
+    except SQLAlchemyError as e:
+        logger.error("Database error purging refresh tokens: %s", str(e))
+        db.rollback()
+        return 0
+
+
 # Cat CRUD operations
 def get_cats(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> list[models.Cat]:
     """Get all cats for a user.
@@ -205,8 +295,8 @@ def get_cats(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> list
     """
     try:
         # Use SQLAlchemy's built-in parameter binding for safe query construction
-        return db.query(models.Cat).filter(models.Cat.user_id
-                                           == user_id).offset(skip).limit(limit).all()
+        return db.query(models.Cat).filter(models.Cat.user_id == user_id).order_by(
+            models.Cat.name, models.Cat.id).offset(skip).limit(limit).all()
     except SQLAlchemyError as e:
         # Use string formatting to sanitize the error message
         logger.error("Database error retrieving cats for user %d: %s", user_id, str(e))
@@ -256,14 +346,12 @@ def create_cat(db: Session, cat: schemas.CatCreate, user_id: int) -> Optional[mo
         Created cat object or None if error occurs
     """
     try:
-        db_cat = models.Cat(
-            name=cat.name,
-            target_weight=cat.target_weight,
-            user_id=user_id
-        )
-        db.add(db_cat)
+        db_cat = db.scalars(
+            insert(models.Cat)
+            .values(name=cat.name, target_weight=cat.target_weight, user_id=user_id)
+            .returning(models.Cat)
+        ).one()
         db.commit()
-        db.refresh(db_cat)
         return db_cat
     except SQLAlchemyError as e:
         logger.error("Database error creating cat for user %d: %s", user_id, str(e))
@@ -285,12 +373,14 @@ def update_cat(db: Session, cat_id: int, cat: schemas.CatCreate,
         Updated cat object or None if cat not found or update failed
     """
     try:
-        db_cat = get_cat(db, cat_id, user_id)
+        db_cat = db.scalars(
+            update(models.Cat)
+            .where(models.Cat.id == cat_id, models.Cat.user_id == user_id)
+            .values(name=cat.name, target_weight=cat.target_weight)
+            .returning(models.Cat)
+        ).first()
         if db_cat:
-            db_cat.name = cat.name
-            db_cat.target_weight = cat.target_weight
             db.commit()
-            db.refresh(db_cat)
         return db_cat
     except SQLAlchemyError as e:
         import re  # Used for sanitizing input
@@ -342,7 +432,7 @@ def get_weight_records(db: Session, cat_id: int, skip: int = 0,
         # Use parameterized query to prevent NoSQL injection
         return db.query(models.WeightRecord).filter(
             models.WeightRecord.cat_id == cat_id
-        ).offset(skip).limit(limit).all()
+        ).order_by(models.WeightRecord.date, models.WeightRecord.id).offset(skip).limit(limit).all()
     except SQLAlchemyError as e:
         logger.error("Database error retrieving weight records for cat %d: %s", cat_id, str(e))
         db.rollback()
@@ -374,16 +464,14 @@ def create_weight_record(db: Session,
         # Calculate cat weight
         cat_weight = weight_record.combined_weight - weight_record.user_weight
 
-        db_record = models.WeightRecord(
-            date=weight_record.date,
-            user_weight=weight_record.user_weight,
-            combined_weight=weight_record.combined_weight,
-            cat_weight=cat_weight,
-            cat_id=cat_id
-        )
-        db.add(db_record)
+        db_record = db.scalars(
+            insert(models.WeightRecord)
+            .values(date=weight_record.date, user_weight=weight_record.user_weight,
+                    combined_weight=weight_record.combined_weight, cat_weight=cat_weight,
+                    cat_id=cat_id)
+            .returning(models.WeightRecord)
+        ).one()
         db.commit()
-        db.refresh(db_record)
         return db_record
     except SQLAlchemyError as e:
         logger.error("Database error creating weight record for cat %d: %s", cat_id, str(e))
@@ -0,0 +1,985 @@
+"""Async versions of the user, cat and weight record operations in crud.py.
+
+Relationships cannot be lazy-loaded on an AsyncSession, so anything a
+response needs is loaded eagerly.
+
+The `*_rows` readers back the list endpoints: they select only the columns
+a response has, as plain tuples, and return JSON-ready dicts keyed like the
+response schema. Values were validated when they were written, so the
+endpoints send these rows without building a Pydantic model per row.
+"""
+import functools
+import logging
+import secrets
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import (ColumnElement, Date, Result, Select, bindparam, exists, func, insert,
+                        literal, or_, select, tuple_, union, update)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, selectinload
+
+from . import models, schemas
+from .auth import (REFRESH_TOKEN_EXPIRE_DAYS, generate_refresh_token, get_password_hash_async,
+                   hash_refresh_token, verify_password_async)
+from .cache import user_cache
+from .tracing import traced
+
+logger = logging.getLogger(__name__)
+
+Row = Dict[str, Any]
+
+# Window of the dashboard's change_30d
+TREND_DAYS = 30
+
+# Columns in the field order of schemas.Cat and schemas.WeightRecord
+CAT_COLUMNS = (models.Cat.name, models.Cat.target_weight, models.Cat.id, models.Cat.user_id)
+WEIGHT_RECORD_COLUMNS = (
+    models.WeightRecord.date,
+    models.WeightRecord.user_weight,
+    models.WeightRecord.combined_weight,
+    models.WeightRecord.id,
+    models.WeightRecord.cat_weight,
+    models.WeightRecord.cat_id,
+)
+
+
+def _rows(result: Result) -> List[Row]:
+    """Column result rows as dicts keyed by column name."""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result.tuples()]
+
+
+def _columns(result: Result) -> Dict[str, list]:
+    """Column result as one list per column name."""
+    keys = list(result.keys())
+    columns = list(zip(*result.tuples())) or [()] * len(keys)
+    return {key: list(values) for key, values in zip(keys, columns)}
+
+
+def date_range_clauses(date_from: Optional[date] = None,
+                       date_to: Optional[date] = None) -> List[ColumnElement[bool]]:
+    """WHERE clauses keeping weight records dated within [date_from, date_to].
+
+    Combined with a cat_id equality they form a range scan of
+    idx_weight_cat_date (cat_id, date).
+    """
+    clauses = []
+    if date_from is not None:
+        clauses.append(models.WeightRecord.date >= date_from)
+    if date_to is not None:
+        clauses.append(models.WeightRecord.date <= date_to)
+    return clauses
+
+
+def _weight_records_query(cat_id: int, skip: int, limit: int,
+                          after: Optional[Tuple[date, int]] = None,
+                          date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """A page of a cat's records in (date, id) order, after a keyset position if given."""
+    query = select(*WEIGHT_RECORD_COLUMNS).where(
+        models.WeightRecord.cat_id == cat_id, *date_range_clauses(date_from, date_to))
+    if after is not None:
+        query = query.where(tuple_(models.WeightRecord.date, models.WeightRecord.id) > after)
+    return query.order_by(
+        models.WeightRecord.date, models.WeightRecord.id).offset(skip).limit(limit)
+
+
+# User CRUD operations
+async def get_user(db: AsyncSession, user_id: int) -> Optional[models.User]:
+    """Get user by ID.
+
+    Args:
+        db: Async database session
+        user_id: User ID to retrieve
+
+    Returns:
+        User object if found, None otherwise
+    """
+    try:
+        safe_user_id = int(user_id)
+        result = await db.execute(select(models.User).where(models.User.id == safe_user_id))
+        return result.scalars().first()
+    except (SQLAlchemyError, ValueError):
+        # Avoid logging sensitive data (CWE-117)
+        logger.error("Error retrieving user")
+        await db.rollback()
+        return None
+
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[models.User]:
+    """Get user by username.
+
+    Args:
+        db: Async database session
+        username: Username to search for
+
+    Returns:
+        User object if found, None otherwise
+    """
+    try:
+        result = await db.execute(select(models.User).where(models.User.username == username))
+        return result.scalars().first()
+    except SQLAlchemyError:
+        # Avoid logging sensitive data (CWE-117)
+        logger.error("Database error retrieving user by username")
+        await db.rollback()
+        return None
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
+    """Get user by email.
+
+    Args:
+        db: Async database session
+        email: Email to search for
+
+    Returns:
+        User object if found, None otherwise
+    """
+    try:
+        result = await db.execute(select(models.User).where(models.User.email == email))
+        return result.scalars().first()
+    except SQLAlchemyError:
+        # Avoid logging sensitive data (CWE-117)
+        logger.error("Database error retrieving user by email")
+        await db.rollback()
+        return None
+
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate) -> Optional[models.User]:
+    """Create a new user, hashing the password on the password worker pool.
+
+    The username and email uniqueness checks are a NOT EXISTS guard on the
+    INSERT ... RETURNING, so creating a user is one statement.
+
+    Args:
+        db: Async database session
+        user: User data for creation
+
+    Returns:
+        Created user object or None if the username or email is taken or error occurs
+    """
+    try:
+        username = user.username
+        email = user.email
+
+        # Validate input length to prevent injection
+        if len(username) > 50 or len(email) > 100:
+            logger.warning("Invalid input length for user creation")
+            return None
+
+        hashed_password = await get_password_hash_async(user.password)
+        taken = exists().where(or_(models.User.username == username,
+                                   models.User.email == email))
+        new_user = select(literal(username), literal(email), literal(hashed_password)).where(~taken)
+        db_user = (await db.scalars(
+            insert(models.User)
+            .from_select(["username", "email", "hashed_password"], new_user)
+            .returning(models.User)
+        )).first()
+        if db_user is not None:
+            await db.commit()
+        return db_user
+    except SQLAlchemyError:
+        # Avoid logging sensitive data (CWE-117)
+        logger.error("Database error creating user")
+        await db.rollback()
+        return None
+
+
+async def change_user_password(
+        db: AsyncSession,
+        user_id: int,
+        current_password: str,
+        new_password: str) -> bool:
+    """Change user password, running bcrypt on the password worker pool.
+
+    Args:
+        db: Async database session
+        user_id: ID of user to update
+        current_password: Current password for verification
+        new_password: New password to set
+
+    Returns:
+        True if password was changed successfully, False otherwise
+    """
+    try:
+        if not current_password or not new_password:
+            return False
+
+        db_user = await get_user(db, user_id)
+        if not db_user:
+            return False
+
+        # Verify current password
+        if not await verify_password_async(current_password, db_user.hashed_password):
+            return False
+
+        # Update password
+        db_user.hashed_password = await get_password_hash_async(new_password)
+        # Sign out other sessions: their refresh tokens stop working
+        await revoke_user_refresh_tokens(db, user_id, commit=False)
+        await db.commit()
+        user_cache.invalidate(db_user.username)
+        return True
+    except SQLAlchemyError as e:
+        logger.error("Database error changing password for user %s: %s", user_id, str(e))
+        await db.rollback()
+        return False
+
+
+# Refresh token operations
+async def create_refresh_token(db: AsyncSession, user_id: int,
+                               family_id: Optional[str] = None) -> Optional[str]:
+    """Issue a refresh token for a user.
+
+    Args:
+        db: Async database session
+        user_id: User the token belongs to
+        family_id: Rotation family to join; a new family is started if omitted
+
+    Returns:
+        The opaque token for the client, or None if an error occurs
+    """
+    try:
+        token, token_hash = generate_refresh_token()
+        db.add(models.RefreshToken(
+            token_hash=token_hash,
+            family_id=family_id or secrets.token_hex(16),
+            user_id=user_id,
+            expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        ))
+        await db.commit()
+        return token
+    except SQLAlchemyError as e:
+        logger.error("Database error creating refresh token for user %s: %s", user_id, str(e))
+        await db.rollback()
+        return None
+
+
+async def rotate_refresh_token(db: AsyncSession,
+                               token: str) -> Optional[Tuple[models.User, str]]:
+    """Exchange a refresh token for a new one in the same family.
+
+    Validation is one indexed lookup on the token digest. Presenting a token
+    that was already rotated is treated as theft: the whole family is revoked.
+
+    Args:
+        db: Async database session
+        token: The refresh token presented by the client
+
+    Returns:
+        Tuple of (user, new refresh token), or None if the token is not usable
+    """
+    try:
+        now = datetime.utcnow()
+        result = await db.execute(
+            select(models.RefreshToken).where(
+                models.RefreshToken.token_hash == hash_refresh_token(token))
+        )
+        db_token = result.scalars().first()
+        if db_token is None:
+            return None
+
+        if db_token.revoked_at is not None:
+            # Avoid logging token data (CWE-117)
+            logger.warning("Revoked refresh token reused; revoking token family")
+            await revoke_refresh_token_family(db, db_token.family_id)
+            return None
+        if db_token.expires_at <= now:
+            return None
+
+        # Conditional update so two concurrent refreshes cannot both succeed
+        revoked = await db.execute(
+            update(models.RefreshToken).where(
+                models.RefreshToken.id == db_token.id,
+                models.RefreshToken.revoked_at.is_(None),
+            ).values(revoked_at=now)
+        )
+        if revoked.rowcount != 1:
+            await db.rollback()
+            return None
+
+        db_user = await get_user(db, db_token.user_id)
+        if db_user is None or not db_user.is_active:
+            await db.commit()
+            return None
+
+        new_token = await create_refresh_token(db, db_user.id, family_id=db_token.family_id)
+        if new_token is None:
+            return None
+        return db_user, new_token
+    except SQLAlchemyError as e:
+        logger.error("Database error rotating refresh token: %s", str(e))
+        await db.rollback()
+        return None
+
+
+async def revoke_refresh_token_family(db: AsyncSession, family_id: str) -> bool:
+    """Revoke every live token in a rotation family (logout / reuse detection).
+
+    Args:
+        db: Async database session
+        family_id: Family to revoke
+
+    Returns:
+        True if the revocation was committed, False otherwise
+    """
+    try:
+        await db.execute(
+            update(models.RefreshToken).where(
+                models.RefreshToken.family_id == family_id,
+                models.RefreshToken.revoked_at.is_(None),
+            ).values(revoked_at=datetime.utcnow())
+        )
+        await db.commit()
+        return True
+    except SQLAlchemyError as e:
+        logger.error("Database error revoking refresh token family: %s", str(e))
+        await db.rollback()
+        return False
+
+
+async def revoke_refresh_token(db: AsyncSession, token: str) -> bool:
+    """Revoke the family of the given refresh token.
+
+    Args:
+        db: Async database session
+        token: Refresh token presented by the client
+
+    Returns:
+        True if a matching token was found and its family revoked
+    """
+    try:
+        result = await db.execute(
+            select(models.RefreshToken.family_id).where(
+                models.RefreshToken.token_hash == hash_refresh_token(token))
+        )
+        family_id = result.scalar_one_or_none()
+        if family_id is None:
+            return False
+        return await revoke_refresh_token_family(db, family_id)
+    except SQLAlchemyError as e:
+        logger.error("Database error revoking refresh token: %s", str(e))
+        await db.rollback()
+        return False
+
+
+async def revoke_user_refresh_tokens(db: AsyncSession, user_id: int,
+                                     commit: bool = True) -> None:
+    """Revoke all live refresh tokens for a user.
+
+    Args:
+        db: Async database session
+        user_id: User whose tokens are revoked
+        commit: Commit immediately; pass False to join the caller's transaction
+    """
+    await db.execute(
+        update(models.RefreshToken).where(
+            models.RefreshToken.user_id == user_id,
+            models.RefreshToken.revoked_at.is_(None),
+        ).values(revoked_at=datetime.utcnow())
+    )
+    if commit:
+        await db.commit()
+
+
+# Cat CRUD operations
+@traced("crud.get_cat_rows")
+async def get_cat_rows(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100,
+                       after: Optional[Tuple[str, int]] = None) -> List[Row]:
+    """Get a user's cats in (name, id) order as response-ready dicts.
+
+    Args:
+        db: Async database session
+        user_id: User ID to filter cats by
+        skip: Number of records to skip
+        limit: Maximum number of records to return
+        after: Keyset position (name, id); only cats sorting after it are returned
+
+    Returns:
+        List of dicts with the schemas.Cat fields
+    """
+    try:
+        query = select(*CAT_COLUMNS).where(models.Cat.user_id == user_id)
+        if after is not None:
+            query = query.where(tuple_(models.Cat.name, models.Cat.id) > after)
+        result = await db.execute(
+            query.order_by(models.Cat.name, models.Cat.id).offset(skip).limit(limit)
+        )
+        return _rows(result)
+    except SQLAlchemyError as e:
+        logger.error("Database error retrieving cats for user %d: %s", user_id, str(e))
+        await db.rollback()
+        return []
+
+
+def _newest_record_id(*criteria: ColumnElement[bool]):
+    """Id of the cat's newest record matching `criteria`, correlated to models.Cat.
+
+    One backward seek on idx_weight_cat_date per cat.
+    """
+    record = models.WeightRecord
+    return select(record.id).where(record.cat_id == models.Cat.id, *criteria).order_by(
+        record.date.desc(), record.id.desc()).limit(1).scalar_subquery()
+
+
+def _dashboard_query(user_id: int, baseline_date: date):
+    latest = aliased(models.WeightRecord, name="latest")
+    baseline = aliased(models.WeightRecord, name="baseline")
+    return select(
+        *CAT_COLUMNS,
+        latest.date.label("last_date"),
+        latest.cat_weight.label("latest_weight"),
+        (latest.cat_weight - models.Cat.target_weight).label("target_delta"),
+        (latest.cat_weight - baseline.cat_weight).label("change_30d"),
+    ).outerjoin(
+        latest, latest.id == _newest_record_id()
+    ).outerjoin(
+        baseline, baseline.id == _newest_record_id(models.WeightRecord.date <= baseline_date)
+    ).where(
+        models.Cat.user_id == user_id
+    ).order_by(models.Cat.name, models.Cat.id)
+
+
+@traced("crud.get_dashboard_rows")
+async def get_dashboard_rows(db: AsyncSession, user_id: int,
+                             today: Optional[date] = None) -> List[Row]:
+    """Get every cat of a user with its latest weigh-in and trend, in one statement.
+
+    Each cat's latest record, and its newest record at least TREND_DAYS old
+    (the baseline of change_30d), are found with correlated index seeks, so
+    the cost grows with the number of cats but not with their histories.
+
+    Args:
+        db: Async database session
+        user_id: User ID to filter cats by
+        today: Date the 30-day window ends on (defaults to the current date)
+
+    Returns:
+        List of dicts with the schemas.DashboardCat fields, in (name, id) order
+    """
+    baseline_date = (today or date.today()) - timedelta(days=TREND_DAYS)
+    try:
+        rows = _rows(await db.execute(_dashboard_query(user_id, baseline_date)))
+    except SQLAlchemyError as e:
+        logger.error("Database error retrieving dashboard for user %d: %s", user_id, str(e))
+        await db.rollback()
+        return []
+    for row in rows:
+        for key in ("target_delta", "change_30d"):
+            if row[key] is not None:
+                row[key] = round(row[key], 2)
+    return rows
+
+
+@traced("crud.get_cat")
+async def get_cat(db: AsyncSession, cat_id: int,
+                  user_id: Optional[int] = None) -> Optional[models.Cat]:
+    """Get a specific cat.
+
+    Args:
+        db: Async database session
+        cat_id: ID of cat to retrieve
+        user_id: Optional user ID to verify ownership
+
+    Returns:
+        Cat object if found, None otherwise
+    """
+    try:
+        query = select(models.Cat).where(models.Cat.id == cat_id)
+        if user_id is not None:
+            query = query.where(models.Cat.user_id == user_id)
+        result = await db.execute(query)
+        return result.scalars().first()
+    except SQLAlchemyError as e:
+        logger.error("Database error retrieving cat %s: %s", cat_id, str(e))
+        await db.rollback()
+        return None
+
+
+@traced("crud.get_cat_with_records")
+async def get_cat_with_records(db: AsyncSession, cat_id: int,
+                               user_id: Optional[int] = None) -> Optional[models.Cat]:
+    """Get a cat with its weight records eagerly loaded.
+
+    Args:
+        db: Async database session
+        cat_id: ID of cat to retrieve
+        user_id: Optional user ID to verify ownership
+
+    Returns:
+        Cat object if found, None otherwise
+    """
+    try:
+        query = select(models.Cat).options(
+            selectinload(models.Cat.weight_records)
+        ).where(models.Cat.id == cat_id)
+        if user_id is not None:
+            query = query.where(models.Cat.user_id == user_id)
+        result = await db.execute(query)
+        return result.scalars().first()
+    except SQLAlchemyError as e:
+        logger.error("Database error retrieving cat %s with records: %s", cat_id, str(e))
+        await db.rollback()
+        return None
+
+
+@traced("crud.get_cat_with_record_rows")
+async def get_cat_with_record_rows(db: AsyncSession, cat_id: int,
+                                   user_id: Optional[int] = None) -> Optional[Row]:
+    """Get a cat and all its weight records as one response-ready dict.
+
+    Args:
+        db: Async database session
+        cat_id: ID of cat to retrieve
+        user_id: Optional user ID to verify ownership
+
+    Returns:
+        Dict with the schemas.CatWithRecords fields, or None if not found
+    """
+    try:
+        query = select(*CAT_COLUMNS).where(models.Cat.id == cat_id)
+        if user_id is not None:
+            query = query.where(models.Cat.user_id == user_id)
+        cats = _rows(await db.execute(query))
+        if not cats:
+            return None
+        cat = cats[0]
+        # Newest first, as Cat.weight_records orders them
+        records = await db.execute(
+            select(*WEIGHT_RECORD_COLUMNS).where(
+                models.WeightRecord.cat_id == cat_id
+            ).order_by(models.WeightRecord.date.desc(), models.WeightRecord.id.desc())
+        )
+        cat["weight_records"] = _rows(records)
+        return cat
+    except SQLAlchemyError as e:
+        logger.error("Database error retrieving cat %s with records: %s", cat_id, str(e))
+        await db.rollback()
+        return None
+
+
+def _sample_dates(first: date, last: date, points: int) -> List[date]:
+    """Up to `points` evenly spaced dates from first to last, both included."""
+    if points < 2 or first == last:
+        return [first]
+    span = (last - first).days
+    return sorted({first + timedelta(days=round(k * span / (points - 1))) for k in range(points)})
+
+
+@functools.lru_cache(maxsize=32)
+def _weight_sample_query(size: int) -> Select:
+    """The first record on or after each of `size` target dates, in date order.
+
+    Bind `cat_id` and `target_0` ... `target_{size - 1}` when executing. Each
+    target is a single seek on idx_weight_cat_date, so the cost depends on
+    the number of targets, not on the length of the history. The statement
+    is built once per size: constructing it costs more than running it.
+    """
+    record = models.WeightRecord
+    cat_id = bindparam("cat_id")
+    seeks = [
+        select(select(record.id, record.date, record.cat_weight).where(
+            record.cat_id == cat_id, record.date >= bindparam(f"target_{k}", type_=Date)
+        ).order_by(record.date, record.id).limit(1).subquery())
+        for k in range(size)
+    ]
+    samples = union(*seeks).subquery()
+    return select(samples.c.date, samples.c.cat_weight).order_by(samples.c.date, samples.c.id)
+
+
+@traced("crud.get_cat_summary")
+async def get_cat_summary(db: AsyncSession, cat_id: int, user_id: Optional[int] = None,
+                          recent: int = 10, points: int = 100) -> Optional[Row]:
+    """Get a cat with its latest records, history stats and a downsampled series.
+
+    Runs at most three queries: the cat with aggregates over its history,
+    the latest records, and the series. The series samples the first record
+    on or after `points` evenly spaced dates with one index seek each, or
+    is every record when there are no more than `points`. The response size
+    is bounded by `recent` and `points`, however long the history is.
+
+    Args:
+        db: Async database session
+        cat_id: ID of cat to retrieve
+        user_id: Optional user ID to verify ownership
+        recent: Number of most recent records to include
+        points: Maximum number of points in the series
+
+    Returns:
+        Dict with the schemas.CatSummary fields, or None if not found
+    """
+    record = models.WeightRecord
+    try:
+        query = select(
+            *CAT_COLUMNS,
+            func.count(record.id).label("count"),
+            func.min(record.date).label("first_date"),
+            func.max(record.date).label("last_date"),
+            func.min(record.cat_weight).label("min_weight"),
+            func.max(record.cat_weight).label("max_weight"),
+            func.avg(record.cat_weight).label("mean_weight"),
+        ).outerjoin(record, record.cat_id == models.Cat.id).where(
+            models.Cat.id == cat_id
+        ).group_by(models.Cat.id)
+        if user_id is not None:
+            query = query.where(models.Cat.user_id == user_id)
+        rows = _rows(await db.execute(query))
+        if not rows:
+            return None
+        row = rows[0]
+        cat = {column.key: row[column.key] for column in CAT_COLUMNS}
+        stats = {key: value for key, value in row.items() if key not in cat}
+        if stats["mean_weight"] is not None:
+            stats["mean_weight"] = round(stats["mean_weight"], 2)
+        cat["stats"] = stats
+
+        if not stats["count"]:
+            cat["recent_records"] = []
+            cat["series"] = {"dates": [], "weights": []}
+            return cat
+        latest = await db.execute(
+            select(*WEIGHT_RECORD_COLUMNS).where(record.cat_id == cat_id)
+            .order_by(record.date.desc(), record.id.desc()).limit(recent)
+        )
+        cat["recent_records"] = _rows(latest)
+        params: Row = {}
+        if stats["count"] <= points:
+            series = select(record.date, record.cat_weight).where(
+                record.cat_id == cat_id).order_by(record.date, record.id)
+        else:
+            targets = _sample_dates(stats["first_date"], stats["last_date"], points)
+            series = _weight_sample_query(len(targets))
+            params = {f"target_{k}": target for k, target in enumerate(targets)}
+            params["cat_id"] = cat_id
+        samples = (await db.execute(series, params)).tuples().all()
+        cat["series"] = {"dates": [sample_date for sample_date, _ in samples],
+                         "weights": [weight for _, weight in samples]}
+        return cat
+    except SQLAlchemyError as e:
+        logger.error("Database error retrieving summary of cat %s: %s", cat_id, str(e))
+        await db.rollback()
+        return None
+
+
+@traced("crud.create_cat")
+async def create_cat(db: AsyncSession, cat: schemas.CatCreate,
+                     user_id: int, commit: bool = True) -> Optional[models.Cat]:
+    """Create a new cat.
+
+    Args:
+        db: Async database session
+        cat: Cat data for creation
+        user_id: User ID to associate with the cat
+        commit: Commit now; otherwise only flush, leaving the caller's transaction open
+
+    Returns:
+        Created cat object or None if error occurs
+    """
+    try:
+        # INSERT ... RETURNING loads the server defaults; no refresh needed
+        db_cat = (await db.scalars(
+            insert(models.Cat)
+            .values(name=cat.name, target_weight=cat.target_weight, user_id=user_id)
+            .returning(models.Cat)
+        )).one()
+        if commit:
+            await db.commit()
+        return db_cat
+    except SQLAlchemyError as e:
+        logger.error("Database error creating cat for user %d: %s", user_id, str(e))
+        await db.rollback()
+        return None
+
+
+@traced("crud.update_cat")
+async def update_cat(db: AsyncSession, cat_id: int, cat: schemas.CatCreate,
+                     user_id: int) -> Optional[models.Cat]:
+    """Update a cat's information.
+
+    Args:
+        db: Async database session
+        cat_id: ID of cat to update
+        cat: Updated cat data
+        user_id: User ID to verify ownership
+
+    Returns:
+        Updated cat object or None if cat not found or update failed
+    """
+    try:
+        # Ownership check, update and reload in one UPDATE ... RETURNING
+        db_cat = (await db.scalars(
+            update(models.Cat)
+            .where(models.Cat.id == cat_id, models.Cat.user_id == user_id)
+            .values(name=cat.name, target_weight=cat.target_weight)
+            .returning(models.Cat)
+        )).first()
+        if db_cat:
+            await db.commit()
+        return db_cat
+    except SQLAlchemyError as e:
+        sanitized_error = str(e).replace("\n", "").replace("\r", "")
+        logger.error("Database error updating cat %d: %s", cat_id, sanitized_error)
+        await db.rollback()
+        return None
+
+
+@traced("crud.delete_cat")
+async def delete_cat(db: AsyncSession, cat_id: int, user_id: int, commit: bool = True) -> bool:
+    """Delete a cat.
+
+    Args:
+        db: Async database session
+        cat_id: ID of cat to delete
+        user_id: User ID to verify ownership
+        commit: Commit now; otherwise only flush, leaving the caller's transaction open
+
+    Returns:
+        True if cat was deleted successfully, False otherwise
+    """
+    try:
+        db_cat = await get_cat(db, cat_id, user_id)
+        if db_cat:
+            await db.delete(db_cat)
+            if commit:
+                await db.commit()
+            else:
+                await db.flush()
+            return True
+        return False
+    except SQLAlchemyError as e:
+        logger.error("Database error deleting cat %d: %s", cat_id, str(e))
+        await db.rollback()
+        return False
+
+
+# Weight record CRUD operations
+@traced("crud.get_weight_records")
+async def get_weight_records(db: AsyncSession, cat_id: int, skip: int = 0,
+                             limit: int = 100) -> list[models.WeightRecord]:
+    """Get a page of weight records for a cat in (date, id) order.
+
+    Args:
+        db: Async database session
+        cat_id: Cat ID to filter records by
+        skip: Number of records to skip
+        limit: Maximum number of records to return
+
+    Returns:
+        List of weight record objects
+    """
+    try:
+        result = await db.execute(
+            select(models.WeightRecord).where(
+                models.WeightRecord.cat_id == cat_id
+            ).order_by(models.WeightRecord.date, models.WeightRecord.id).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
+    except SQLAlchemyError as e:
+        logger.error("Database error retrieving weight records for cat %d: %s", cat_id, str(e))
+        await db.rollback()
+        return []
+
+
+@traced("crud.get_weight_record_rows")
+async def get_weight_record_rows(db: AsyncSession, cat_id: int, skip: int = 0,
+                                 limit: int = 100,
+                                 after: Optional[Tuple[date, int]] = None,
+                                 date_from: Optional[date] = None,
+                                 date_to: Optional[date] = None) -> List[Row]:
+    """Get weight records for a cat in (date, id) order as response-ready dicts.
+
+    Args:
+        db: Async database session
+        cat_id: Cat ID to filter records by
+        skip: Number of records to skip
+        limit: Maximum number of records to return
+        after: Keyset position (date, id); only records sorting after it are returned
+        date_from: Earliest record date to include
+        date_to: Latest record date to include
+
+    Returns:
+        List of dicts with the schemas.WeightRecord fields
+    """
+    try:
+        return _rows(await db.execute(_weight_records_query(
+            cat_id, skip, limit, after, date_from, date_to)))
+    except SQLAlchemyError as e:
+        logger.error("Database error retrieving weight records for cat %d: %s", cat_id, str(e))
+        await db.rollback()
+        return []
+
+
+@traced("crud.get_weight_record_columns")
+async def get_weight_record_columns(db: AsyncSession, cat_id: int, skip: int = 0,
+                                    limit: int = 100,
+                                    after: Optional[Tuple[date, int]] = None,
+                                    date_from: Optional[date] = None,
+                                    date_to: Optional[date] = None) -> Row:
+    """Get the same page as get_weight_record_rows as parallel arrays.
+
+    Args:
+        db: Async database session
+        cat_id: Cat ID to filter records by
+        skip: Number of records to skip
+        limit: Maximum number of records to return
+        after: Keyset position (date, id); only records sorting after it are returned
+        date_from: Earliest record date to include
+        date_to: Latest record date to include
+
+    Returns:
+        Dict with the schemas.WeightColumns fields (empty arrays if an error occurs)
+    """
+    try:
+        columns = _columns(await db.execute(_weight_records_query(
+            cat_id, skip, limit, after, date_from, date_to)))
+    except SQLAlchemyError as e:
+        logger.error("Database error retrieving weight records for cat %d: %s", cat_id, str(e))
+        await db.rollback()
+        columns = {column.key: [] for column in WEIGHT_RECORD_COLUMNS}
+    columns["cat_id"] = cat_id
+    return columns
+
+
+@traced("crud.create_weight_record")
+async def create_weight_record(db: AsyncSession,
+                               weight_record: schemas.WeightRecordCreate,
+                               cat_id: int, commit: bool = True,
+                               user_id: Optional[int] = None) -> Optional[models.WeightRecord]:
+    """Create a new weight record in one INSERT ... RETURNING statement.
+
+    Args:
+        db: Async database session
+        weight_record: Weight record data for creation
+        cat_id: Cat ID to associate with the weight record
+        commit: Commit now; otherwise only flush, leaving the caller's transaction open
+        user_id: If given, only insert when the cat belongs to this user; the
+            check is part of the INSERT, so no separate ownership query is needed
+
+    Returns:
+        Created weight record object or None if the cat is not owned or error occurs
+    """
+    try:
+        # Validate weights
+        if weight_record.combined_weight <= weight_record.user_weight:
+            logger.error("Invalid weight values: combined weight must be greater than user weight")
+            return None
+
+        # Calculate cat weight
+        cat_weight = weight_record.combined_weight - weight_record.user_weight
+
+        values = {
+            "date": weight_record.date,
+            "user_weight": weight_record.user_weight,
+            "combined_weight": weight_record.combined_weight,
+            "cat_weight": cat_weight,
+        }
+        statement = insert(models.WeightRecord)
+        if user_id is None:
+            statement = statement.values(cat_id=cat_id, **values)
+        else:
+            # INSERT ... SELECT from the owned cat: no row is inserted otherwise
+            owned_cat = select(*(literal(value) for value in values.values()), models.Cat.id).where(
+                models.Cat.id == cat_id, models.Cat.user_id == user_id)
+            statement = statement.from_select([*values, "cat_id"], owned_cat)
+        db_record = (await db.scalars(statement.returning(models.WeightRecord))).first()
+        if db_record is not None and commit:
+            await db.commit()
+        return db_record
+    except SQLAlchemyError as e:
+        logger.error("Database error creating weight record for cat %d: %s", cat_id, str(e))
+        await db.rollback()
+        return None
+
+
+@traced("crud.get_owned_cat_ids")
+async def get_owned_cat_ids(db: AsyncSession, user_id: int, cat_ids: Iterable[int]) -> Set[int]:
+    """Return which of the given cat IDs belong to a user, in one query.
+
+    Args:
+        db: Async database session
+        user_id: User ID to verify ownership
+        cat_ids: Cat IDs to check
+
+    Returns:
+        The subset of cat_ids owned by the user
+    """
+    wanted = set(cat_ids)
+    if not wanted:
+        return set()
+    try:
+        result = await db.execute(
+            select(models.Cat.id).where(models.Cat.user_id == user_id, models.Cat.id.in_(wanted))
+        )
+        return set(result.scalars().all())
+    except SQLAlchemyError as e:
+        logger.error("Database error checking cat ownership for user %d: %s", user_id, str(e))
+        await db.rollback()
+        return set()
+
+
+@traced("crud.bulk_create_weight_records")
+async def bulk_create_weight_records(db: AsyncSession, records: List[Row],
+                                     batch_size: int = 5000) -> Optional[int]:
+    """Insert validated weight records in one transaction.
+
+    Rows go out as executemany batches of `batch_size` (multi-row VALUES on
+    PostgreSQL drivers) and are committed together, so either all of them
+    are stored or none are.
+
+    Args:
+        db: Async database session
+        records: Dicts of weight_records column values, cat_weight included
+        batch_size: Rows per INSERT batch
+
+    Returns:
+        Number of records inserted, or None if the transaction failed
+    """
+    try:
+        for offset in range(0, len(records), batch_size):
+            await db.execute(insert(models.WeightRecord), records[offset:offset + batch_size])
+        await db.commit()
+        return len(records)
+    except SQLAlchemyError as e:
+        logger.error("Database error importing %d weight records: %s", len(records), str(e))
+        await db.rollback()
+        return None
+
+
+@traced("crud.delete_weight_record")
+async def delete_weight_record(db: AsyncSession, record_id: int,
+                               user_id: Optional[int] = None, commit: bool = True) -> bool:
+    """Delete a weight record.
+
+    Args:
+        db: Async database session
+        record_id: ID of weight record to delete
+        user_id: Optional user ID to verify ownership
+        commit: Commit now; otherwise only flush, leaving the caller's transaction open
+
+    Returns:
+        True if weight record was deleted successfully, False otherwise
+    """
+    try:
+        query = select(models.WeightRecord).where(models.WeightRecord.id == record_id)
+
+        # If user_id is provided, ensure the weight record belongs to a cat owned by this user
+        if user_id is not None:
+            query = query.join(models.Cat).where(models.Cat.user_id == user_id)
+
+        result = await db.execute(query)
+        db_record = result.scalars().first()
+        if db_record:
+            await db.delete(db_record)
+            if commit:
+                await db.commit()
+            else:
+                await db.flush()
+            return True
+        return False
+    except SQLAlchemyError as e:
+        logger.error("Database error deleting weight record %d: %s", record_id, str(e))
+        await db.rollback()
+        return False
@@ -1,23 +1,28 @@
-import os
-
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-load_dotenv()
+from . import query_stats
+from .config import settings
+from .pool import PoolMonitor, build_async_engine, build_engine
 
-# Get database connection details from environment variables
-DB_USER = os.getenv("DB_USER", "postgres")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "postgres")
-DB_HOST = os.getenv("DB_HOST", "db")
-DB_PORT = os.getenv("DB_PORT", "5432")
-DB_NAME = os.getenv("DB_NAME", "cat_weight_tracker")
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-SQLALCHEMY_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Pool statistics for the application engines
+pool_monitor = PoolMonitor()
+async_pool_monitor = PoolMonitor()
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Sync engine: used by init_db, migrations and the remaining sync handlers
+engine = build_engine(SQLALCHEMY_DATABASE_URL, settings, monitor=pool_monitor)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: used by the async API handlers
+async_engine = build_async_engine(SQLALCHEMY_DATABASE_URL, settings, monitor=async_pool_monitor)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False)
+
+# Per-request query counts and the slow query log
+query_stats.install()
+
 Base = declarative_base()
 
 # Dependency to get DB session
@@ -29,3 +34,19 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get an async DB session
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Dependency for handlers that open sessions themselves, such as streaming
+# responses that keep reading after the handler has returned
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    return AsyncSessionLocal
@@ -0,0 +1,80 @@
+"""Streaming export of a user's weight history as CSV or NDJSON.
+
+Rows are read through a server-side cursor in batches of STREAM_BATCH_SIZE
+and each batch is encoded and sent as one chunk, so memory use does not
+depend on the size of the history. The CSV layout can be fed back to the
+bulk import endpoint.
+"""
+import csv
+import io
+from datetime import date
+from typing import AsyncIterator, Optional, Sequence
+
+import orjson
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from . import models
+from .crud_async import date_range_clauses
+
+STREAM_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+EXPORT_COLUMNS = (
+    models.WeightRecord.cat_id,
+    models.Cat.name.label("cat_name"),
+    models.WeightRecord.id,
+    models.WeightRecord.date,
+    models.WeightRecord.user_weight,
+    models.WeightRecord.combined_weight,
+    models.WeightRecord.cat_weight,
+)
+
+
+def history_query(user_id: int, date_from: Optional[date] = None,
+                  date_to: Optional[date] = None) -> Select:
+    """Every weight record of the user's cats, by cat and then date.
+
+    A date window is applied per cat as a range of idx_weight_cat_date.
+    """
+    return select(*EXPORT_COLUMNS).join(
+        models.Cat, models.WeightRecord.cat_id == models.Cat.id
+    ).where(
+        models.Cat.user_id == user_id, *date_range_clauses(date_from, date_to)
+    ).order_by(
+        models.WeightRecord.cat_id, models.WeightRecord.date, models.WeightRecord.id
+    ).execution_options(yield_per=STREAM_BATCH_SIZE)
+
+
+def encode_csv(keys: Sequence[str], rows: Sequence[Sequence], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(keys)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson(keys: Sequence[str], rows: Sequence[Sequence], header: bool = False) -> bytes:
+    return b"".join(orjson.dumps(dict(zip(keys, row))) + b"\n" for row in rows)
+
+
+async def stream_weight_history(session_factory: async_sessionmaker, user_id: int,
+                                format: str = "csv", date_from: Optional[date] = None,
+                                date_to: Optional[date] = None) -> AsyncIterator[bytes]:
+    """Yield the user's weight history as encoded chunks of up to STREAM_BATCH_SIZE rows.
+
+    The session is opened here rather than taken from a request dependency,
+    because the body is produced after the handler has returned.
+    """
+    encode = encode_ndjson if format == "ndjson" else encode_csv
+    keys = [column.key for column in EXPORT_COLUMNS]
+    async with session_factory() as db:
+        result = await db.stream(history_query(user_id, date_from, date_to))
+        first = True
+        async for rows in result.partitions():
+            yield encode(keys, rows, header=first)
+            first = False
+        if first and encode is encode_csv:
+            yield encode(keys, [], header=True)
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from .config import settings
+from .metrics import Histogram
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHashingBusy(HTTPException):
+    """Raised when the password worker pool is full; rendered as 503."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=503,
+            detail="Server is busy. Please try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL, so a small pool gives real parallelism while
+    keeping password work off the event loop and the request threadpool.
+    At most `workers + queue_limit` jobs may be pending; further requests are
+    rejected immediately with PasswordHashingBusy instead of queueing.
+    """
+
+    def __init__(self, context: CryptContext, workers: int = 2, queue_limit: int = 32):
+        self._context = context
+        self.workers = max(workers, 1)
+        self.queue_limit = max(queue_limit, 0)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+        self.queue_wait = Histogram()
+        self.latency = {"hash": Histogram(), "verify": Histogram()}
+
+    def _submit(self, operation: str, func: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            if self._pending >= self.workers + self.queue_limit:
+                self._rejected += 1
+                raise PasswordHashingBusy()
+            self._pending += 1
+        enqueued = time.perf_counter()
+
+        def run() -> Any:
+            started = time.perf_counter()
+            self.queue_wait.observe(started - enqueued)
+            try:
+                return func(*args)
+            finally:
+                self.latency[operation].observe(time.perf_counter() - started)
+                with self._lock:
+                    self._pending -= 1
+
+        try:
+            return self._executor.submit(run)
+        except RuntimeError:
+            # Executor shut down; release the slot we reserved
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    # Sync API (blocks the calling thread, not the event loop)
+
+    def hash(self, password: str) -> str:
+        return self._submit("hash", self._context.hash, password).result()
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit("verify", self._context.verify,
+                            plain_password, hashed_password).result()
+
+    # Async API
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit("hash", self._context.hash, password))
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(
+            self._submit("verify", self._context.verify, plain_password, hashed_password))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = self._pending
+            rejected = self._rejected
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "pending": pending,
+            "queued": max(pending - self.workers, 0),
+            "rejected": rejected,
+            "queue_wait": self.queue_wait.snapshot(),
+            "hash_latency": self.latency["hash"].snapshot(),
+            "verify_latency": self.latency["verify"].snapshot(),
+        }
+
+
+# Global pool for all password work
+password_hasher = PasswordHasher(
+    pwd_context,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT,
+)
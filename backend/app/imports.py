@@ -0,0 +1,204 @@
+"""Parsing and validation for bulk weight record imports.
+
+Bodies are CSV (with a header row) or a JSON array of objects. Every row is
+checked with the schemas.WeightRecordCreate rules plus
+schemas.weight_record_errors, the checks the single-record endpoint
+applies, and comes out either as insert-ready values
+or as an error message list tied to its 0-based position in the input.
+"""
+import csv
+import io
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import orjson
+from pydantic import StrictInt, TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud_async, schemas
+
+CSV_MEDIA_TYPES = frozenset({"text/csv", "application/csv"})
+REQUIRED_COLUMNS = ("date", "user_weight", "combined_weight")
+
+# Only the first errors are returned; the rest are counted
+MAX_REPORTED_ERRORS = 100
+
+_record_adapter = TypeAdapter(schemas.WeightRecordCreate)
+_cat_id_adapter = TypeAdapter(StrictInt)
+_INTEGER = re.compile(r"[+-]?[0-9]+")
+
+
+class ImportFormatError(ValueError):
+    """The body as a whole cannot be read as an import."""
+
+
+class RowError(NamedTuple):
+    index: int
+    errors: List[str]
+
+
+class ValidatedRows(NamedTuple):
+    records: List[Dict[str, Any]]  # insert-ready weight_records values
+    indexes: List[int]  # input position of each record
+    errors: List[RowError]
+
+
+def parse_csv(body: bytes) -> List[Dict[str, Any]]:
+    """Rows of a CSV body as dicts keyed by the header row."""
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportFormatError("CSV body must be UTF-8")
+    reader = csv.DictReader(io.StringIO(text))
+    fields = [name.strip() for name in reader.fieldnames or ()]
+    missing = [column for column in REQUIRED_COLUMNS if column not in fields]
+    if missing:
+        raise ImportFormatError(f"CSV header is missing columns: {', '.join(missing)}")
+    reader.fieldnames = fields
+    try:
+        return list(reader)
+    except csv.Error as exc:
+        raise ImportFormatError(f"Invalid CSV: {exc}")
+
+
+def parse_json(body: bytes) -> List[Any]:
+    try:
+        rows = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        raise ImportFormatError("Invalid JSON body")
+    if not isinstance(rows, list):
+        raise ImportFormatError("JSON body must be an array of weight records")
+    return rows
+
+
+def parse_body(body: bytes, content_type: Optional[str]) -> List[Any]:
+    """Parse an import body according to its Content-Type (JSON by default)."""
+    media_type = (content_type or "").partition(";")[0].strip().lower()
+    if media_type in CSV_MEDIA_TYPES:
+        return parse_csv(body)
+    return parse_json(body)
+
+
+def _messages(exc: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in exc.errors()]
+
+
+def _cat_id(value: Any) -> int:
+    """A cat_id cell: a JSON integer or, from CSV, a string of digits.
+
+    Floats and booleans are rejected rather than truncated to some other cat.
+
+    Raises:
+        ValueError: if the value is not exactly an integer
+    """
+    if isinstance(value, str):
+        if not _INTEGER.fullmatch(value.strip()):
+            raise ValueError(value)
+        return int(value)
+    try:
+        return _cat_id_adapter.validate_python(value)
+    except ValidationError as exc:
+        raise ValueError(value) from exc
+
+
+def validate_rows(rows: List[Any], default_cat_id: Optional[int] = None) -> ValidatedRows:
+    """Validate parsed rows and compute cat_weight for the valid ones.
+
+    Rows without a cat_id (or with an empty one, in CSV) use `default_cat_id`.
+    Cat ownership is not checked here; it needs the database.
+    """
+    records: List[Dict[str, Any]] = []
+    indexes: List[int] = []
+    errors: List[RowError] = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append(RowError(index, ["Row must be an object"]))
+            continue
+
+        messages = []
+        if None in row:
+            # csv.DictReader keeps cells beyond the header under the None key
+            messages.append("Row has more fields than the header")
+        cat_id = row.get("cat_id")
+        if cat_id in (None, ""):
+            cat_id = default_cat_id
+        try:
+            cat_id = _cat_id(cat_id) if cat_id is not None else None
+        except ValueError:
+            cat_id = None
+            messages.append("cat_id: Input should be a valid integer")
+        else:
+            if cat_id is None:
+                messages.append("cat_id: Field required")
+
+        try:
+            record = _record_adapter.validate_python(row)
+        except ValidationError as exc:
+            errors.append(RowError(index, messages + _messages(exc)))
+            continue
+        messages.extend(schemas.weight_record_errors(record))
+        if messages:
+            errors.append(RowError(index, messages))
+            continue
+
+        records.append({
+            "date": record.date,
+            "user_weight": record.user_weight,
+            "combined_weight": record.combined_weight,
+            "cat_weight": record.combined_weight - record.user_weight,
+            "cat_id": cat_id,
+        })
+        indexes.append(index)
+    return ValidatedRows(records, indexes, errors)
+
+
+def read_body(body: bytes, content_type: Optional[str],
+              default_cat_id: Optional[int] = None) -> ValidatedRows:
+    """Parse and validate an import body.
+
+    CPU-bound (around 10 us per row), so the endpoint runs it on the threadpool.
+
+    Raises:
+        ImportFormatError: if the body as a whole cannot be read
+    """
+    return validate_rows(parse_body(body, content_type), default_cat_id)
+
+
+def report(imported: int, errors: List[RowError]) -> Dict[str, Any]:
+    """Response body of an import (schemas.WeightImportResult)."""
+    errors = sorted(errors)
+    return {
+        "imported": imported,
+        "rejected": len(errors),
+        "errors": [{"index": error.index, "errors": error.errors}
+                   for error in errors[:MAX_REPORTED_ERRORS]],
+    }
+
+
+async def import_rows(db: AsyncSession, validated: ValidatedRows, user_id: int,
+                      partial: bool = False) -> Optional[Dict[str, Any]]:
+    """Check cat ownership of validated rows in one query and insert in one transaction.
+
+    Unless `partial` is set, nothing is written when any row is rejected.
+
+    Returns:
+        The import report, or None if the insert failed
+    """
+    errors = list(validated.errors)
+    owned = await crud_async.get_owned_cat_ids(
+        db, user_id, {record["cat_id"] for record in validated.records})
+
+    records = []
+    for index, record in zip(validated.indexes, validated.records):
+        if record["cat_id"] in owned:
+            records.append(record)
+        else:
+            errors.append(RowError(index, ["cat_id: Cat not found"]))
+
+    if errors and not partial:
+        return report(0, errors)
+    imported = await crud_async.bulk_create_weight_records(db, records) if records else 0
+    if imported is None:
+        return None
+    return report(imported, errors)
@@ -0,0 +1,111 @@
+"""Non-blocking logging setup.
+
+Request-path code only puts records on an in-memory queue; a QueueListener
+thread formats and writes them. Access log entries are structlog event dicts
+rendered as one JSON line each, also on the listener thread.
+"""
+import atexit
+import logging
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+import structlog
+
+from .config import Settings
+
+ACCESS_LOGGER = "app.access"
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks and leaves formatting to the listener.
+
+    When the queue is full the record is dropped and counted rather than
+    stalling the caller.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same-process listener: hand the record over untouched
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _ExcludeFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not super().filter(record)
+
+
+def _record_timestamp(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Stamp the event with the time it was logged, not the time it was written."""
+    record = event_dict.get("_record")
+    created = record.created if record is not None else datetime.now(timezone.utc).timestamp()
+    event_dict["timestamp"] = datetime.fromtimestamp(created, timezone.utc).isoformat()
+    event_dict.setdefault("level", record.levelname.lower() if record is not None else "info")
+    return event_dict
+
+
+def access_formatter() -> structlog.stdlib.ProcessorFormatter:
+    """Renders structlog access events as single-line JSON."""
+    return structlog.stdlib.ProcessorFormatter(processors=[
+        _record_timestamp,
+        structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+        structlog.processors.JSONRenderer(),
+    ])
+
+
+queue_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(config: Settings) -> None:
+    """Route all logging through a bounded queue drained by a listener thread.
+
+    Idempotent; later calls are ignored.
+    """
+    global queue_handler, _listener
+    if _listener is not None:
+        return
+
+    text_handler = logging.StreamHandler()
+    text_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    text_handler.addFilter(_ExcludeFilter(ACCESS_LOGGER))
+
+    access_handler = logging.StreamHandler()
+    access_handler.setFormatter(access_formatter())
+    access_handler.addFilter(logging.Filter(ACCESS_LOGGER))
+
+    structlog.configure(
+        processors=[structlog.stdlib.ProcessorFormatter.wrap_for_formatter],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=max(config.LOG_QUEUE_SIZE, 1)))
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(logging.INFO)
+
+    _listener = QueueListener(queue_handler.queue, text_handler, access_handler,
+                              respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Stop the listener after writing out everything still queued."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
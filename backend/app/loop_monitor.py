@@ -0,0 +1,188 @@
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from .config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Only frames from our own package are useful when reporting a stall
+APP_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """Describe a request by method and route template (falls back to the raw path)."""
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    if len(path) > 100:
+        path = path[:97] + "..."
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+class LoopLagMonitor:
+    """Measures event loop delay and reports stalls with the routes in flight.
+
+    A heartbeat task sleeps for `interval` seconds and measures how late it
+    wakes up; the difference is the loop lag. A watchdog thread notices an
+    overdue heartbeat while the loop is still blocked and captures the loop
+    thread's stack, so the log names the code that blocked, not just the
+    requests that happened to be running.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1, history: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._inflight: Dict[int, Dict[str, Any]] = {}
+        self._ids = itertools.count()
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._captured: Optional[Dict[str, List[str]]] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear recorded statistics."""
+        with self._lock:
+            self._samples = 0
+            self._lag_sum = 0.0
+            self._lag_max = 0.0
+            self._stalls = 0
+            self._recent.clear()
+
+    # Request tracking
+
+    def track(self, scope: Dict[str, Any]) -> int:
+        """Register an in-flight request; returns a token for untrack()."""
+        token = next(self._ids)
+        self._inflight[token] = scope
+        return token
+
+    def untrack(self, token: int) -> None:
+        self._inflight.pop(token, None)
+
+    def inflight_routes(self) -> List[str]:
+        return [route_label(scope) for scope in list(self._inflight.values())]
+
+    # Measurement
+
+    def record_lag(self, lag: float, stack: Optional[List[str]] = None,
+                   routes: Optional[List[str]] = None) -> None:
+        """Record one heartbeat's lag and report it if it crosses the threshold.
+
+        Args:
+            lag: Seconds the heartbeat woke up late
+            stack: Loop thread stack captured during the stall, if any
+            routes: Routes in flight during the stall (defaults to the current ones)
+        """
+        with self._lock:
+            self._samples += 1
+            self._lag_sum += lag
+            if lag > self._lag_max:
+                self._lag_max = lag
+        if lag < self.threshold:
+            return
+
+        if routes is None:
+            routes = self.inflight_routes()
+        stall = {
+            "lag_ms": round(lag * 1000, 1),
+            "at": time.time(),
+            "routes": routes,
+            "stack": stack or [],
+        }
+        with self._lock:
+            self._stalls += 1
+            self._recent.append(stall)
+        logger.warning(
+            "Event loop blocked for %.1fms; in-flight: %s%s",
+            lag * 1000,
+            ", ".join(routes) or "none",
+            ("; blocked at: " + " <- ".join(stack)) if stack else "",
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lag_avg = self._lag_sum / self._samples if self._samples else 0.0
+            return {
+                "interval": self.interval,
+                "threshold": self.threshold,
+                "samples": self._samples,
+                "lag_avg_ms": round(1000 * lag_avg, 3),
+                "lag_max_ms": round(1000 * self._lag_max, 3),
+                "stalls": self._stalls,
+                "recent_stalls": list(self._recent),
+            }
+
+    # Lifecycle
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - start - self.interval, 0.0)
+            captured, self._captured = self._captured, None
+            if captured is not None:
+                self.record_lag(lag, captured["stack"], captured["routes"])
+            else:
+                self.record_lag(lag)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            overdue = time.monotonic() - self._last_beat - self.interval
+            if overdue < self.threshold or self._captured is not None:
+                continue
+            # The loop is still blocked: record what it is doing right now
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = [] if frame is None else [
+                f"{entry.filename[len(APP_DIR):]}:{entry.lineno} {entry.name}"
+                for entry in reversed(traceback.extract_stack(frame))
+                if entry.filename.startswith(APP_DIR)
+            ][:5]
+            self._captured = {"stack": stack, "routes": self.inflight_routes()}
+
+    def start(self) -> None:
+        """Start the heartbeat on the running loop and the watchdog thread."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog",
+                                          daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and watchdog."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+
+# Global monitor for the application's event loop
+loop_monitor = LoopLagMonitor(
+    interval=settings.LOOP_LAG_INTERVAL,
+    threshold=settings.LOOP_LAG_THRESHOLD,
+)
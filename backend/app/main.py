@@ -1,28 +1,42 @@
-from typing import List, Dict
+from typing import Any, Dict, List, Optional, Union
 import logging
 import os
-import time
 from contextlib import asynccontextmanager
-from .database import get_db
-from datetime import timedelta
+from .database import (async_pool_monitor, get_async_db, get_async_sessionmaker, get_db,
+                       pool_monitor)
+from datetime import date, timedelta
 
-from fastapi import (APIRouter, Depends, FastAPI, HTTPException, Request,
+import anyio.to_thread
+from fastapi import (APIRouter, Depends, FastAPI, HTTPException, Query, Request,
                      status)
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
 from pydantic import ValidationError
 
-from . import auth, crud, models, plots, schemas
+from . import (auth, batch, crud, crud_async, exports, imports, logging_config, models, pagination,
+               plots, schemas)
+from .cache import user_cache
 from .config import settings
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+from .hashing import password_hasher
+from .logging_config import configure_logging
+from .loop_monitor import loop_monitor
+from .metrics import MetricFamily, registry
+from .pagination import CURSOR_HEADER, InvalidCursor
+from .responses import FastJSONResponse, ResponseFactory, negotiate_response
+from .tracing import TracedRoute
+from .middleware import (AccessLogMiddleware, CompressionMiddleware, MetricsMiddleware,
+                         MsgPackBodyMiddleware, QueryStatsMiddleware, RateLimitMiddleware,
+                         RequestSizeLimitMiddleware, SecurityHeadersMiddleware,
+                         TracingMiddleware)
+from . import rate_limit
+
+# Configure logging (queued; written by a background listener thread)
+configure_logging(settings)
 logger = logging.getLogger(__name__)
 
 # Define lifespan context manager for startup/shutdown events
@@ -32,12 +46,19 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     # Startup: Create default user if needed
     db = next(get_db())
-    crud.create_default_user(db)
+    await run_in_threadpool(crud.create_default_user, db)
+    # Drop refresh tokens that can no longer be used
+    await run_in_threadpool(crud.purge_refresh_tokens, db)
+    if settings.LOOP_LAG_MONITOR_ENABLED:
+        loop_monitor.start()
     yield
-    # Shutdown: Nothing to do here
+    # Shutdown: Stop background monitors
+    await loop_monitor.stop()
 
 # Create FastAPI app with lifespan
-app = FastAPI(title="Cat Weight Tracker API", lifespan=lifespan)
+app = FastAPI(title="Cat Weight Tracker API", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
+app.router.route_class = TracedRoute
 
 # Global exception handlers
 @app.exception_handler(RequestValidationError)
@@ -49,7 +70,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         message = error["msg"]
         errors.append(f"{field}: {message}")
     
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=422,
         content={
             "detail": "Validation error",
@@ -60,7 +81,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(ValueError)
 async def value_error_handler(request: Request, exc: ValueError):
     """Handle value errors from validation."""
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=400,
         content={"detail": str(exc)}
     )
@@ -69,13 +90,14 @@ async def value_error_handler(request: Request, exc: ValueError):
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle unexpected errors."""
     logger.error(f"Unexpected error: {str(exc)}", exc_info=True)
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={"detail": "An unexpected error occurred. Please try again later."}
     )
 
 # Create API router for /api prefix
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", route_class=TracedRoute,
+                       default_response_class=FastJSONResponse)
 
 # Configure CORS - secure origins configuration
 def get_cors_origins():
@@ -102,80 +124,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CURSOR_HEADER],
 )
 
-# Add middleware for request logging and rate limiting
-from collections import defaultdict
-from datetime import datetime, timedelta
-
-# Simple in-memory rate limiting (use Redis in production)
-request_counts = defaultdict(list)
-MAX_REQUESTS_PER_MINUTE = int(os.environ.get("RATE_LIMIT_PER_MINUTE", "0"))  # 0 = disabled
+# Compression, request limits, access logging and security headers (pure ASGI;
+# the last added middleware runs first)
 MAX_REQUEST_SIZE = 10 * 1024 * 1024  # 10MB
-RATE_LIMITING_ENABLED = MAX_REQUESTS_PER_MINUTE > 0
 
-@app.middleware("http")
-async def security_middleware(request: Request, call_next):
-    start_time = time.time()
-    
-    # Get client IP for logging and rate limiting
-    client_ip = request.client.host if request.client else "unknown"
-    
-    # Check request size
-    content_length = request.headers.get("content-length")
-    if content_length and int(content_length) > MAX_REQUEST_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail="Request too large"
-        )
-    
-    # Simple rate limiting by IP (only if enabled)
-    if RATE_LIMITING_ENABLED:
-        now = datetime.now()
-        
-        # Clean old requests (older than 1 minute)
-        cutoff_time = now - timedelta(minutes=1)
-        request_counts[client_ip] = [
-            req_time for req_time in request_counts[client_ip] 
-            if req_time > cutoff_time
-        ]
-        
-        # Check rate limit
-        if len(request_counts[client_ip]) >= MAX_REQUESTS_PER_MINUTE:
-            raise HTTPException(
-                status_code=429,
-                detail="Too many requests. Please try again later."
-            )
-        
-        # Add current request
-        request_counts[client_ip].append(now)
-
-    # Sanitize path for logging (prevent log injection)
-    request_path = request.url.path
-    if len(request_path) > 100:
-        request_path = request_path[:97] + "..."
-    
-    # Sanitize method for logging
-    request_method = request.method
-    if not request_method.isalpha() or len(request_method) > 10:
-        request_method = "INVALID"
-
-    logger.info("Request: %s %s from %s", request_method, request_path, client_ip)
-
-    response = await call_next(request)
-
-    # Log response time
-    process_time = time.time() - start_time
-    logger.info("Response: %s %s completed in %.3fs with status %d",
-                request_method, request_path, process_time, response.status_code)
-    
-    # Add security headers
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-
-    return response
+app.add_middleware(MsgPackBodyMiddleware)
+app.add_middleware(CompressionMiddleware,
+                   minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+                   gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+                   brotli_quality=settings.COMPRESSION_BROTLI_QUALITY)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(RequestSizeLimitMiddleware, max_size=MAX_REQUEST_SIZE)
+app.add_middleware(AccessLogMiddleware,
+                   sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+                   slow_threshold=settings.ACCESS_LOG_SLOW_THRESHOLD)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(SecurityHeadersMiddleware)
 
 
 # Health check endpoint for root path
@@ -188,9 +157,128 @@ def health_check() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+# Internal operator endpoints
+def require_internal_endpoints() -> None:
+    """Hide internal endpoints unless explicitly enabled."""
+    if not settings.INTERNAL_ENDPOINTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+def collect_runtime_metrics() -> List[MetricFamily]:
+    """Scrape-time gauges from the threadpool, DB pools, bcrypt pool and event loop."""
+    families = []
+
+    try:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        families += [
+            MetricFamily("threadpool_threads_in_use", "gauge",
+                         "Worker threads busy running sync endpoints and dependencies.")
+            .add(limiter.borrowed_tokens),
+            MetricFamily("threadpool_threads_limit", "gauge",
+                         "Maximum number of threadpool worker threads.")
+            .add(limiter.total_tokens),
+            MetricFamily("threadpool_tasks_waiting", "gauge",
+                         "Calls queued for a free threadpool worker.")
+            .add(limiter.statistics().tasks_waiting),
+        ]
+    except RuntimeError:
+        pass  # not called from the event loop
+
+    checked_out = MetricFamily("db_pool_checked_out", "gauge",
+                               "Connections currently checked out of the pool.")
+    pool_size = MetricFamily("db_pool_size", "gauge", "Configured pool size.")
+    overflow = MetricFamily("db_pool_overflow", "gauge", "Overflow connections in use.")
+    checkouts = MetricFamily("db_pool_checkouts_total", "counter", "Connection checkouts.")
+    timeouts = MetricFamily("db_pool_timeouts_total", "counter",
+                            "Checkouts that timed out waiting for a connection.")
+    wait = MetricFamily("db_pool_wait_seconds", "histogram",
+                        "Time spent waiting for a pooled connection.")
+    for name, monitor in (("sync", pool_monitor), ("async", async_pool_monitor)):
+        stats = monitor.snapshot()
+        checked_out.add(stats.get("checked_out", 0), pool=name)
+        pool_size.add(stats.get("pool_size", 0), pool=name)
+        overflow.add(stats.get("overflow", 0), pool=name)
+        checkouts.add(stats["checkouts"], pool=name)
+        timeouts.add(stats["timeouts"], pool=name)
+        wait.add_histogram(stats["wait_time"], pool=name)
+    families += [checked_out, pool_size, overflow, checkouts, timeouts, wait]
+
+    hashing = password_hasher.stats()
+    families += [
+        MetricFamily("password_hash_pending", "gauge",
+                     "bcrypt jobs running or queued on the password worker pool.")
+        .add(hashing["pending"]),
+        MetricFamily("password_hash_rejected_total", "counter",
+                     "Password operations rejected because the pool was full.")
+        .add(hashing["rejected"]),
+        MetricFamily("password_hash_queue_wait_seconds", "histogram",
+                     "Time bcrypt jobs waited for a worker.")
+        .add_histogram(hashing["queue_wait"]),
+        MetricFamily("password_hash_duration_seconds", "histogram",
+                     "bcrypt hash and verify duration.")
+        .add_histogram(hashing["hash_latency"], operation="hash")
+        .add_histogram(hashing["verify_latency"], operation="verify"),
+    ]
+
+    families.append(MetricFamily("event_loop_stalls_total", "counter",
+                                 "Event loop stalls longer than the lag threshold.")
+                    .add(loop_monitor.snapshot()["stalls"]))
+    if logging_config.queue_handler is not None:
+        families.append(MetricFamily("log_records_dropped_total", "counter",
+                                     "Log records dropped because the log queue was full.")
+                        .add(logging_config.queue_handler.dropped))
+    return families
+
+
+registry.register_collector(collect_runtime_metrics)
+
+
+@app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse,
+         dependencies=[Depends(require_internal_endpoints)])
+async def get_metrics() -> PlainTextResponse:
+    """Prometheus text exposition of request, pool, threadpool and bcrypt metrics."""
+    return PlainTextResponse(registry.render(),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/internal/pool", include_in_schema=False,
+         dependencies=[Depends(require_internal_endpoints)])
+def get_pool_stats() -> Dict[str, Any]:
+    """Live connection pool statistics (checked-out, overflow, wait time histogram)."""
+    return {"sync": pool_monitor.snapshot(), "async": async_pool_monitor.snapshot()}
+
+
+@app.get("/internal/loop", include_in_schema=False,
+         dependencies=[Depends(require_internal_endpoints)])
+def get_loop_stats() -> Dict[str, Any]:
+    """Event loop lag statistics and recent stalls with the routes in flight."""
+    return loop_monitor.snapshot()
+
+
+@app.get("/internal/user-cache", include_in_schema=False,
+         dependencies=[Depends(require_internal_endpoints)])
+def get_user_cache_stats() -> Dict[str, Any]:
+    """Authenticated-user cache statistics; each hit is one user lookup query saved."""
+    return user_cache.stats()
+
+
+@app.get("/internal/password-hashing", include_in_schema=False,
+         dependencies=[Depends(require_internal_endpoints)])
+def get_password_hashing_stats() -> Dict[str, Any]:
+    """bcrypt worker pool depth, rejections, queue wait and hash latency."""
+    return password_hasher.stats()
+
+
+@app.get("/internal/rate-limit", include_in_schema=False,
+         dependencies=[Depends(require_internal_endpoints)])
+def get_rate_limit_stats() -> Dict[str, Any]:
+    """Configured limits, rejections by limit and tracked key counts."""
+    return rate_limit.rate_limiter.stats()
+
+
 # Authentication endpoints
 @app.post("/auth/register", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user with enhanced validation."""
     try:
         # Check if registration is enabled
@@ -200,23 +288,25 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
                 detail="Registration is currently disabled"
             )
 
-        # Check for existing username
-        db_user = crud.get_user_by_username(db, username=user.username)
-        if db_user:
+        db_user = await crud_async.create_user(db=db, user=user)
+        if db_user is not None:
+            return db_user
+
+        # Not created: look up which of username and email is taken
+        if await crud_async.get_user_by_username(db, username=user.username):
             raise HTTPException(
                 status_code=409, 
                 detail="Username already exists. Please choose a different username."
             )
-
-        # Check for existing email
-        db_user = crud.get_user_by_email(db, email=user.email)
-        if db_user:
+        if await crud_async.get_user_by_email(db, email=user.email):
             raise HTTPException(
                 status_code=409, 
                 detail="Email already registered. Please use a different email or try logging in."
             )
-
-        return crud.create_user(db=db, user=user)
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred during registration. Please try again."
+        )
     
     except HTTPException:
         raise
@@ -229,12 +319,12 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
 
 
 @app.post("/auth/login", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
         form_data: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)):
+        db: AsyncSession = Depends(get_async_db)):
     """Authenticate user and return access token."""
     try:
-        user = auth.authenticate_user(db, form_data.username, form_data.password)
+        user = await auth.authenticate_user_async(db, form_data.username, form_data.password)
         if not user:
             # Use generic message to prevent username enumeration
             raise HTTPException(
@@ -250,11 +340,8 @@ def login_for_access_token(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = auth.create_access_token(
-            data={"sub": user.username}, expires_delta=access_token_expires
-        )
-        return {"access_token": access_token, "token_type": "bearer"}
+        refresh_token = await crud_async.create_refresh_token(db, user.id)
+        return _token_response(user, refresh_token)
     
     except HTTPException:
         raise
@@ -266,90 +353,164 @@ def login_for_access_token(
         )
 
 
+def _token_response(user: models.User, refresh_token: Optional[str]) -> Dict[str, Any]:
+    """Build the token payload returned by login and refresh."""
+    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = auth.create_access_token(
+        data={"sub": user.username}, expires_delta=access_token_expires
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": int(access_token_expires.total_seconds()),
+    }
+
+
+@app.post("/auth/refresh", response_model=schemas.Token)
+async def refresh_access_token(
+        body: schemas.RefreshTokenRequest,
+        db: AsyncSession = Depends(get_async_db)):
+    """Exchange a refresh token for a new access token and a rotated refresh token."""
+    rotated = await crud_async.rotate_refresh_token(db, body.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token. Please log in again.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user, refresh_token = rotated
+    return _token_response(user, refresh_token)
+
+
+@app.post("/auth/logout")
+async def logout(
+        body: schemas.RefreshTokenRequest,
+        db: AsyncSession = Depends(get_async_db)):
+    """Revoke the refresh token (and its rotation family)."""
+    await crud_async.revoke_refresh_token(db, body.refresh_token)
+    return {"detail": "Logged out successfully"}
+
+
 @app.get("/auth/me", response_model=schemas.User)
 def read_users_me(current_user: models.User = Depends(auth.get_current_active_user)):
     return current_user
 
 
 @app.get("/auth/users/me/cats", response_model=List[schemas.Cat])
-def read_own_cats(
+async def read_own_cats(
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
+):
+    cats = await crud_async.get_cat_rows(db, user_id=current_user.id, skip=skip, limit=limit)
+    return FastJSONResponse(cats)
+
+
+@app.get("/auth/users/me/dashboard", response_model=List[schemas.DashboardCat])
+async def read_dashboard(
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    cats = crud.get_cats(db, user_id=current_user.id, skip=skip, limit=limit)
-    return cats
+    """Every cat of the caller with its latest weight, target delta and 30-day change."""
+    return FastJSONResponse(await crud_async.get_dashboard_rows(db, user_id=current_user.id))
 
 
 # Cat endpoints for root path
 @app.post("/cats/", response_model=schemas.Cat)
-def create_cat(
+async def create_cat(
     cat: schemas.CatCreate,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Input validation beyond Pydantic
-    if len(cat.name) > 50:
-        raise HTTPException(status_code=400, detail="Cat name too long")
-    if cat.target_weight <= 0 or cat.target_weight > 30:
-        raise HTTPException(status_code=400, detail="Invalid target weight")
+    errors = schemas.cat_errors(cat)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[0])
 
-    return crud.create_cat(db=db, cat=cat, user_id=current_user.id)
+    return await crud_async.create_cat(db=db, cat=cat, user_id=current_user.id)
 
 
 @app.get("/cats/", response_model=List[schemas.Cat])
-def read_cats(
+async def read_cats(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    respond: ResponseFactory = Depends(negotiate_response)
 ):
     # Limit the maximum number of records that can be fetched
     if limit > 100:
         limit = 100
-    cats = crud.get_cats(db, user_id=current_user.id, skip=skip, limit=limit)
-    return cats
+    try:
+        after = pagination.decode_cat_cursor(cursor) if cursor else None
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    cats = await crud_async.get_cat_rows(db, user_id=current_user.id, skip=skip, limit=limit,
+                                         after=after)
+    # Rows are already shaped like schemas.Cat; returning a response skips per-row validation
+    response = respond(cats)
+    last = (cats[-1]["name"], cats[-1]["id"]) if cats else None
+    next_cursor = pagination.next_cursor("cat", last, len(cats), limit)
+    if next_cursor:
+        response.headers[CURSOR_HEADER] = next_cursor
+    return response
 
 
-@app.get("/cats/{cat_id}", response_model=schemas.CatWithRecords)
-def read_cat(
+@app.get("/cats/{cat_id}", response_model=Union[schemas.CatWithRecords, schemas.CatSummary])
+async def read_cat(
     cat_id: int,
+    view: schemas.CatView = "full",
+    recent: int = 10,
+    points: int = 100,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_cat = crud.get_cat(db, cat_id=cat_id, user_id=current_user.id)
+    """A cat with all its weight records, or a bounded bundle with ?view=summary.
+
+    The summary has the `recent` latest records, stats over the whole history
+    and a downsampled series of at most `points` points.
+    """
+    if view == "summary":
+        db_cat = await crud_async.get_cat_summary(
+            db, cat_id=cat_id, user_id=current_user.id,
+            recent=max(0, min(recent, 100)), points=max(1, min(points, 200)))
+    else:
+        db_cat = await crud_async.get_cat_with_record_rows(
+            db, cat_id=cat_id, user_id=current_user.id)
     if db_cat is None:
         raise HTTPException(status_code=404, detail="Cat not found")
-    return db_cat
+    return FastJSONResponse(db_cat)
 
 
 @app.put("/cats/{cat_id}", response_model=schemas.Cat)
-def update_cat(
+async def update_cat(
     cat_id: int,
     cat: schemas.CatCreate,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Input validation
-    if len(cat.name) > 50:
-        raise HTTPException(status_code=400, detail="Cat name too long")
-    if cat.target_weight <= 0 or cat.target_weight > 30:
-        raise HTTPException(status_code=400, detail="Invalid target weight")
+    errors = schemas.cat_errors(cat)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[0])
 
-    db_cat = crud.update_cat(db, cat_id=cat_id, cat=cat, user_id=current_user.id)
+    db_cat = await crud_async.update_cat(db, cat_id=cat_id, cat=cat, user_id=current_user.id)
     if db_cat is None:
         raise HTTPException(status_code=404, detail="Cat not found")
     return db_cat
 
 
 @app.delete("/cats/{cat_id}")
-def delete_cat(
+async def delete_cat(
     cat_id: int,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    success = crud.delete_cat(db, cat_id=cat_id, user_id=current_user.id)
+    success = await crud_async.delete_cat(db, cat_id=cat_id, user_id=current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Cat not found")
     return {"detail": "Cat deleted successfully"}
@@ -357,99 +518,199 @@ def delete_cat(
 
 # Cat endpoints for /api prefix
 @app.post("/api/cats/", response_model=schemas.Cat)
-def create_cat_api(
+async def create_cat_api(
     cat: schemas.CatCreate,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return create_cat(cat, current_user, db)
+    return await create_cat(cat, current_user, db)
 
 
 @app.get("/api/cats/", response_model=List[schemas.Cat])
-def read_cats_api(
+async def read_cats_api(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    respond: ResponseFactory = Depends(negotiate_response)
 ):
-    return read_cats(skip, limit, current_user, db)
+    return await read_cats(skip, limit, cursor, current_user, db, respond)
 
 
-@app.get("/api/cats/{cat_id}", response_model=schemas.CatWithRecords)
-def read_cat_api(
+@app.get("/api/cats/{cat_id}",
+         response_model=Union[schemas.CatWithRecords, schemas.CatSummary])
+async def read_cat_api(
     cat_id: int,
+    view: schemas.CatView = "full",
+    recent: int = 10,
+    points: int = 100,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return read_cat(cat_id, current_user, db)
+    return await read_cat(cat_id, view, recent, points, current_user, db)
 
 
 @app.put("/api/cats/{cat_id}", response_model=schemas.Cat)
-def update_cat_api(
+async def update_cat_api(
     cat_id: int,
     cat: schemas.CatCreate,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return update_cat(cat_id, cat, current_user, db)
+    return await update_cat(cat_id, cat, current_user, db)
 
 
 @app.delete("/api/cats/{cat_id}")
-def delete_cat_api(
+async def delete_cat_api(
     cat_id: int,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return delete_cat(cat_id, current_user, db)
+    return await delete_cat(cat_id, current_user, db)
 
 
 # Weight record endpoints
 @app.post("/cats/{cat_id}/weights/", response_model=schemas.WeightRecord)
-def create_weight_record(
+async def create_weight_record(
     cat_id: int,
     weight_record: schemas.WeightRecordCreate,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Input validation
-    if weight_record.user_weight <= 0 or weight_record.user_weight > 500:
-        raise HTTPException(status_code=400, detail="Invalid user weight")
-    if weight_record.combined_weight <= weight_record.user_weight:
-        raise HTTPException(
-            status_code=400,
-            detail="Combined weight must be greater than user weight")
-
-    db_cat = crud.get_cat(db, cat_id=cat_id, user_id=current_user.id)
-    if db_cat is None:
+    errors = schemas.weight_record_errors(weight_record)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[0])
+
+    # Ownership is checked by the INSERT itself
+    db_record = await crud_async.create_weight_record(
+        db=db, weight_record=weight_record, cat_id=cat_id, user_id=current_user.id)
+    if db_record is not None:
+        return db_record
+
+    # Not created: look up whether the cat was missing or the insert failed
+    if not await crud_async.get_owned_cat_ids(db, current_user.id, [cat_id]):
         raise HTTPException(status_code=404, detail="Cat not found")
-    return crud.create_weight_record(db=db, weight_record=weight_record, cat_id=cat_id)
+    raise HTTPException(status_code=500, detail="Failed to create weight record")
+
+
+def date_range(
+    date_from: Optional[date] = Query(None, alias="from",
+                                      description="Earliest record date to include"),
+    date_to: Optional[date] = Query(None, alias="to",
+                                    description="Latest record date to include")
+) -> schemas.DateRange:
+    """The ?from=&to= window (both inclusive) of the weight list, plot and export."""
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return schemas.DateRange(start=date_from, end=date_to)
 
 
-@app.get("/cats/{cat_id}/weights/", response_model=List[schemas.WeightRecord])
-def read_weight_records(
+@app.get("/cats/{cat_id}/weights/",
+         response_model=Union[List[schemas.WeightRecord], schemas.WeightColumns])
+async def read_weight_records(
     cat_id: int,
     skip: int = 0,
     limit: int = 100,
+    format: schemas.SeriesFormat = "rows",
+    cursor: Optional[str] = None,
+    dates: schemas.DateRange = Depends(date_range),
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    respond: ResponseFactory = Depends(negotiate_response)
 ):
     # Limit the maximum number of records that can be fetched
     if limit > 100:
         limit = 100
+    try:
+        after = pagination.decode_weight_record_cursor(cursor) if cursor else None
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
-    db_cat = crud.get_cat(db, cat_id=cat_id, user_id=current_user.id)
+    db_cat = await crud_async.get_cat(db, cat_id=cat_id, user_id=current_user.id)
     if db_cat is None:
         raise HTTPException(status_code=404, detail="Cat not found")
-    return crud.get_weight_records(db, cat_id=cat_id, skip=skip, limit=limit)
+    if format == "columnar":
+        columns = await crud_async.get_weight_record_columns(
+            db, cat_id=cat_id, skip=skip, limit=limit, after=after,
+            date_from=dates.start, date_to=dates.end)
+        response = respond(columns)
+        count = len(columns["id"])
+        last = (columns["date"][-1], columns["id"][-1]) if count else None
+    else:
+        records = await crud_async.get_weight_record_rows(
+            db, cat_id=cat_id, skip=skip, limit=limit, after=after,
+            date_from=dates.start, date_to=dates.end)
+        response = respond(records)
+        count = len(records)
+        last = (records[-1]["date"], records[-1]["id"]) if count else None
+    next_cursor = pagination.next_cursor("weight_record", last, count, limit)
+    if next_cursor:
+        response.headers[CURSOR_HEADER] = next_cursor
+    return response
+
+
+@app.post("/weights/import", response_model=schemas.WeightImportResult,
+          responses={422: {"model": schemas.WeightImportResult}})
+async def import_weight_records(
+    request: Request,
+    cat_id: Optional[int] = None,
+    partial: bool = False,
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Import many weight records, for one or several cats, from CSV or a JSON array.
+
+    CSV needs a header with date, user_weight and combined_weight columns
+    (Content-Type: text/csv); JSON is an array of objects with the same
+    fields. Each row may name its cat_id, otherwise the cat_id query
+    parameter applies. Rows are validated like single records and inserted
+    in one transaction. If any row is rejected nothing is imported and the
+    per-row errors come back with a 422, unless partial=true, in which case
+    the valid rows are stored.
+    """
+    body = await request.body()
+    try:
+        # Parsing and validating every row is CPU-bound; keep it off the event loop
+        validated = await run_in_threadpool(
+            imports.read_body, body, request.headers.get("content-type"), cat_id)
+    except imports.ImportFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    result = await imports.import_rows(db, validated, user_id=current_user.id,
+                                       partial=partial)
+    if result is None:
+        raise HTTPException(status_code=500, detail="Failed to import weight records")
+    if result["rejected"] and not partial:
+        return FastJSONResponse(status_code=422, content=result)
+    return result
+
+
+@app.get("/weights/export")
+async def export_weight_records(
+    format: schemas.ExportFormat = "csv",
+    dates: schemas.DateRange = Depends(date_range),
+    current_user: models.User = Depends(auth.get_current_active_user),
+    session_factory: async_sessionmaker = Depends(get_async_sessionmaker)
+):
+    """Stream every weight record of the caller's cats as CSV or NDJSON."""
+    return StreamingResponse(
+        exports.stream_weight_history(session_factory, current_user.id, format,
+                                      date_from=dates.start, date_to=dates.end),
+        media_type=exports.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="weights.{format}"'},
+    )
 
 
 @app.delete("/weights/{record_id}")
-def delete_weight_record(
+async def delete_weight_record(
     record_id: int,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    success = crud.delete_weight_record(db, record_id=record_id, user_id=current_user.id)
+    success = await crud_async.delete_weight_record(
+        db, record_id=record_id, user_id=current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Weight record not found")
     return {"detail": "Weight record deleted successfully"}
@@ -457,67 +718,133 @@ def delete_weight_record(
 
 # Weight record endpoints with /api prefix
 @app.post("/api/cats/{cat_id}/weights/", response_model=schemas.WeightRecord)
-def create_weight_record_api(
+async def create_weight_record_api(
     cat_id: int,
     weight_record: schemas.WeightRecordCreate,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return create_weight_record(cat_id, weight_record, current_user, db)
+    return await create_weight_record(cat_id, weight_record, current_user, db)
 
 
-@app.get("/api/cats/{cat_id}/weights/", response_model=List[schemas.WeightRecord])
-def read_weight_records_api(
+@app.get("/api/cats/{cat_id}/weights/",
+         response_model=Union[List[schemas.WeightRecord], schemas.WeightColumns])
+async def read_weight_records_api(
     cat_id: int,
     skip: int = 0,
     limit: int = 100,
+    format: schemas.SeriesFormat = "rows",
+    cursor: Optional[str] = None,
+    dates: schemas.DateRange = Depends(date_range),
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    respond: ResponseFactory = Depends(negotiate_response)
 ):
-    return read_weight_records(cat_id, skip, limit, current_user, db)
+    return await read_weight_records(cat_id, skip, limit, format, cursor, dates, current_user,
+                                     db, respond)
+
+
+@app.post("/api/weights/import", response_model=schemas.WeightImportResult,
+          responses={422: {"model": schemas.WeightImportResult}})
+async def import_weight_records_api(
+    request: Request,
+    cat_id: Optional[int] = None,
+    partial: bool = False,
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await import_weight_records(request, cat_id, partial, current_user, db)
+
+
+@app.get("/api/weights/export")
+async def export_weight_records_api(
+    format: schemas.ExportFormat = "csv",
+    dates: schemas.DateRange = Depends(date_range),
+    current_user: models.User = Depends(auth.get_current_active_user),
+    session_factory: async_sessionmaker = Depends(get_async_sessionmaker)
+):
+    return await export_weight_records(format, dates, current_user, session_factory)
 
 
 @app.delete("/api/weights/{record_id}")
-def delete_weight_record_api(
+async def delete_weight_record_api(
     record_id: int,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return delete_weight_record(record_id, current_user, db)
+    return await delete_weight_record(record_id, current_user, db)
 
 
 # Plot data endpoint
-@app.get("/cats/{cat_id}/plot", response_model=schemas.PlotData)
-def get_plot_data(
+@app.get("/cats/{cat_id}/plot", response_model=Union[schemas.PlotData, schemas.PlotColumns])
+async def get_plot_data(
     cat_id: int,
+    format: schemas.SeriesFormat = "rows",
+    dates: schemas.DateRange = Depends(date_range),
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    respond: ResponseFactory = Depends(negotiate_response)
 ):
-    db_cat = crud.get_cat(db, cat_id=cat_id, user_id=current_user.id)
+    db_cat = await crud_async.get_cat(db, cat_id=cat_id, user_id=current_user.id)
     if db_cat is None:
         raise HTTPException(status_code=404, detail="Cat not found")
 
-    plot_data = plots.generate_weight_plot(db, cat_id)
+    plot_data = await plots.generate_weight_plot_async(
+        db, cat_id, columnar=format == "columnar", date_from=dates.start, date_to=dates.end)
     if plot_data is None:
         raise HTTPException(status_code=404, detail="Failed to generate plot data")
 
-    return plot_data
+    return respond(plot_data)
 
 
 # Plot data endpoint with /api prefix
-@app.get("/api/cats/{cat_id}/plot", response_model=schemas.PlotData)
-def get_plot_data_api(
+@app.get("/api/cats/{cat_id}/plot",
+         response_model=Union[schemas.PlotData, schemas.PlotColumns])
+async def get_plot_data_api(
     cat_id: int,
+    format: schemas.SeriesFormat = "rows",
+    dates: schemas.DateRange = Depends(date_range),
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    respond: ResponseFactory = Depends(negotiate_response)
+):
+    return await get_plot_data(cat_id, format, dates, current_user, db, respond)
+
+
+# Batched sub-operations
+@app.post("/batch", response_model=schemas.BatchResponse)
+async def run_batch(
+    request: schemas.BatchRequest,
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Run cat, weight record and plot operations in order with one auth and one session.
+
+    Each operation's result carries the status it would have had as its own
+    request. With `atomic`, all writes commit together or not at all.
+    """
+    if len(request.operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can have at most {settings.BATCH_MAX_OPERATIONS} operations")
+    return FastJSONResponse(
+        await batch.run_batch(db, current_user, request.operations, atomic=request.atomic))
+
+
+@app.post("/api/batch", response_model=schemas.BatchResponse)
+async def run_batch_api(
+    request: schemas.BatchRequest,
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return get_plot_data(cat_id, current_user, db)
+    return await run_batch(request, current_user, db)
 
 
 # Authentication endpoints with /api prefix
 @app.post("/api/auth/register", response_model=schemas.User)
-def register_user_api(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    return register_user(user, db)
+async def register_user_api(
+        user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    return await register_user(user, db)
 
 # Registration status endpoint
 
@@ -540,7 +867,7 @@ def update_user_profile(
     current_user: models.User = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    updated_user = crud.update_user(db, current_user.id, user_update)
+    updated_user = crud.update_user(db, current_user.id, user_update, current_user)
     if not updated_user:
         raise HTTPException(
             status_code=400,
@@ -550,12 +877,12 @@ def update_user_profile(
 
 
 @app.put("/auth/me/password")
-def change_password(
+async def change_password(
     password_change: schemas.UserPasswordChange,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    success = crud.change_user_password(
+    success = await crud_async.change_user_password(
         db,
         current_user.id,
         password_change.current_password,
@@ -568,6 +895,20 @@ def change_password(
         )
     return {"detail": "Password changed successfully"}
 
+
+@app.delete("/auth/me")
+def deactivate_account(
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Deactivate the current account and revoke its refresh tokens."""
+    if not crud.deactivate_user(db, current_user.id):
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to deactivate account"
+        )
+    return {"detail": "Account deactivated"}
+
 # API prefix versions of user profile endpoints
 
 
@@ -581,19 +922,41 @@ def update_user_profile_api(
 
 
 @app.put("/api/auth/me/password")
-def change_password_api(
+async def change_password_api(
     password_change: schemas.UserPasswordChange,
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await change_password(password_change, current_user, db)
+
+
+@app.delete("/api/auth/me")
+def deactivate_account_api(
     current_user: models.User = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    return change_password(password_change, current_user, db)
+    return deactivate_account(current_user, db)
 
 
 @app.post("/api/auth/login", response_model=schemas.Token)
-def login_for_access_token_api(
+async def login_for_access_token_api(
         form_data: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)):
-    return login_for_access_token(form_data, db)
+        db: AsyncSession = Depends(get_async_db)):
+    return await login_for_access_token(form_data, db)
+
+
+@app.post("/api/auth/refresh", response_model=schemas.Token)
+async def refresh_access_token_api(
+        body: schemas.RefreshTokenRequest,
+        db: AsyncSession = Depends(get_async_db)):
+    return await refresh_access_token(body, db)
+
+
+@app.post("/api/auth/logout")
+async def logout_api(
+        body: schemas.RefreshTokenRequest,
+        db: AsyncSession = Depends(get_async_db)):
+    return await logout(body, db)
 
 
 @app.get("/api/auth/me", response_model=schemas.User)
@@ -602,10 +965,18 @@ def read_users_me_api(current_user: models.User = Depends(auth.get_current_activ
 
 
 @app.get("/api/auth/users/me/cats", response_model=List[schemas.Cat])
-def read_own_cats_api(
+async def read_own_cats_api(
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await read_own_cats(skip, limit, current_user, db)
+
+
+@app.get("/api/auth/users/me/dashboard", response_model=List[schemas.DashboardCat])
+async def read_dashboard_api(
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return read_own_cats(skip, limit, current_user, db)
+    return await read_dashboard(current_user, db)
@@ -0,0 +1,236 @@
+import bisect
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+# Default latency bucket upper bounds in seconds
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+# Bucket upper bounds for statements per request
+QUERY_COUNT_BUCKETS: Tuple[float, ...] = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+M = TypeVar("M", bound="_LabelledMetric")
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram of durations (seconds)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self._lock = threading.Lock()
+        self.buckets = tuple(sorted(buckets))
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)  # last bucket is +Inf
+            self._sum = 0.0
+            self._count = 0
+            self._max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Count, sum, max and cumulative bucket counts."""
+        with self._lock:
+            cumulative = 0
+            buckets = []
+            for upper, count in zip(self.buckets + (float("inf"),), self._counts):
+                cumulative += count
+                buckets.append({"le": "+Inf" if upper == float("inf") else upper,
+                                "count": cumulative})
+            return {
+                "count": self._count,
+                "sum": round(self._sum, 6),
+                "max": round(self._max, 6),
+                "buckets": buckets,
+            }
+
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class MetricFamily:
+    """A named group of samples in Prometheus text exposition terms."""
+
+    def __init__(self, name: str, kind: str, documentation: str,
+                 samples: Optional[List[Sample]] = None):
+        self.name = name
+        self.kind = kind
+        self.documentation = documentation
+        self.samples: List[Sample] = samples or []
+
+    def add(self, value: float, suffix: str = "", **labels: str) -> "MetricFamily":
+        self.samples.append((suffix, labels, value))
+        return self
+
+    def add_histogram(self, snapshot: Dict[str, Any], **labels: str) -> "MetricFamily":
+        """Add the samples of a Histogram.snapshot() under the given labels."""
+        for bucket in snapshot["buckets"]:
+            self.samples.append(("_bucket", {**labels, "le": str(bucket["le"])}, bucket["count"]))
+        self.samples.append(("_sum", labels, snapshot["sum"]))
+        self.samples.append(("_count", labels, snapshot["count"]))
+        return self
+
+
+class _LabelledMetric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, values: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class Counter(_LabelledMetric):
+    """Monotonic counter, optionally split by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0.0)
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.kind, self.documentation)
+        with self._lock:
+            for values, value in sorted(self._values.items()):
+                family.add(value, **self._labels(values))
+        return family
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class HistogramFamily(_LabelledMetric):
+    """One Histogram per combination of label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self._children: Dict[LabelValues, Histogram] = {}
+
+    def labels(self, *labelvalues: str) -> Histogram:
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labelvalues, Histogram(self.buckets))
+        return child
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.kind, self.documentation)
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, histogram in children:
+            family.add_histogram(histogram.snapshot(), **self._labels(values))
+        return family
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Holds metrics and collector callbacks and renders them for scraping.
+
+    Collectors are called at scrape time and return MetricFamily objects, so
+    gauges such as pool usage are read live instead of being pushed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: List[_LabelledMetric] = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def register(self, metric: M) -> M:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> List[MetricFamily]:
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        families = [metric.collect() for metric in metrics]
+        for collector in collectors:
+            families.extend(collector())
+        return families
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for family in self.collect():
+            lines.append(f"# HELP {family.name} {family.documentation}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for suffix, labels, value in family.samples:
+                if labels:
+                    rendered = ",".join(f'{key}="{_escape(str(val))}"'
+                                        for key, val in labels.items())
+                    lines.append(f"{family.name}{suffix}{{{rendered}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{family.name}{suffix} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry served at /metrics
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by method, route template and status.",
+    ("method", "route", "status")))
+http_request_duration = registry.register(HistogramFamily(
+    "http_request_duration_seconds", "HTTP request latency by method and route template.",
+    ("method", "route")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."))
+db_queries_per_request = registry.register(HistogramFamily(
+    "db_queries_per_request", "SQL statements executed per request by route template.",
+    ("method", "route"), buckets=QUERY_COUNT_BUCKETS))
+db_time_per_request = registry.register(HistogramFamily(
+    "db_time_per_request_seconds", "Time spent in SQL statements per request by route template.",
+    ("method", "route")))
@@ -0,0 +1,526 @@
+"""Pure-ASGI middleware for request limits, logging, compression, body decoding and
+security headers.
+
+Unlike `@app.middleware("http")` (BaseHTTPMiddleware) these do not wrap each
+request and response in Request/Response objects or run the endpoint in a
+separate task, and they pass streaming bodies through untouched.
+"""
+import random
+import time
+import zlib
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import orjson
+import structlog
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional; responses fall back to gzip
+    brotli = None
+
+from . import metrics, query_stats, rate_limit, tracing
+from .logging_config import ACCESS_LOGGER
+from .loop_monitor import loop_monitor
+from .responses import is_msgpack, msgpack
+
+SECURITY_HEADERS: Tuple[Tuple[bytes, bytes], ...] = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+)
+
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+def header_value(scope: Scope, name: bytes) -> Optional[str]:
+    """First value of a (lowercase) request header, decoded as latin-1."""
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class SecurityHeadersMiddleware:
+    """Appends fixed security headers to every HTTP response start message."""
+
+    def __init__(self, app: ASGIApp, headers: Iterable[Tuple[bytes, bytes]] = SECURITY_HEADERS):
+        self.app = app
+        self.headers = list(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *self.headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class AccessLogMiddleware:
+    """Writes one structured access log entry per request and tracks it as in flight.
+
+    Requests that fail (status >= 400) or take at least `slow_threshold`
+    seconds are always logged; the rest are sampled at `sample_rate`.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0, slow_threshold: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.logger = structlog.get_logger(ACCESS_LOGGER)
+
+    def should_log(self, status_code: int, duration: float) -> bool:
+        if status_code >= 400 or duration >= self.slow_threshold:
+            return True
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        inflight_token = loop_monitor.track(scope)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            loop_monitor.untrack(inflight_token)
+            duration = time.perf_counter() - start_time
+            if self.should_log(status_code, duration):
+                self._log(scope, status_code, duration)
+
+    def _log(self, scope: Scope, status_code: int, duration: float) -> None:
+        # Sanitize path and method for logging (prevent log injection)
+        request_path = scope["path"]
+        if len(request_path) > 100:
+            request_path = request_path[:97] + "..."
+        request_method = scope["method"]
+        if not request_method.isalpha() or len(request_method) > 10:
+            request_method = "INVALID"
+
+        slow = duration >= self.slow_threshold
+        stats = query_stats.current()
+        active_span = tracing.current_span()
+        if status_code >= 500:
+            log = self.logger.error
+        elif status_code >= 400 or slow:
+            log = self.logger.warning
+        else:
+            log = self.logger.info
+        log(
+            "request",
+            method=request_method,
+            path=request_path,
+            route=getattr(scope.get("route"), "path", None),
+            status=status_code,
+            duration_ms=round(duration * 1000, 2),
+            client=client_ip(scope),
+            slow=slow,
+            db_queries=stats.count if stats is not None else None,
+            db_time_ms=round(stats.duration * 1000, 2) if stats is not None else None,
+            trace_id=active_span.trace.trace_id if active_span is not None else None,
+            sample_rate=1.0 if status_code >= 400 or slow else self.sample_rate,
+        )
+
+
+class TracingMiddleware:
+    """Starts a trace per request and returns its W3C traceparent header.
+
+    Incoming traceparent headers are continued (including their sampling
+    decision). Does nothing while the tracer has no exporter.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        tracer = tracing.tracer
+        if scope["type"] != "http" or tracer.exporter is None:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+        root = tracer.start_trace(f"{method} request", header_value(scope, b"traceparent"),
+                                  {"http.method": method})
+        status_code = 500
+
+        async def send_with_traceparent(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", ()),
+                                      (b"traceparent", root.traceparent.encode("latin-1"))]
+            await send(message)
+
+        token = tracing.activate(root)
+        try:
+            await self.app(scope, receive, send_with_traceparent)
+        finally:
+            tracing.deactivate(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            root.name = f"{method} {route}"
+            root.set("http.route", route)
+            root.set("http.status_code", status_code)
+            stats = query_stats.current()
+            if stats is not None:
+                root.set("db.statements", stats.count)
+                root.set("db.time_ms", round(stats.duration * 1000, 2))
+            tracer.end_trace(root)
+
+
+class QueryStatsMiddleware:
+    """Collects SQL statement counts and time for each request.
+
+    Must wrap the tracing, logging and metrics middleware so they can read
+    the stats after the response has been sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        _, token = query_stats.start(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            query_stats.stop(token)
+
+
+class MetricsMiddleware:
+    """Counts requests and records latency by method, route template and status.
+
+    Labelling by the matched route template (not the raw path) keeps label
+    cardinality bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.http_requests_in_flight.dec()
+            method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            metrics.http_request_duration.labels(method, route).observe(
+                time.perf_counter() - start_time)
+            metrics.http_requests.inc(method, route, str(status_code))
+            stats = query_stats.current()
+            if stats is not None:
+                metrics.db_queries_per_request.labels(method, route).observe(stats.count)
+                metrics.db_time_per_request.labels(method, route).observe(stats.duration)
+
+
+class RequestSizeLimitMiddleware:
+    """Rejects request bodies larger than `max_size` bytes with 413.
+
+    The declared Content-Length is checked up front; bodies without one
+    (chunked uploads) are counted as they are read.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = header_value(scope, b"content-length")
+        try:
+            too_large = content_length is not None and int(content_length) > self.max_size
+        except ValueError:
+            response = JSONResponse(status_code=400, content={"detail": "Invalid Content-Length"})
+            await response(scope, receive, send)
+            return
+        if too_large:
+            response = JSONResponse(status_code=413, content={"detail": "Request too large"})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_limited() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise HTTPException(status_code=413, detail="Request too large")
+            return message
+
+        await self.app(scope, receive_limited, send)
+
+
+class MsgPackBodyMiddleware:
+    """Accepts MessagePack request bodies by handing them on as JSON.
+
+    A body sent with a MessagePack Content-Type is decoded and re-encoded
+    with orjson, so endpoints keep their Pydantic body models and validation
+    errors look the same for both encodings. Undecodable bodies get a 400.
+    Without the msgpack package such bodies reach the endpoint unchanged.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope["type"] != "http" or msgpack is None
+                or not is_msgpack(header_value(scope, b"content-type"))):
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        try:
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message["type"] != "http.request":
+                    return  # client disconnected
+                chunks.append(message.get("body", b""))
+                more_body = message.get("more_body", False)
+        except HTTPException as exc:
+            # Raised by RequestSizeLimitMiddleware's receive for oversized bodies
+            response = JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+            await response(scope, receive, send)
+            return
+
+        raw = b"".join(chunks)
+        try:
+            body = orjson.dumps(msgpack.unpackb(raw)) if raw else b""
+        except (ValueError, TypeError):
+            response = JSONResponse(status_code=400,
+                                    content={"detail": "Invalid MessagePack body"})
+            await response(scope, receive, send)
+            return
+
+        headers = [(key, value) for key, value in scope["headers"]
+                   if key not in (b"content-type", b"content-length")]
+        headers += [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1"))]
+        body_sent = False
+
+        async def receive_json() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(dict(scope, headers=headers), receive_json, send)
+
+
+class RateLimitMiddleware:
+    """Answers 429 with Retry-After once a client, user or route limit is exceeded."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Resolved per request so the limiter can be reconfigured at runtime
+        limiter = rate_limit.rate_limiter
+        if scope["type"] == "http" and limiter.enabled:
+            request = (scope["method"], scope["path"], client_ip(scope),
+                       header_value(scope, b"authorization"))
+            if limiter.blocking:
+                rejected = await run_in_threadpool(limiter.check, *request)
+            else:
+                rejected = limiter.check(*request)
+            if rejected is not None:
+                response = JSONResponse(
+                    status_code=429,
+                    content={"detail": "Too many requests. Please try again later."},
+                    headers={"Retry-After": rate_limit.retry_after_header(rejected)},
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    codings = {}
+    for part in value.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+# Encodes one response body chunk by chunk: (chunk, more_body) -> compressed bytes
+Encoder = Callable[[bytes, bool], bytes]
+
+# Never compressed: clients expect each event as soon as it is sent
+EXCLUDED_CONTENT_TYPES = ("text/event-stream",)
+
+
+def gzip_encoder(level: int) -> Encoder:
+    """Encode a body, chunk by chunk, as one gzip stream."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+    def encode(body: bytes, more_body: bool) -> bytes:
+        # Sync-flush streamed chunks so clients receive them as they are sent
+        return compressor.compress(body) + compressor.flush(
+            zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+    return encode
+
+
+def brotli_encoder(quality: int) -> Encoder:
+    """Encode a body, chunk by chunk, as one brotli stream."""
+    compressor = brotli.Compressor(quality=quality)
+
+    def encode(body: bytes, more_body: bool) -> bytes:
+        compressed = compressor.process(body)
+        return compressed + (compressor.flush() if more_body else compressor.finish())
+    return encode
+
+
+class CompressionResponder:
+    """Sends one response through `encoder` as Content-Encoding `coding`.
+
+    The start message is held back until the first body message shows
+    whether the response is compressed. Bodies under `minimum_size` that
+    arrive in one message, event streams and bodies that already carry a
+    Content-Encoding pass through unchanged. Without an encoder only the
+    Vary header is added, so caches keep the variants apart.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, coding: Optional[str] = None,
+                 encoder: Optional[Encoder] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.coding = coding
+        self.encoder = encoder
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.compressing = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def send_compressed(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                self.start = message
+                self.passthrough = ("content-encoding" in headers or headers.get(
+                    "content-type", "").startswith(EXCLUDED_CONTENT_TYPES))
+                return
+            if self.start is None:
+                # The start message has been sent: compress the rest of a streamed body
+                if self.compressing and message["type"] == "http.response.body":
+                    more_body = message.get("more_body", False)
+                    message["body"] = self.encoder(message.get("body", b""), more_body)
+                await send(message)
+                return
+
+            start, self.start = self.start, None
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if (message["type"] == "http.response.body" and not self.passthrough
+                    and (more_body or len(body) >= self.minimum_size)):
+                headers = MutableHeaders(raw=start["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                if self.encoder is not None:
+                    self.compressing = True
+                    message["body"] = self.encoder(body, more_body)
+                    headers["Content-Encoding"] = self.coding
+                    if more_body:
+                        del headers["Content-Length"]
+                    else:
+                        headers["Content-Length"] = str(len(message["body"]))
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+class CompressionMiddleware:
+    """Compresses responses of at least `minimum_size` bytes with br or gzip.
+
+    The coding is negotiated from Accept-Encoding: the highest q-value wins,
+    with brotli preferred on ties (when installed). Streaming responses are
+    compressed chunk by chunk; bodies that already carry a Content-Encoding
+    are passed through.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.available = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        if not accept_encoding:
+            return None
+        codings = parse_accept_encoding(accept_encoding)
+        best, best_quality = None, 0.0
+        for coding in self.available:
+            quality = codings.get(coding, codings.get("*", 0.0))
+            if quality > best_quality:
+                best, best_quality = coding, quality
+        return best
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        coding = self.negotiate(header_value(scope, b"accept-encoding"))
+        encoder: Optional[Encoder] = None
+        if coding == "br":
+            encoder = brotli_encoder(self.brotli_quality)
+        elif coding == "gzip":
+            encoder = gzip_encoder(self.gzip_level)
+        responder = CompressionResponder(self.app, self.minimum_size, coding, encoder)
+        await responder(scope, receive, send)
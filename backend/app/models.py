@@ -21,6 +21,9 @@ class User(Base):
 
     # Relationships
     cats = relationship("Cat", back_populates="owner", cascade="all, delete-orphan")
+    refresh_tokens = relationship(
+        "RefreshToken", back_populates="user", cascade="all, delete-orphan", passive_deletes=True
+    )
 
     # Constraints
     __table_args__ = (
@@ -95,3 +98,24 @@ class WeightRecord(Base):
 
     def __repr__(self) -> str:
         return f"<WeightRecord(id={self.id}, cat_weight={self.cat_weight}, date={self.date}, cat_id={self.cat_id})>"
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    # SHA-256 hex digest of the opaque token; the token itself is never stored
+    token_hash = Column(String(64), unique=True, nullable=False)
+    # Tokens rotated from the same login share a family so reuse can revoke them all
+    family_id = Column(String(32), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False,
+                     index=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    # Relationships
+    user = relationship("User", back_populates="refresh_tokens")
+
+    def __repr__(self) -> str:
+        return f"<RefreshToken(id={self.id}, user_id={self.user_id}, revoked={self.revoked_at})>"
@@ -0,0 +1,63 @@
+"""Opaque cursors for keyset pagination.
+
+A cursor carries the sort key of the last row of a page. The next page is
+the rows that sort after that key, which the database finds through the
+(cat_id, date) and (user_id, name) indexes instead of reading and
+discarding every earlier row as OFFSET does. Tokens are base64url JSON;
+they are opaque to clients but not secret, since every query still
+filters by owner.
+"""
+import base64
+import binascii
+from datetime import date
+from typing import Any, List, Optional, Sequence, Tuple
+
+import orjson
+
+# Response header holding the cursor of the next page, when there may be one
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(kind: str, *key: Any) -> str:
+    payload = orjson.dumps([kind, *key])
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(kind: str, token: str) -> List[Any]:
+    """Return the sort key of a cursor issued for `kind`."""
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, binascii.Error):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(payload, list) or len(payload) != 3 or payload[0] != kind:
+        raise InvalidCursor("Invalid cursor")
+    return payload[1:]
+
+
+def decode_weight_record_cursor(token: str) -> Tuple[date, int]:
+    record_date, record_id = decode_cursor("weight_record", token)
+    try:
+        if type(record_id) is not int:
+            raise ValueError
+        return date.fromisoformat(record_date), record_id
+    except (TypeError, ValueError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def decode_cat_cursor(token: str) -> Tuple[str, int]:
+    name, cat_id = decode_cursor("cat", token)
+    if not isinstance(name, str) or type(cat_id) is not int:
+        raise InvalidCursor("Invalid cursor")
+    return name, cat_id
+
+
+def next_cursor(kind: str, last_key: Optional[Sequence[Any]], page_size: int,
+                limit: int) -> Optional[str]:
+    """Cursor after `last_key` if the page was full, else None (no more rows)."""
+    if last_key is None or page_size < limit:
+        return None
+    return encode_cursor(kind, *last_key)
@@ -1,22 +1,84 @@
 import logging
-from typing import Any, Dict, List, Optional, Union
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Union
 
+from sqlalchemy import Select, select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import models
+from .crud_async import date_range_clauses
+from .tracing import traced
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+PlotDict = Dict[str, Union[int, str, List[Any], float]]
 
-def generate_weight_plot(
-        db: Session, cat_id: int) -> Optional[Dict[str, Union[int, str, List[Any], float]]]:
+
+def _build_plot_data(cat: models.Cat,
+                     weight_records: Sequence[models.WeightRecord]) -> PlotDict:
+    """Shape a cat and its date-ordered weight records into plot data."""
+    # Extract dates and weights with validation
+    dates = []
+    weights = []
+    for record in weight_records:
+        if record.date and record.cat_weight is not None:
+            dates.append(record.date.strftime("%Y-%m-%d"))
+            weights.append(record.cat_weight)
+
+    return {
+        "cat_id": cat.id,
+        "name": cat.name,
+        "dates": dates,
+        "weights": weights,
+        "target_weight": cat.target_weight
+    }
+
+
+# Record fields returned as arrays by the columnar plot format
+COLUMN_FIELDS = ("id", "date", "user_weight", "combined_weight", "cat_weight")
+
+
+def _build_plot_columns(cat: models.Cat,
+                        weight_records: Sequence[models.WeightRecord]) -> PlotDict:
+    """Shape a cat and its date-ordered weight records into per-field arrays."""
+    records = [r for r in weight_records if r.date and r.cat_weight is not None]
+    data: PlotDict = {
+        "cat_id": cat.id,
+        "name": cat.name,
+        "target_weight": cat.target_weight,
+    }
+    for field in COLUMN_FIELDS:
+        data[field] = [getattr(record, field) for record in records]
+    return data
+
+
+def weight_history_query(cat_id: int, date_from: Optional[date] = None,
+                         date_to: Optional[date] = None) -> Select:
+    """A cat's weight records in date order, optionally limited to a date window.
+
+    The window is a range scan of idx_weight_cat_date, so its cost follows
+    the number of records in the window rather than the cat's whole history.
+    """
+    return select(models.WeightRecord).where(
+        models.WeightRecord.cat_id == cat_id, *date_range_clauses(date_from, date_to)
+    ).order_by(models.WeightRecord.date)
+
+
+@traced("plots.generate_weight_plot")
+def generate_weight_plot(db: Session, cat_id: int, columnar: bool = False,
+                         date_from: Optional[date] = None,
+                         date_to: Optional[date] = None) -> Optional[PlotDict]:
     """Generate a JSON representation of a Plotly figure for cat weight over time.
 
     Args:
         db: Database session
         cat_id: ID of the cat to generate plot for
+        columnar: Return every record field as parallel arrays (schemas.PlotColumns)
+        date_from: Earliest record date to include
+        date_to: Latest record date to include
 
     Returns:
         Dictionary with plot data or None if cat not found or error occurs
@@ -36,34 +98,11 @@ def generate_weight_plot(
             return None
 
         # Get weight records sorted by date using ORM methods (CWE-89)
-        weight_records = db.query(models.WeightRecord).filter(
-            models.WeightRecord.cat_id == cat_id
-        ).order_by(models.WeightRecord.date).all()
-
-        if not weight_records:
-            return {
-                "cat_id": cat.id,
-                "name": cat.name,
-                "dates": [],
-                "weights": [],
-                "target_weight": cat.target_weight
-            }
-
-        # Extract dates and weights with validation
-        dates = []
-        weights = []
-        for record in weight_records:
-            if record.date and record.cat_weight is not None:
-                dates.append(record.date.strftime("%Y-%m-%d"))
-                weights.append(record.cat_weight)
-
-        return {
-            "cat_id": cat.id,
-            "name": cat.name,
-            "dates": dates,
-            "weights": weights,
-            "target_weight": cat.target_weight
-        }
+        weight_records = db.execute(
+            weight_history_query(cat_id, date_from, date_to)).scalars().all()
+
+        build = _build_plot_columns if columnar else _build_plot_data
+        return build(cat, weight_records)
     except SQLAlchemyError:
         # Avoid logging sensitive data (CWE-117)
         logger.error("Database error generating plot")
@@ -73,3 +112,47 @@ def generate_weight_plot(
         # Avoid logging sensitive data (CWE-117)
         logger.error("Error generating plot")
         return None
+
+
+@traced("plots.generate_weight_plot")
+async def generate_weight_plot_async(db: AsyncSession, cat_id: int, columnar: bool = False,
+                                     date_from: Optional[date] = None,
+                                     date_to: Optional[date] = None) -> Optional[PlotDict]:
+    """Async version of generate_weight_plot.
+
+    Args:
+        db: Async database session
+        cat_id: ID of the cat to generate plot for
+        columnar: Return every record field as parallel arrays (schemas.PlotColumns)
+        date_from: Earliest record date to include
+        date_to: Latest record date to include
+
+    Returns:
+        Dictionary with plot data or None if cat not found or error occurs
+    """
+    try:
+        # Input validation
+        if not isinstance(cat_id, int) or cat_id <= 0:
+            # Avoid logging sensitive data (CWE-117)
+            logger.error("Invalid cat_id format")
+            return None
+
+        result = await db.execute(select(models.Cat).where(models.Cat.id == cat_id))
+        cat = result.scalars().first()
+        if not cat:
+            # Avoid logging sensitive data (CWE-117)
+            logger.warning("Cat not found for plot generation")
+            return None
+
+        result = await db.execute(weight_history_query(cat_id, date_from, date_to))
+        build = _build_plot_columns if columnar else _build_plot_data
+        return build(cat, result.scalars().all())
+    except SQLAlchemyError:
+        # Avoid logging sensitive data (CWE-117)
+        logger.error("Database error generating plot")
+        await db.rollback()
+        return None
+    except Exception:
+        # Avoid logging sensitive data (CWE-117)
+        logger.error("Error generating plot")
+        return None
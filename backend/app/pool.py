@@ -0,0 +1,235 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .config import Settings
+from .metrics import Histogram
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class PoolMonitor:
+    """Thread-safe counters and wait time histogram for a connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool: Optional[QueuePool] = None
+        self.wait_time = Histogram()
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all recorded statistics."""
+        self.wait_time.reset()
+        with self._lock:
+            self._checkouts = 0
+            self._checkins = 0
+            self._connects = 0
+            self._invalidations = 0
+            self._timeouts = 0
+            self._peak_checked_out = 0
+
+    def bind(self, pool: QueuePool) -> None:
+        """Attach the monitor to a pool so live gauges can be read from it."""
+        self._pool = pool
+
+    def observe_wait(self, seconds: float) -> None:
+        """Record how long a caller waited for a connection."""
+        self.wait_time.observe(seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self._connects += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self._invalidations += 1
+
+    def record_checkout(self) -> None:
+        # Only queue pools track checkouts (SQLite engines may use NullPool)
+        checked_out = self._pool.checkedout() if isinstance(self._pool, QueuePool) else 0
+        with self._lock:
+            self._checkouts += 1
+            if checked_out > self._peak_checked_out:
+                self._peak_checked_out = checked_out
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self._checkins += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a point-in-time view of pool gauges and counters."""
+        pool = self._pool
+        with self._lock:
+            stats = {
+                "checkouts": self._checkouts,
+                "checkins": self._checkins,
+                "connects": self._connects,
+                "invalidations": self._invalidations,
+                "timeouts": self._timeouts,
+                "peak_checked_out": self._peak_checked_out,
+            }
+        stats["wait_time"] = self.wait_time.snapshot()
+
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            })
+        return stats
+
+
+class _MonitoredPoolMixin:
+    """Reports checkout wait time and timeouts to a PoolMonitor."""
+
+    monitor: Optional[PoolMonitor] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            if self.monitor is not None:
+                self.monitor.record_timeout()
+            raise
+        finally:
+            if self.monitor is not None:
+                self.monitor.observe_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        # Keep reporting to the same monitor after engine.dispose()
+        new_pool = super().recreate()
+        new_pool.monitor = self.monitor
+        if self.monitor is not None:
+            self.monitor.bind(new_pool)
+        return new_pool
+
+
+class MonitoredQueuePool(_MonitoredPoolMixin, QueuePool):
+    """QueuePool instrumented with a PoolMonitor (sync engines)."""
+
+
+class MonitoredAsyncAdaptedQueuePool(_MonitoredPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool instrumented with a PoolMonitor (async engines)."""
+
+
+def _register_pool_events(engine: Engine, monitor: PoolMonitor) -> None:
+    """Wire SQLAlchemy pool events into the monitor."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        monitor.record_connect()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        monitor.record_checkout()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        monitor.record_checkin()
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        monitor.record_invalidation()
+        # Avoid logging connection details (CWE-117)
+        logger.warning("Database connection invalidated")
+
+
+def _pool_kwargs(url: str, config: Settings, poolclass: type) -> Dict[str, Any]:
+    """Engine keyword arguments for the pool described by settings."""
+    engine_kwargs: Dict[str, Any] = {"pool_pre_ping": config.DB_POOL_PRE_PING}
+
+    # SQLite is only used for local tooling and manages its own pooling
+    if not url.startswith("sqlite"):
+        engine_kwargs.update({
+            "poolclass": poolclass,
+            "pool_size": config.DB_POOL_SIZE,
+            "max_overflow": config.DB_MAX_OVERFLOW,
+            "pool_timeout": config.DB_POOL_TIMEOUT,
+            "pool_recycle": config.DB_POOL_RECYCLE,
+        })
+    return engine_kwargs
+
+
+def _attach_monitor(engine: Engine, monitor: Optional[PoolMonitor]) -> None:
+    if monitor is None:
+        return
+    if isinstance(engine.pool, _MonitoredPoolMixin):
+        engine.pool.monitor = monitor
+    monitor.bind(engine.pool)
+    _register_pool_events(engine, monitor)
+
+
+def build_engine(
+        url: str,
+        config: Settings,
+        monitor: Optional[PoolMonitor] = None,
+        **overrides: Any) -> Engine:
+    """Create an engine whose pool is sized and instrumented from settings.
+
+    Args:
+        url: Database URL
+        config: Settings providing the DB_POOL_* values
+        monitor: Optional monitor to receive pool statistics
+        **overrides: Extra keyword arguments passed to create_engine
+
+    Returns:
+        Configured SQLAlchemy engine
+    """
+    engine_kwargs = _pool_kwargs(url, config, MonitoredQueuePool)
+    engine_kwargs.update(overrides)
+
+    engine = create_engine(url, **engine_kwargs)
+    _attach_monitor(engine, monitor)
+    return engine
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver (asyncpg / aiosqlite)."""
+    scheme, sep, rest = url.partition("://")
+    backend = scheme.split("+", 1)[0]
+    if backend in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if backend == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+
+def build_async_engine(
+        url: str,
+        config: Settings,
+        monitor: Optional[PoolMonitor] = None,
+        **overrides: Any) -> AsyncEngine:
+    """Create an AsyncEngine with the same pool settings as build_engine().
+
+    Args:
+        url: Database URL (sync or async form)
+        config: Settings providing the DB_POOL_* values
+        monitor: Optional monitor to receive pool statistics
+        **overrides: Extra keyword arguments passed to create_async_engine
+
+    Returns:
+        Configured SQLAlchemy async engine
+    """
+    async_url = to_async_url(url)
+    engine_kwargs = _pool_kwargs(async_url, config, MonitoredAsyncAdaptedQueuePool)
+    engine_kwargs.update(overrides)
+
+    engine = create_async_engine(async_url, **engine_kwargs)
+    _attach_monitor(engine.sync_engine, monitor)
+    return engine
@@ -0,0 +1,152 @@
+"""Per-request SQL instrumentation.
+
+Cursor-execute hooks on every Engine (the async engines run on a sync Engine
+underneath) count statements and their time into the QueryStats of the
+current request, held in a context variable. Statements slower than
+SLOW_QUERY_THRESHOLD are logged with a fingerprint: the statement with
+literals and placeholders normalised, so repeats of one query group together.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+from .metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+slow_queries = registry.register(Counter(
+    "db_slow_queries_total", "Statements slower than the slow query threshold."))
+
+
+class QueryStats:
+    """Statements executed on behalf of one request."""
+
+    __slots__ = ("count", "duration", "slow", "scope")
+
+    def __init__(self, scope: Optional[Dict[str, Any]] = None):
+        self.count = 0
+        self.duration = 0.0
+        self.slow = 0
+        self.scope = scope
+
+    def route(self) -> Optional[str]:
+        return getattr((self.scope or {}).get("route"), "path", None)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start(scope: Optional[Dict[str, Any]] = None) -> Tuple[QueryStats, Token]:
+    """Begin collecting stats for the current request (or task)."""
+    stats = QueryStats(scope)
+    return stats, _current.set(stats)
+
+
+def stop(token: Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[QueryStats]:
+    return _current.get()
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\$\d+|%\(\w+\)s|:\w+|%s|\?")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> Tuple[str, str]:
+    """Normalise a statement and return (short id, normalised text).
+
+    Literals and bound parameters of any paramstyle become '?', IN lists
+    collapse to '(?+)' and whitespace is squeezed.
+    """
+    normalised = _WHITESPACE.sub(" ", statement).strip()
+    normalised = _LITERALS.sub("?", normalised)
+    normalised = _IN_LISTS.sub("(?+)", normalised)
+    digest = hashlib.sha1(normalised.encode("utf-8")).hexdigest()[:12]
+    return digest, normalised
+
+
+# Statement lists of the active query_budget() blocks
+_capture_lock = threading.Lock()
+_captures: List[List[str]] = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    duration = time.perf_counter() - started if started is not None else 0.0
+
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += duration
+
+    if _captures:
+        with _capture_lock:
+            for capture in _captures:
+                capture.append(statement)
+
+    threshold = settings.SLOW_QUERY_THRESHOLD
+    if threshold > 0 and duration >= threshold:
+        slow_queries.inc()
+        if stats is not None:
+            stats.slow += 1
+        digest, normalised = fingerprint(statement)
+        # Parameters are never logged; they may contain user data
+        logger.warning("Slow query %.1fms [%s] route=%s: %s", duration * 1000, digest,
+                       stats.route() if stats is not None else None, normalised[:500])
+
+
+_installed = False
+
+
+def install() -> None:
+    """Attach the cursor hooks to all engines (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[List[str]]:
+    """Fail when the block executes more than `max_queries` statements.
+
+    Intended for tests: it counts statements on every engine and thread
+    (TestClient serves requests on another thread), and the error lists the
+    fingerprints so an N+1 pattern is obvious.
+    """
+    install()
+    statements: List[str] = []
+    with _capture_lock:
+        _captures.append(statements)
+    try:
+        yield statements
+    finally:
+        with _capture_lock:
+            _captures.remove(statements)
+    if len(statements) > max_queries:
+        listing = "\n".join(f"  {fingerprint(s)[1][:200]}" for s in statements)
+        raise QueryBudgetExceeded(
+            f"{len(statements)} queries executed, budget is {max_queries}:\n{listing}")
@@ -0,0 +1,375 @@
+import logging
+import math
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import jwt
+from jwt import InvalidTokenError
+from starlette.routing import compile_path
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+
+
+def _slide(state: Optional[Tuple[int, int, int]], now: float,
+           window: float) -> Tuple[int, int, int]:
+    """Advance a (window_index, current, previous) counter to the window containing now."""
+    index = int(now // window)
+    if state is None:
+        return index, 0, 0
+    stored_index, current, previous = state
+    if index == stored_index:
+        return state
+    if index == stored_index + 1:
+        return index, 0, current
+    return index, 0, 0
+
+
+def _consume(state: Tuple[int, int, int], now: float, window: float,
+             limit: int) -> Tuple[Tuple[int, int, int], RateLimitResult]:
+    """Apply one hit to an advanced counter using the sliding-window estimate.
+
+    The previous window's count is weighted by how much of it still overlaps
+    the trailing window, which approximates a true sliding log in O(1) memory.
+    """
+    index, current, previous = state
+    elapsed = now - index * window
+    weight = max(1.0 - elapsed / window, 0.0)
+    estimate = previous * weight + current
+    if estimate + 1 > limit:
+        if current + 1 > limit or previous == 0:
+            retry_after = window - elapsed
+        else:
+            # Time until the previous window's weight has decayed enough
+            retry_after = window * (1.0 - (limit - current - 1) / previous) - elapsed
+        return state, RateLimitResult(False, limit, 0, max(retry_after, 0.0))
+    remaining = int(limit - estimate - 1)
+    return (index, current + 1, previous), RateLimitResult(True, limit, max(remaining, 0), 0.0)
+
+
+class RateLimitBackend(ABC):
+    """Storage for sliding-window counters.
+
+    Implementations must make `hit_many` atomic across its keys. Backends
+    whose calls can block (file or network I/O, lock waits) set `blocking`,
+    and the middleware then calls them on the threadpool; the others are
+    called on the event loop, so they must stay cheap.
+    """
+
+    name = "base"
+    blocking = False
+
+    @abstractmethod
+    def hit_many(self, hits: Sequence[Tuple[str, int]], window: float,
+                 now: Optional[float] = None) -> List[RateLimitResult]:
+        """Count one request against every (key, limit), all or nothing.
+
+        Counters are only consumed when every limit allows the request, so a
+        request rejected by one limit does not use up the others.
+        """
+
+    def hit(self, key: str, limit: int, window: float,
+            now: Optional[float] = None) -> RateLimitResult:
+        return self.hit_many([(key, limit)], window, now)[0]
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every counter."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process counters in a bounded LRU map.
+
+    Keys whose windows have fully elapsed are evicted as they reach the front
+    of the map; beyond `max_keys` the least recently seen key is dropped.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max(max_keys, 1)
+        self._lock = threading.Lock()
+        # key -> (window_index, current, previous, window)
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._evictions = 0
+        self._expirations = 0
+
+    def hit_many(self, hits: Sequence[Tuple[str, int]], window: float,
+                 now: Optional[float] = None) -> List[RateLimitResult]:
+        now = time.time() if now is None else now
+        with self._lock:
+            states, results = [], []
+            for key, limit in hits:
+                entry = self._data.get(key)
+                state = _slide(entry[:3] if entry else None, now, window)
+                state, result = _consume(state, now, window, limit)
+                states.append(state)
+                results.append(result)
+            if all(result.allowed for result in results):
+                for (key, _), state in zip(hits, states):
+                    self._data[key] = state + (window,)
+                    self._data.move_to_end(key)
+            self._evict(now)
+        return results
+
+    def _evict(self, now: float) -> None:
+        # Front of the map holds the least recently hit keys
+        while self._data:
+            key, (index, _, _, window) = next(iter(self._data.items()))
+            if int(now // window) <= index + 1:
+                break
+            del self._data[key]
+            self._expirations += 1
+        while len(self._data) > self.max_keys:
+            self._data.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "keys": len(self._data),
+                "max_keys": self.max_keys,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """Counters in a local SQLite file shared by every worker on the host.
+
+    A stand-in for a networked store (e.g. Redis) when running several uvicorn
+    workers on one machine: each request is one short IMMEDIATE transaction,
+    so workers see one another's counts. Idle keys are purged periodically.
+    Waiting for another worker's write lock can take up to the 5 s busy
+    timeout, so the middleware calls this backend on the threadpool.
+    """
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str, purge_every: int = 1000):
+        self.path = path
+        self.purge_every = max(purge_every, 1)
+        self._local = threading.local()
+        self._hits = 0
+        self._max_window = 0.0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                " key TEXT PRIMARY KEY, window_index INTEGER NOT NULL,"
+                " current INTEGER NOT NULL, previous INTEGER NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None,
+                                   check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def hit_many(self, hits: Sequence[Tuple[str, int]], window: float,
+                 now: Optional[float] = None) -> List[RateLimitResult]:
+        now = time.time() if now is None else now
+        self._max_window = max(self._max_window, window)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            states, results = [], []
+            for key, limit in hits:
+                row = conn.execute(
+                    "SELECT window_index, current, previous FROM rate_limits WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                state = _slide(tuple(row) if row else None, now, window)
+                state, result = _consume(state, now, window, limit)
+                states.append(state)
+                results.append(result)
+            if all(result.allowed for result in results):
+                conn.executemany(
+                    "INSERT INTO rate_limits (key, window_index, current, previous, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(key) DO UPDATE SET window_index = excluded.window_index,"
+                    " current = excluded.current, previous = excluded.previous,"
+                    " updated_at = excluded.updated_at",
+                    [(key, *state, now) for (key, _), state in zip(hits, states)],
+                )
+            self._hits += 1
+            if self._hits % self.purge_every == 0:
+                conn.execute("DELETE FROM rate_limits WHERE updated_at < ?",
+                             (now - 2 * self._max_window,))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return results
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM rate_limits")
+
+    def stats(self) -> Dict[str, Any]:
+        keys = self._connect().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+        return {"backend": self.name, "path": self.path, "keys": keys}
+
+
+class RouteRule(NamedTuple):
+    method: str
+    template: str
+    pattern: "re.Pattern"
+    limit: int
+
+
+def parse_route_limits(spec: str) -> List[RouteRule]:
+    """Parse 'POST /auth/login=10, POST /api/cats/{cat_id}/weights=60' into rules.
+
+    Templates match both the root and the /api-prefixed route. Malformed
+    entries are skipped with a warning.
+    """
+    rules = []
+    for entry in (part.strip() for part in spec.split(",")):
+        if not entry:
+            continue
+        try:
+            route, limit = entry.rsplit("=", 1)
+            method, template = route.split()
+            template = template[len("/api"):] if template.startswith("/api/") else template
+            path_regex, _, _ = compile_path(template)
+            pattern = re.compile(r"^(?:/api)?" + path_regex.pattern.lstrip("^"))
+            rules.append(RouteRule(method.upper(), template, pattern, int(limit)))
+        except ValueError:
+            logger.warning("Ignoring malformed rate limit rule: %r", entry[:100])
+    return rules
+
+
+class RateLimiter:
+    """Applies per-client, per-user and per-route limits against a backend.
+
+    Limits are requests per `window` seconds; 0 disables a limit. Clients are
+    identified by the token subject when a valid bearer token is present and
+    by IP otherwise, so per-route limits follow users across addresses.
+    """
+
+    def __init__(self, backend: RateLimitBackend, per_ip: int = 0, per_user: int = 0,
+                 routes: Optional[List[RouteRule]] = None, window: float = 60.0):
+        self.backend = backend
+        self.per_ip = per_ip
+        self.per_user = per_user
+        self.routes = routes or []
+        self.window = window
+        self._lock = threading.Lock()
+        self._rejected: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.per_ip > 0 or self.per_user > 0 or self.routes)
+
+    @property
+    def blocking(self) -> bool:
+        """Whether `check` may block and should run off the event loop."""
+        return self.backend.blocking
+
+    @staticmethod
+    def _token_subject(authorization: Optional[str]) -> Optional[str]:
+        if not authorization or not authorization.lower().startswith("bearer "):
+            return None
+        try:
+            payload = jwt.decode(authorization[7:], settings.SECRET_KEY,
+                                 algorithms=[settings.ALGORITHM])
+        except InvalidTokenError:
+            return None
+        subject = payload.get("sub")
+        return subject if isinstance(subject, str) else None
+
+    def check(self, method: str, path: str, client_ip: str,
+              authorization: Optional[str] = None) -> Optional[RateLimitResult]:
+        """Count the request against every applicable limit.
+
+        All or nothing: a rejected request consumes none of its limits.
+        Returns the first rejecting result, or None when the request may proceed.
+        """
+        limits = []
+        if self.per_ip > 0:
+            limits.append(("ip", f"ip:{client_ip}", self.per_ip))
+        user = None
+        if self.per_user > 0 or self.routes:
+            user = self._token_subject(authorization)
+        if user is not None and self.per_user > 0:
+            limits.append(("user", f"user:{user}", self.per_user))
+        for rule in self.routes:
+            if rule.method == method and rule.pattern.match(path):
+                client = f"user:{user}" if user is not None else f"ip:{client_ip}"
+                limits.append((f"{rule.method} {rule.template}",
+                               f"route:{rule.method} {rule.template}:{client}", rule.limit))
+                break
+
+        if not limits:
+            return None
+        results = self.backend.hit_many([(key, limit) for _, key, limit in limits], self.window)
+        for (scope, _, _), result in zip(limits, results):
+            if not result.allowed:
+                with self._lock:
+                    self._rejected[scope] = self._rejected.get(scope, 0) + 1
+                return result
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rejected = dict(self._rejected)
+        return {
+            "enabled": self.enabled,
+            "window": self.window,
+            "per_ip": self.per_ip,
+            "per_user": self.per_user,
+            "routes": {f"{rule.method} {rule.template}": rule.limit for rule in self.routes},
+            "rejected": rejected,
+            **self.backend.stats(),
+        }
+
+
+def retry_after_header(result: RateLimitResult) -> str:
+    """Whole seconds for the Retry-After header (never 0)."""
+    return str(max(int(math.ceil(result.retry_after)), 1))
+
+
+def build_backend(name: str) -> RateLimitBackend:
+    if name == "sqlite":
+        path = settings.RATE_LIMIT_SQLITE_PATH or os.path.join(
+            tempfile.gettempdir(), "cat-weight-tracker-rate-limit.sqlite3")
+        return SQLiteRateLimitBackend(path)
+    if name != "memory":
+        logger.warning("Unknown RATE_LIMIT_BACKEND %r, using memory", name[:50])
+    return MemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+# Global limiter used by the request middleware
+rate_limiter = RateLimiter(
+    build_backend(settings.RATE_LIMIT_BACKEND),
+    per_ip=settings.RATE_LIMIT_PER_MINUTE,
+    per_user=settings.RATE_LIMIT_USER_PER_MINUTE,
+    routes=parse_route_limits(settings.RATE_LIMIT_ROUTES),
+)
@@ -0,0 +1,121 @@
+"""Response classes shared by the API, and Accept negotiation between them.
+
+JSON (orjson) is the default encoding. When the optional msgpack package is
+installed, endpoints that take the `negotiate_response` dependency answer
+in MessagePack for clients whose Accept header prefers it.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional
+
+import orjson
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+
+try:
+    import msgpack
+except ImportError:  # optional; the API then only speaks JSON
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = frozenset({MSGPACK_MEDIA_TYPE, "application/x-msgpack"})
+
+ResponseFactory = Callable[[Any], Response]
+
+
+def _default(value: Any) -> Any:
+    """Fallback for types orjson does not serialize natively."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _msgpack_default(value: Any) -> Any:
+    """Dates travel as ISO 8601 strings, as in the JSON encoding."""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return _default(value)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """JSON response rendered with orjson, the app's default response class.
+
+    Dates and datetimes are written as ISO 8601 strings and floats in their
+    shortest round-trip form. NaN and Infinity become null, where the stdlib
+    encoder (allow_nan=False) would fail the request. Non-string dict keys
+    are stringified.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default,
+                            option=orjson.OPT_NON_STR_KEYS)
+
+
+class MsgPackResponse(Response):
+    """MessagePack response with the same value mapping as FastJSONResponse."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_msgpack_default)
+
+
+def is_msgpack(content_type: Optional[str]) -> bool:
+    """Whether a Content-Type header names MessagePack."""
+    if not content_type:
+        return False
+    return content_type.partition(";")[0].strip().lower() in MSGPACK_MEDIA_TYPES
+
+
+def parse_accept(value: str) -> Dict[str, float]:
+    """Map each media range in an Accept header to its q-value."""
+    ranges = {}
+    for part in value.split(","):
+        media_range, *params = part.split(";")
+        media_range = media_range.strip().lower()
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, param_value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(param_value)
+                except ValueError:
+                    quality = 0.0
+        ranges[media_range] = quality
+    return ranges
+
+
+def prefers_msgpack(accept: Optional[str]) -> bool:
+    """Whether an Accept header ranks MessagePack above JSON.
+
+    Explicitly listed types take their own q-value, others the wildcard's;
+    on a tie, an explicit MessagePack entry wins over JSON matched by a
+    wildcard, and JSON wins otherwise.
+    """
+    if not accept:
+        return False
+    ranges = parse_accept(accept)
+    wildcard = ranges.get("application/*", ranges.get("*/*", 0.0))
+    explicit = [ranges[t] for t in MSGPACK_MEDIA_TYPES if t in ranges]
+    msgpack_quality = max(explicit) if explicit else wildcard
+    json_quality = ranges.get("application/json", wildcard)
+    if msgpack_quality <= 0.0:
+        return False
+    if msgpack_quality == json_quality:
+        return bool(explicit) and "application/json" not in ranges
+    return msgpack_quality > json_quality
+
+
+def negotiate_response(request: Request) -> ResponseFactory:
+    """Dependency returning a factory for the encoding the client asked for."""
+    use_msgpack = msgpack is not None and prefers_msgpack(request.headers.get("accept"))
+    response_class = MsgPackResponse if use_msgpack else FastJSONResponse
+
+    def respond(content: Any) -> Response:
+        return response_class(content, headers={"Vary": "Accept"})
+
+    return respond
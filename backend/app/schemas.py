@@ -1,5 +1,5 @@
 from datetime import date as DateType
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 import re
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
@@ -98,6 +98,12 @@ class User(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # access token lifetime in seconds
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str = Field(..., min_length=1, max_length=256)
 
 
 class TokenData(BaseModel):
@@ -125,6 +131,20 @@ class CatCreate(CatBase):
     pass
 
 
+def cat_errors(cat: CatBase) -> List[str]:
+    """Rules a created or updated cat must meet beyond the field constraints.
+
+    Shared by the endpoints and batch operations, which answer 400 with the
+    first message.
+    """
+    errors = []
+    if len(cat.name) > 50:
+        errors.append("Cat name too long")
+    if cat.target_weight <= 0 or cat.target_weight > 30:
+        errors.append("Invalid target weight")
+    return errors
+
+
 class Cat(CatBase):
     id: int
     user_id: int
@@ -160,6 +180,20 @@ class WeightRecordCreate(WeightRecordBase):
     pass
 
 
+def weight_record_errors(record: WeightRecordBase) -> List[str]:
+    """Rules a new weight record must meet beyond the field constraints.
+
+    Shared by the endpoint and batch operation (400 with the first message)
+    and the importer (every message, per row).
+    """
+    errors = []
+    if record.user_weight <= 0 or record.user_weight > 500:
+        errors.append("Invalid user weight")
+    if record.combined_weight <= record.user_weight:
+        errors.append("Combined weight must be greater than user weight")
+    return errors
+
+
 class WeightRecord(WeightRecordBase):
     id: int
     cat_weight: float
@@ -167,6 +201,21 @@ class WeightRecord(WeightRecordBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+
+class WeightImportError(BaseModel):
+    index: int  # 0-based position of the row in the uploaded data
+    errors: List[str]
+
+
+class WeightImportResult(BaseModel):
+    imported: int
+    rejected: int
+    errors: List[WeightImportError]  # the first 100 rejected rows
+
+
+ExportFormat = Literal["csv", "ndjson"]
+
+
 # Extended Cat schema with weight records
 
 class CatWithRecords(Cat):
@@ -174,6 +223,43 @@ class CatWithRecords(Cat):
 
     model_config = ConfigDict(from_attributes=True)
 
+
+# Bounded cat detail, selected with ?view=summary
+
+CatView = Literal["full", "summary"]
+
+
+class WeightStats(BaseModel):
+    """Aggregates over a cat's whole weight history (cat_weight in kg)."""
+    count: int
+    first_date: Optional[DateType] = None
+    last_date: Optional[DateType] = None
+    min_weight: Optional[float] = None
+    max_weight: Optional[float] = None
+    mean_weight: Optional[float] = None
+
+
+class WeightSeries(BaseModel):
+    """Downsampled history: the first record on or after evenly spaced dates."""
+    dates: List[DateType]
+    weights: List[float]
+
+
+class CatSummary(Cat):
+    recent_records: List[WeightRecord]  # newest first
+    stats: WeightStats
+    series: WeightSeries
+
+
+# Dashboard: every cat of the user with its latest weigh-in and trend
+
+class DashboardCat(Cat):
+    last_date: Optional[DateType] = None  # date of the latest weigh-in
+    latest_weight: Optional[float] = None
+    target_delta: Optional[float] = None  # latest_weight - target_weight
+    change_30d: Optional[float] = None  # vs. the latest record at least 30 days old
+
+
 # Extended User schema with cats
 
 class UserWithCats(User):
@@ -181,6 +267,7 @@ class UserWithCats(User):
 
     model_config = ConfigDict(from_attributes=True)
 
+
 # Plot data schema
 
 class PlotData(BaseModel):
@@ -189,3 +276,61 @@ class PlotData(BaseModel):
     weights: List[float]
     target_weight: float
     name: str
+
+
+# Columnar (parallel array) responses, selected with ?format=columnar
+
+SeriesFormat = Literal["rows", "columnar"]
+
+
+class WeightColumns(BaseModel):
+    """Weight records as one array per field, index-aligned."""
+    cat_id: int
+    id: List[int]
+    date: List[DateType]
+    user_weight: List[float]
+    combined_weight: List[float]
+    cat_weight: List[float]
+
+
+class PlotColumns(WeightColumns):
+    name: str
+    target_weight: float
+
+
+# Date window of the weight list, plot and export endpoints (?from=&to=)
+
+class DateRange(BaseModel):
+    """Inclusive bounds on WeightRecord.date; a missing bound is open."""
+    start: Optional[DateType] = None
+    end: Optional[DateType] = None
+
+
+# Batched sub-operations (POST /batch)
+
+BatchOperationName = Literal[
+    "cat.create", "cat.read", "cat.list", "cat.delete",
+    "weight.create", "weight.list", "weight.delete", "plot.read",
+]
+
+
+class BatchOperation(BaseModel):
+    op: BatchOperationName
+    cat_id: Optional[int] = None  # cat.read, cat.delete, weight.create, weight.list, plot.read
+    record_id: Optional[int] = None  # weight.delete
+    body: Optional[Dict[str, Any]] = None  # CatCreate or WeightRecordCreate fields
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+    atomic: bool = False  # commit all writes together, or none if any operation fails
+
+
+class BatchResult(BaseModel):
+    status: int  # HTTP status the operation would have had as its own request
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]  # in operation order
+    committed: bool
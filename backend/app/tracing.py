@@ -0,0 +1,349 @@
+"""Lightweight request tracing with W3C traceparent propagation.
+
+A trace is started per request by TracingMiddleware. Code opens child spans
+with `span()` or `@traced()`; both are no-ops unless the request was sampled,
+so instrumentation can stay in hot paths. Finished traces are handed to a
+background thread that passes them to the configured SpanExporter.
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from fastapi.routing import APIRoute
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Trace:
+    """Spans of one sampled or unsampled request."""
+
+    __slots__ = ("trace_id", "sampled", "spans", "_lock")
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans: List["Span"] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span") -> None:
+        with self._lock:
+            self.spans.append(span)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns",
+                 "attributes", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self, end_ns: Optional[int] = None) -> None:
+        self.end_ns = end_ns or time.time_ns()
+        if self.trace.sampled:
+            self.trace.add(self)
+
+    @property
+    def traceparent(self) -> str:
+        flags = "01" if self.trace.sampled else "00"
+        return f"00-{self.trace.trace_id}-{self.span_id}-{flags}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        end_ns = self.end_ns or self.start_ns
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": end_ns,
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def activate(span_: Span) -> Token:
+    """Make a span current; pass the token to deactivate() when it ends."""
+    return _current.set(span_)
+
+
+def deactivate(token: Token) -> None:
+    _current.reset(token)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Return (trace_id, parent span id, sampled) from a W3C traceparent header."""
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class SpanExporter(ABC):
+    """Receives finished traces on the tracer's background thread."""
+
+    @abstractmethod
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        """Export the spans of one finished trace."""
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps exported spans in a list; for tests and debugging."""
+
+    def __init__(self):
+        self.spans: List[Dict[str, Any]] = []
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        self.spans.extend(spans)
+
+
+class JsonFileExporter(SpanExporter):
+    """Appends one JSON object per span to a local file (JSON Lines)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        for span in spans:
+            self._file.write(json.dumps(span, default=str, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def shutdown(self) -> None:
+        self._file.close()
+
+
+class Tracer:
+    """Samples requests, tracks the current span and exports finished traces.
+
+    Requests that carry a traceparent follow the caller's sampling decision;
+    others are sampled at `sample_rate`. With no exporter, tracing is off.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_rate: float = 0.0,
+                 queue_size: int = 1000):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._queue: "queue.Queue[Optional[List[Span]]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None and self.sample_rate > 0
+
+    def set_exporter(self, exporter: Optional[SpanExporter], sample_rate: Optional[float] = None
+                     ) -> None:
+        self.flush()
+        if self.exporter is not None:
+            self.exporter.shutdown()
+        self.exporter = exporter
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None,
+                    attributes: Optional[Dict[str, Any]] = None) -> Span:
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        trace = Trace(trace_id, sampled and self.exporter is not None)
+        return Span(trace, name, parent_id, attributes)
+
+    def end_trace(self, root: Span) -> None:
+        root.finish()
+        if not root.trace.sampled:
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(root.trace.spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter",
+                                                    daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            try:
+                if spans is not None and self.exporter is not None:
+                    self.exporter.export([span.to_dict() for span in spans])
+            except Exception:
+                logger.exception("Trace export failed")
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Block until every queued trace has been exported."""
+        if self._thread is not None:
+            self._queue.join()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time a block as a child of the current span; yields None when not sampled."""
+    parent = _current.get()
+    if parent is None or not parent.trace.sampled:
+        yield None
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.error = type(exc).__name__
+        raise
+    finally:
+        _current.reset(token)
+        child.finish()
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator form of span() for sync and async functions."""
+    def decorator(func: F) -> F:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                parent = _current.get()
+                if parent is None or not parent.trace.sampled:
+                    return await func(*args, **kwargs)
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            parent = _current.get()
+            if parent is None or not parent.trace.sampled:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def _trace_endpoint(call: Callable[..., Any], name: str) -> Callable[..., Any]:
+    """Wrap an endpoint so its span end marks where response serialization starts."""
+    def mark_end() -> None:
+        route_span = _current.get()
+        if route_span is not None:
+            route_span.set("_endpoint_end_ns", time.time_ns())
+
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_endpoint(*args: Any, **kwargs: Any) -> Any:
+            try:
+                with span(name):
+                    return await call(*args, **kwargs)
+            finally:
+                mark_end()
+        return async_endpoint
+
+    @functools.wraps(call)
+    def endpoint(*args: Any, **kwargs: Any) -> Any:
+        try:
+            with span(name):
+                return call(*args, **kwargs)
+        finally:
+            mark_end()
+    return endpoint
+
+
+class TracedRoute(APIRoute):
+    """APIRoute that traces dependency resolution, the endpoint and serialization.
+
+    The route span covers the whole handler; the endpoint gets its own span,
+    dependencies (such as authentication) open theirs, and the time from the
+    endpoint returning to the response being built is recorded as a
+    "serialize" span.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, endpoint, **kwargs)
+        self.dependant.call = _trace_endpoint(self.dependant.call, f"endpoint {self.name}")
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            parent = _current.get()
+            if parent is None or not parent.trace.sampled:
+                return await handler(request)
+            with span("route", route=self.path) as route_span:
+                response = await handler(request)
+                endpoint_end = route_span.attributes.pop("_endpoint_end_ns", None)
+                if endpoint_end is not None:
+                    serialize = Span(route_span.trace, "serialize", route_span.span_id)
+                    serialize.start_ns = endpoint_end
+                    serialize.finish()
+                return response
+
+        return traced_handler
+
+
+def build_exporter(name: str) -> Optional[SpanExporter]:
+    if name in ("", "none"):
+        return None
+    if name == "jsonl":
+        return JsonFileExporter(settings.TRACING_FILE)
+    logger.warning("Unknown TRACING_EXPORTER %r, tracing disabled", name[:50])
+    return None
+
+
+# Global tracer used by the tracing middleware
+tracer = Tracer(build_exporter(settings.TRACING_EXPORTER),
+                sample_rate=settings.TRACING_SAMPLE_RATE)
@@ -0,0 +1,109 @@
+"""Concurrency: sync handlers on the threadpool vs. async handlers on AsyncSession.
+
+Each simulated request does what GET /api/cats/{cat_id}/weights/ does: an
+ownership check followed by the record query. In sync mode the work runs via
+run_in_threadpool (as FastAPI does for `def` handlers, bounded by the default
+40-thread limiter); in async mode it awaits crud_async directly.
+
+With --latency on PostgreSQL each request also waits on pg_sleep, which makes
+the threadpool ceiling visible: sync throughput flattens at ~40 in-flight
+requests while async keeps scaling with the pool size.
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import bench_database_url, print_table, timer
+from benchmarks.seed import seed
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app import crud, crud_async
+from app.config import Settings
+from app.pool import build_async_engine, build_engine
+
+
+def sync_request(SessionLocal, user_id: int, cat_id: int, latency: float) -> int:
+    db = SessionLocal()
+    try:
+        if latency:
+            db.execute(text("SELECT pg_sleep(:s)"), {"s": latency})
+        crud.get_cat(db, cat_id=cat_id, user_id=user_id)
+        return len(crud.get_weight_records(db, cat_id=cat_id, limit=100))
+    finally:
+        db.close()
+
+
+async def async_request(AsyncSessionLocal, user_id: int, cat_id: int, latency: float) -> int:
+    async with AsyncSessionLocal() as db:
+        if latency:
+            await db.execute(text("SELECT pg_sleep(:s)"), {"s": latency})
+        await crud_async.get_cat(db, cat_id=cat_id, user_id=user_id)
+        return len(await crud_async.get_weight_records(db, cat_id=cat_id, limit=100))
+
+
+async def run_mode(mode: str, url: str, config: Settings, user_id: int, cat_id: int,
+                   concurrency: int, requests: int, latency: float) -> float:
+    if mode == "sync":
+        engine = build_engine(url, config)
+        SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+        async def one():
+            await run_in_threadpool(sync_request, SessionLocal, user_id, cat_id, latency)
+    else:
+        engine = build_async_engine(url, config)
+        AsyncSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+        async def one():
+            await async_request(AsyncSessionLocal, user_id, cat_id, latency)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded():
+        async with semaphore:
+            await one()
+
+    with timer() as elapsed:
+        await asyncio.gather(*(bounded() for _ in range(requests)))
+
+    if mode == "sync":
+        engine.dispose()
+    else:
+        await engine.dispose()
+    return requests / elapsed[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", default="1,10,40,100,200")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="simulated server-side latency per request (PostgreSQL only)")
+    args = parser.parse_args()
+
+    url = bench_database_url()
+    config = Settings()
+    config.DB_POOL_SIZE = 100
+    config.DB_MAX_OVERFLOW = 100
+    latency = args.latency if url.startswith("postgres") else 0.0
+
+    seed_engine = build_engine(url, config)
+    user_id, cat_ids = seed(seed_engine, cats=1, records_per_cat=100)
+    seed_engine.dispose()
+
+    rows = []
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        sync_rps = asyncio.run(run_mode("sync", url, config, user_id, cat_ids[0],
+                                        concurrency, args.requests, latency))
+        async_rps = asyncio.run(run_mode("async", url, config, user_id, cat_ids[0],
+                                         concurrency, args.requests, latency))
+        rows.append([concurrency, round(sync_rps, 1), round(async_rps, 1),
+                     f"{async_rps / sync_rps:.2f}x"])
+    print(f"{args.requests} requests, {latency * 1000:.1f}ms simulated latency")
+    print_table(["concurrency", "sync req/s", "async req/s", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Amortized per-operation latency: one request per operation vs. POST /api/batch.
+
+Requests go through the full ASGI stack (middleware, auth, session setup)
+with an in-process httpx client, so the per-request overhead a batch saves
+is part of the measurement. Each mix runs N operations as N separate
+requests, as one batch and as one atomic batch (writes committed together).
+Application log output is disabled.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+from datetime import date, timedelta
+
+from benchmarks.common import bench_database_url, print_table, timer
+
+os.environ["DATABASE_URL"] = bench_database_url()
+
+import httpx  # noqa: E402
+
+from app import auth  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from benchmarks.seed import BENCH_USERNAME, seed  # noqa: E402
+
+
+def weight_body(n: int) -> dict:
+    return {"date": (date(1990, 1, 1) + timedelta(days=n % 9000)).isoformat(),
+            "user_weight": 70.0, "combined_weight": 74.5}
+
+
+def operations(mix: str, cat_ids: list, count: int) -> list:
+    """(batch operation, equivalent single request) pairs."""
+    pairs = []
+    for n in range(count):
+        cat_id = cat_ids[n % len(cat_ids)]
+        if mix == "weight.create" or (mix == "mixed" and n % 2):
+            body = weight_body(n)
+            pairs.append(({"op": "weight.create", "cat_id": cat_id, "body": body},
+                          ("POST", f"/api/cats/{cat_id}/weights/", body)))
+        else:
+            pairs.append(({"op": "cat.read", "cat_id": cat_id},
+                          ("GET", f"/api/cats/{cat_id}", None)))
+    return pairs
+
+
+async def run_singles(client, pairs) -> float:
+    with timer() as elapsed:
+        for _, (method, url, body) in pairs:
+            response = await client.request(method, url, json=body)
+            assert response.status_code == 200, response.text
+    return elapsed[0]
+
+
+async def run_batch(client, pairs, atomic: bool) -> float:
+    payload = {"operations": [operation for operation, _ in pairs], "atomic": atomic}
+    with timer() as elapsed:
+        response = await client.post("/api/batch", json=payload)
+    data = response.json()
+    assert response.status_code == 200 and data["committed"], response.text
+    assert all(result["status"] == 200 for result in data["results"])
+    return elapsed[0]
+
+
+async def run(mixes: list, sizes: list, cats: int, repeats: int) -> list:
+    token = auth.create_access_token({"sub": BENCH_USERNAME})
+    transport = httpx.ASGITransport(app=app)
+    rows = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver",
+                                 headers={"Authorization": f"Bearer {token}"}) as client:
+        for mix in mixes:
+            for size in sizes:
+                # Fresh history so created records do not grow later reads
+                _, cat_ids = seed(engine, cats=cats, records_per_cat=30)
+                pairs = operations(mix, cat_ids, size)
+                await run_singles(client, pairs[:1])  # warm up
+                timings = {"singles": [], "batch": [], "atomic": []}
+                for _ in range(repeats):
+                    timings["singles"].append(await run_singles(client, pairs))
+                    timings["batch"].append(await run_batch(client, pairs, atomic=False))
+                    timings["atomic"].append(await run_batch(client, pairs, atomic=True))
+                per_op = {name: statistics.median(values) / size * 1e6
+                          for name, values in timings.items()}
+                rows.append([mix, size] + [round(per_op[name]) for name in timings]
+                            + [f"{per_op['singles'] / per_op['atomic']:.1f}x"])
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mixes", default="cat.read,weight.create,mixed")
+    parser.add_argument("--sizes", default="10,50,100", help="operations per batch")
+    parser.add_argument("--cats", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rows = asyncio.run(run(args.mixes.split(","), [int(s) for s in args.sizes.split(",")],
+                           args.cats, args.repeats))
+    print_table(["mix", "operations", "singles us/op", "batch us/op", "atomic us/op",
+                 "singles vs atomic"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Cat detail cost as history grows: every record vs. the ?view=summary bundle.
+
+Seeds one cat with N daily weight records and times building and rendering
+the `/api/cats/{cat_id}` body both ways: the full detail with every record
+embedded, and the summary with the 10 latest records, history stats and a
+100-point series. The summary's size is fixed; its time covers aggregating
+the history in the database rather than shipping it to Python.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.common import bench_database_url, print_table
+from benchmarks.seed import seed
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import crud_async
+from app.config import Settings
+from app.pool import build_async_engine, build_engine
+from app.responses import FastJSONResponse
+
+
+async def measure(SessionLocal, build, repeats: int):
+    samples = []
+    async with SessionLocal() as db:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            body = FastJSONResponse(await build(db)).body
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples), len(body)
+
+
+async def run(url: str, records: int, repeats: int) -> list:
+    config = Settings()
+    sync_engine = build_engine(url, config)
+    engine = build_async_engine(url, config)
+    SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    try:
+        _, (cat_id,) = seed(sync_engine, cats=1, records_per_cat=records)
+
+        async def full(db):
+            return await crud_async.get_cat_with_record_rows(db, cat_id)
+
+        async def summary(db):
+            return await crud_async.get_cat_summary(db, cat_id)
+
+        full_time, full_bytes = await measure(SessionLocal, full, repeats)
+        summary_time, summary_bytes = await measure(SessionLocal, summary, repeats)
+    finally:
+        await engine.dispose()
+        sync_engine.dispose()
+    return [records, full_bytes, round(full_time * 1000, 2), summary_bytes,
+            round(summary_time * 1000, 2)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", default="100,10000,100000",
+                        help="comma-separated history sizes")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    url = bench_database_url()
+    table = [asyncio.run(run(url, int(records), args.repeats))
+             for records in args.records.split(",")]
+    print_table(["records", "full bytes", "full ms", "summary bytes", "summary ms"], table)
+
+
+if __name__ == "__main__":
+    main()
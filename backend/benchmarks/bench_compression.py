@@ -0,0 +1,100 @@
+"""Bytes on the wire and CPU cost of compressing weight-history responses.
+
+Payloads are rendered exactly as the API sends them: the cat detail
+(`/api/cats/{cat_id}`, every record embedded), plot data
+(`/api/cats/{cat_id}/plot`) and the same records in the columnar format
+(`?format=columnar`) for cats with N daily weigh-ins. Each coding is
+timed over repeated compressions of the same body; brotli rows are skipped
+when the package is not installed.
+"""
+import argparse
+import gzip
+import statistics
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import print_table
+
+from fastapi.responses import JSONResponse
+
+from app.middleware import brotli
+
+
+def cat_detail(records: int) -> dict:
+    start = date(2020, 1, 1)
+    return {
+        "name": "Whiskers", "target_weight": 4.5, "id": 1, "user_id": 1,
+        "weight_records": [
+            {
+                "id": i + 1, "cat_id": 1,
+                "date": (start + timedelta(days=i)).isoformat(),
+                "user_weight": round(70.0 + (i % 13) / 10, 1),
+                "combined_weight": round(74.5 + (i % 17) / 10, 1),
+                "cat_weight": round(4.5 + (i % 17) / 10 - (i % 13) / 10, 1),
+            }
+            for i in range(records)
+        ],
+    }
+
+
+def plot_data(records: int) -> dict:
+    detail = cat_detail(records)
+    return {
+        "cat_id": 1, "name": "Whiskers", "target_weight": 4.5,
+        "dates": [r["date"] for r in detail["weight_records"]],
+        "weights": [r["cat_weight"] for r in detail["weight_records"]],
+    }
+
+
+def weight_columns(records: int) -> dict:
+    rows = cat_detail(records)["weight_records"]
+    columns = {field: [r[field] for r in rows]
+               for field in ("id", "date", "user_weight", "combined_weight", "cat_weight")}
+    return {"cat_id": 1, **columns}
+
+
+def codings():
+    for level in (1, 6, 9):
+        yield f"gzip-{level}", lambda body, level=level: gzip.compress(body, compresslevel=level)
+    if brotli is not None:
+        for quality in (1, 4, 11):
+            yield f"br-{quality}", lambda body, q=quality: brotli.compress(body, quality=q)
+
+
+def median_time(compress, body: bytes, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        compress(body)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", default="30,365,3650",
+                        help="comma-separated weigh-in counts per cat")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = []
+    for records in (int(r) for r in args.records.split(",")):
+        payloads = (("detail", cat_detail(records)), ("plot", plot_data(records)),
+                    ("columnar", weight_columns(records)))
+        for endpoint, payload in payloads:
+            body = JSONResponse(payload).body
+            for name, compress in codings():
+                compressed = len(compress(body))
+                seconds = median_time(compress, body, args.repeats)
+                rows.append([endpoint, records, len(body), name, compressed,
+                             f"{len(body) / compressed:.1f}x", round(seconds * 1e6, 1),
+                             round(len(body) / seconds / 1e6, 1)])
+
+    if brotli is None:
+        print("brotli not installed; gzip only")
+    print_table(["endpoint", "records", "raw bytes", "coding", "wire bytes", "ratio",
+                 "us/response", "MB/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Cat list with latest weights: one dashboard statement vs. a detail request per cat.
+
+Seeds a user with N cats of R daily weight records each and times the
+database work behind drawing the cat list: `/auth/users/me/dashboard`
+(one statement) against the list plus `/cats/{cat_id}` for every cat,
+which is what the frontend did before the dashboard existed.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.common import bench_database_url, print_table
+from benchmarks.seed import seed
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import crud_async
+from app.config import Settings
+from app.pool import build_async_engine, build_engine
+
+
+async def median_time(SessionLocal, fetch, repeats: int) -> float:
+    samples = []
+    async with SessionLocal() as db:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            await fetch(db)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def run(url: str, cats: int, records: int, repeats: int) -> list:
+    config = Settings()
+    sync_engine = build_engine(url, config)
+    engine = build_async_engine(url, config)
+    SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    try:
+        user_id, _ = seed(sync_engine, cats=cats, records_per_cat=records)
+
+        async def dashboard(db):
+            return await crud_async.get_dashboard_rows(db, user_id)
+
+        async def per_cat(db):
+            rows = await crud_async.get_cat_rows(db, user_id, limit=cats)
+            return [await crud_async.get_cat_with_record_rows(db, row["id"], user_id)
+                    for row in rows]
+
+        dashboard_time = await median_time(SessionLocal, dashboard, repeats)
+        per_cat_time = await median_time(SessionLocal, per_cat, repeats)
+    finally:
+        await engine.dispose()
+        sync_engine.dispose()
+    return [cats, records, cats * 2 + 1, round(per_cat_time * 1000, 2),
+            round(dashboard_time * 1000, 2), f"{per_cat_time / dashboard_time:.0f}x"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cats", default="10,100,500", help="comma-separated cat counts")
+    parser.add_argument("--records", type=int, default=365, help="weight records per cat")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    url = bench_database_url()
+    table = [asyncio.run(run(url, int(cats), args.records, args.repeats))
+             for cats in args.cats.split(",")]
+    print_table(["cats", "records/cat", "per-cat queries", "per-cat ms", "dashboard ms",
+                 "speedup"], table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Cost of a "last 90 days" plot as a cat's history grows.
+
+Seeds one cat with N daily weight records and times plot generation for the
+full history and for `?from=<today - 90 days>`. The windowed plot reads its
+records through a range of idx_weight_cat_date, so its time should stay
+flat while the full-history plot grows with N.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import bench_database_url, print_table
+from benchmarks.seed import seed
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import plots
+from app.config import Settings
+from app.pool import build_async_engine, build_engine
+
+
+async def median_time(SessionLocal, generate, repeats: int) -> float:
+    samples = []
+    async with SessionLocal() as db:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            await generate(db)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def run(url: str, records: int, days: int, repeats: int) -> list:
+    config = Settings()
+    sync_engine = build_engine(url, config)
+    engine = build_async_engine(url, config)
+    SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    since = date.today() - timedelta(days=days)
+    try:
+        _, (cat_id,) = seed(sync_engine, cats=1, records_per_cat=records)
+
+        async def full(db):
+            return await plots.generate_weight_plot_async(db, cat_id)
+
+        async def window(db):
+            return await plots.generate_weight_plot_async(db, cat_id, date_from=since)
+
+        async with SessionLocal() as db:
+            points = len((await window(db))["dates"])
+        full_time = await median_time(SessionLocal, full, repeats)
+        window_time = await median_time(SessionLocal, window, repeats)
+    finally:
+        await engine.dispose()
+        sync_engine.dispose()
+    return [records, points, round(full_time * 1000, 2), round(window_time * 1000, 2)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", default="100,10000,100000",
+                        help="comma-separated history sizes")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    url = bench_database_url()
+    table = [asyncio.run(run(url, int(records), args.days, args.repeats))
+             for records in args.records.split(",")]
+    print_table(["records", f"{args.days}-day points", "full plot ms", "window plot ms"], table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Streaming export throughput and peak memory as the history grows.
+
+Drains exports.stream_weight_history for a user with N weight records and
+reports rows/sec, bytes produced and the peak Python heap allocation seen by
+tracemalloc while streaming. Peak memory should stay roughly constant, since
+only one batch of STREAM_BATCH_SIZE rows is held at a time. Histories over
+100k records are spread across several cats.
+"""
+import argparse
+import asyncio
+import logging
+import tracemalloc
+
+from benchmarks.common import bench_database_url, print_table, timer
+from benchmarks.seed import seed
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import exports
+from app.config import Settings
+from app.pool import build_async_engine, build_engine
+
+MAX_RECORDS_PER_CAT = 100000
+
+
+async def drain(SessionLocal, user_id: int, format: str) -> int:
+    size = 0
+    async for chunk in exports.stream_weight_history(SessionLocal, user_id, format):
+        size += len(chunk)
+    return size
+
+
+async def run(url: str, sizes: list, format: str) -> list:
+    config = Settings()
+    sync_engine = build_engine(url, config)
+    engine = build_async_engine(url, config)
+    SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    table = []
+    try:
+        for rows in sizes:
+            cats = max(1, -(-rows // MAX_RECORDS_PER_CAT))
+            user_id, _ = seed(sync_engine, cats=cats, records_per_cat=rows // cats)
+            await drain(SessionLocal, user_id, format)  # warm up
+
+            tracemalloc.start()
+            with timer() as elapsed:
+                size = await drain(SessionLocal, user_id, format)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            table.append([rows, format, round(size / 1e6, 1), round(elapsed[0], 2),
+                          round(rows / elapsed[0]), round(peak / 1e6, 2)])
+    finally:
+        await engine.dispose()
+        sync_engine.dispose()
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", default="10000,100000,1000000",
+                        help="comma-separated history sizes")
+    parser.add_argument("--format", choices=sorted(exports.MEDIA_TYPES), default="csv")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    sizes = [int(r) for r in args.rows.split(",")]
+    table = asyncio.run(run(bench_database_url(), sizes, args.format))
+    print(f"batch size {exports.STREAM_BATCH_SIZE}; times include tracemalloc overhead")
+    print_table(["rows", "format", "MB out", "seconds", "rows/s", "peak heap MB"], table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Weight record import throughput: one request per record vs. bulk import.
+
+"single" replays what POST /api/cats/{cat_id}/weights/ does per record
+(ownership check, insert, commit, refresh) for up to --single-rows records.
+"bulk" runs the /api/weights/import pipeline on a CSV body: parse, validate,
+one ownership query and batched inserts in one transaction. The HTTP
+endpoint itself is bounded by the request size limit (10 MB, roughly 300k
+CSV rows), so larger imports are timed below the HTTP layer.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date, timedelta
+
+from benchmarks.common import bench_database_url, print_table, timer
+from benchmarks.seed import seed
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import crud_async, imports, models, schemas
+from app.config import Settings
+from app.pool import build_async_engine, build_engine
+
+
+def csv_body(rows: int) -> bytes:
+    start = date.today() - timedelta(days=20000)
+    lines = ["date,user_weight,combined_weight"]
+    lines += [f"{start + timedelta(days=i % 20000)},70.0,{74.5 + (i % 10) / 10}"
+              for i in range(rows)]
+    return "\n".join(lines).encode()
+
+
+async def clear(SessionLocal) -> None:
+    async with SessionLocal() as db:
+        await db.execute(delete(models.WeightRecord))
+        await db.commit()
+
+
+async def single(SessionLocal, user_id: int, cat_id: int, rows: int) -> float:
+    start = date.today() - timedelta(days=rows)
+    records = [schemas.WeightRecordCreate(date=start + timedelta(days=i), user_weight=70.0,
+                                          combined_weight=74.5 + (i % 10) / 10)
+               for i in range(rows)]
+    async with SessionLocal() as db:
+        with timer() as elapsed:
+            for record in records:
+                await crud_async.get_cat(db, cat_id=cat_id, user_id=user_id)
+                await crud_async.create_weight_record(db, weight_record=record, cat_id=cat_id)
+    return elapsed[0]
+
+
+async def bulk(SessionLocal, user_id: int, cat_id: int, rows: int) -> list:
+    body = csv_body(rows)
+    async with SessionLocal() as db:
+        with timer() as parse:
+            parsed = imports.parse_body(body, "text/csv")
+        with timer() as validate:
+            validated = imports.validate_rows(parsed, default_cat_id=cat_id)
+        with timer() as insert:
+            await crud_async.get_owned_cat_ids(db, user_id, {cat_id})
+            imported = await crud_async.bulk_create_weight_records(db, validated.records)
+    assert imported == rows, imported
+    return [parse[0], validate[0], insert[0]]
+
+
+async def run(url: str, sizes: list, single_rows: int) -> list:
+    config = Settings()
+    sync_engine = build_engine(url, config)
+    engine = build_async_engine(url, config)
+    SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    table = []
+    try:
+        user_id, (cat_id,) = seed(sync_engine, cats=1, records_per_cat=0)
+        for rows in sizes:
+            count = min(rows, single_rows)
+            await clear(SessionLocal)
+            seconds = await single(SessionLocal, user_id, cat_id, count)
+            single_rate = count / seconds
+
+            await clear(SessionLocal)
+            phases = await bulk(SessionLocal, user_id, cat_id, rows)
+            total = sum(phases)
+            table.append([rows, round(single_rate)] + [round(p, 2) for p in phases]
+                         + [round(total, 2), round(rows / total),
+                            f"{rows / total / single_rate:.0f}x"])
+        await clear(SessionLocal)
+    finally:
+        await engine.dispose()
+        sync_engine.dispose()
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", default="10000,1000000", help="comma-separated row counts")
+    parser.add_argument("--single-rows", type=int, default=1000,
+                        help="records timed on the one-at-a-time path (rate is extrapolated)")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)  # slow-query warnings for the large batches
+    sizes = [int(r) for r in args.rows.split(",")]
+    table = asyncio.run(run(bench_database_url(), sizes, args.single_rows))
+    print_table(["rows", "single rows/s", "parse s", "validate s", "insert s", "bulk s",
+                 "bulk rows/s", "speedup"], table)
+
+
+if __name__ == "__main__":
+    main()
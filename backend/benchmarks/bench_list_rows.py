@@ -0,0 +1,95 @@
+"""Per-row cost of list responses: ORM objects + Pydantic vs. column tuples.
+
+Each sample produces the body of GET /api/cats/{cat_id} (the cat with every
+weight record) for a cat with N records. "orm" is the former path: load
+models.Cat with selectinload, validate into schemas.CatWithRecords with
+from_attributes, dump and render. "rows" is the current path: select the
+response columns as tuples (crud_async.get_cat_with_record_rows) and render
+the dicts directly. Both include the database round trips.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.common import bench_database_url, print_table
+from benchmarks.seed import seed
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import crud_async, schemas
+from app.config import Settings
+from app.pool import build_async_engine, build_engine
+from app.responses import FastJSONResponse
+
+adapter = TypeAdapter(schemas.CatWithRecords)
+
+
+async def orm_body(db, cat_id: int) -> bytes:
+    cat = await crud_async.get_cat_with_records(db, cat_id=cat_id)
+    model = adapter.validate_python(cat, from_attributes=True)
+    return FastJSONResponse(adapter.dump_python(model, mode="json")).body
+
+
+async def rows_body(db, cat_id: int) -> bytes:
+    return FastJSONResponse(await crud_async.get_cat_with_record_rows(db, cat_id=cat_id)).body
+
+
+def same_content(a: bytes, b: bytes) -> bool:
+    """Bodies are equal up to record order (the ORM path has no ORDER BY)."""
+    a_cat, b_cat = orjson.loads(a), orjson.loads(b)
+    for cat in (a_cat, b_cat):
+        cat["weight_records"].sort(key=lambda record: record["id"])
+    return a_cat == b_cat
+
+
+async def measure(SessionLocal, build, cat_id: int, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        # A fresh session per sample so the identity map never serves cached objects
+        async with SessionLocal() as db:
+            start = time.perf_counter()
+            await build(db, cat_id)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def run(url: str, sizes: list, repeats: int) -> list:
+    config = Settings()
+    sync_engine = build_engine(url, config)
+    engine = build_async_engine(url, config)
+    SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    rows = []
+    try:
+        for records in sizes:
+            _, (cat_id,) = seed(sync_engine, cats=1, records_per_cat=records)
+            async with SessionLocal() as db:
+                assert same_content(await orm_body(db, cat_id), await rows_body(db, cat_id))
+            results = {name: await measure(SessionLocal, build, cat_id, repeats)
+                       for name, build in (("orm", orm_body), ("rows", rows_body))}
+            rows.append([records]
+                        + [round(results[n] * 1000, 2) for n in ("orm", "rows")]
+                        + [round(results[n] / records * 1e6, 2) for n in ("orm", "rows")]
+                        + [f"{results['orm'] / results['rows']:.1f}x"])
+    finally:
+        await engine.dispose()
+        sync_engine.dispose()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", default="100,10000,100000",
+                        help="comma-separated weight record counts")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    sizes = [int(r) for r in args.records.split(",")]
+    rows = asyncio.run(run(bench_database_url(), sizes, args.repeats))
+    print_table(["records", "orm ms", "rows ms", "orm us/row", "rows us/row", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
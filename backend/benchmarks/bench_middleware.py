@@ -0,0 +1,138 @@
+"""Per-request middleware overhead: BaseHTTPMiddleware vs. the pure-ASGI stack.
+
+Requests are driven straight through the ASGI interface (no HTTP server or
+client) so the numbers isolate framework and middleware cost. The "base_http"
+variant is the previous `@app.middleware("http")` security middleware; "asgi"
+is the current stack; "none" keeps only CORS as a floor. Application log
+output is disabled for all variants.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from benchmarks.common import bench_database_url, print_table, timer
+
+os.environ["DATABASE_URL"] = bench_database_url()
+
+from fastapi import HTTPException, Request  # noqa: E402
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app import auth  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.loop_monitor import loop_monitor  # noqa: E402
+from app.main import MAX_REQUEST_SIZE, app  # noqa: E402
+from benchmarks.seed import BENCH_USERNAME, seed  # noqa: E402
+
+logger = logging.getLogger("app.main")
+
+
+async def legacy_security_middleware(request: Request, call_next):
+    """The request path of the former @app.middleware("http") (rate limiting off)."""
+    start_time = time.time()
+    client_ip = request.client.host if request.client else "unknown"
+    content_length = request.headers.get("content-length")
+    if content_length and int(content_length) > MAX_REQUEST_SIZE:
+        raise HTTPException(status_code=413, detail="Request too large")
+
+    request_path = request.url.path
+    if len(request_path) > 100:
+        request_path = request_path[:97] + "..."
+    request_method = request.method
+    if not request_method.isalpha() or len(request_method) > 10:
+        request_method = "INVALID"
+    logger.info("Request: %s %s from %s", request_method, request_path, client_ip)
+
+    inflight_token = loop_monitor.track(request.scope)
+    try:
+        response = await call_next(request)
+    finally:
+        loop_monitor.untrack(inflight_token)
+
+    process_time = time.time() - start_time
+    logger.info("Response: %s %s completed in %.3fs with status %d",
+                request_method, request_path, process_time, response.status_code)
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    response.headers["X-Frame-Options"] = "DENY"
+    response.headers["X-XSS-Protection"] = "1; mode=block"
+    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+    return response
+
+
+def use_middleware(variant: str, current: list) -> None:
+    cors = [m for m in current if m.cls.__name__ == "CORSMiddleware"]
+    if variant == "asgi":
+        app.user_middleware = list(current)
+    elif variant == "base_http":
+        app.user_middleware = [Middleware(BaseHTTPMiddleware,
+                                          dispatch=legacy_security_middleware)] + cors
+    else:
+        app.user_middleware = cors
+    app.middleware_stack = None  # rebuilt on the next call
+
+
+async def call(path: str, headers: list) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": headers,
+        "client": ("127.0.0.1", 50000), "server": ("testserver", 80), "app": app,
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(path: str, headers: list, requests: int) -> float:
+    assert await call(path, headers) == 200  # warm up and build the stack
+    with timer() as elapsed:
+        for _ in range(requests):
+            await call(path, headers)
+    return requests / elapsed[0]
+
+
+async def run_all(auth_headers: list, requests: int) -> list:
+    current = list(app.user_middleware)
+    rows = []
+    for path, headers in (("/", []), ("/api/cats/", auth_headers)):
+        results = {}
+        for variant in ("none", "base_http", "asgi"):
+            use_middleware(variant, current)
+            results[variant] = await measure(path, headers, requests)
+        rows.append([path] + [round(results[v], 1) for v in ("none", "base_http", "asgi")]
+                    + [f"{results['asgi'] / results['base_http']:.2f}x"])
+    use_middleware("asgi", current)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--records", type=int, default=10,
+                        help="cats owned by the benchmark user (listed by /api/cats/)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    seed(engine, cats=args.records, records_per_cat=1)
+    token = auth.create_access_token({"sub": BENCH_USERNAME})
+    auth_headers = [(b"authorization", f"Bearer {token}".encode())]
+
+    rows = asyncio.run(run_all(auth_headers, args.requests))
+
+    print(f"{args.requests} sequential requests per cell")
+    print_table(["path", "none req/s", "base_http req/s", "asgi req/s", "asgi vs base"], rows)
+
+
+if __name__ == "__main__":
+    main()
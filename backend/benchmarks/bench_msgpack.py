@@ -0,0 +1,71 @@
+"""Encode/decode cost and payload size: JSON vs. MessagePack.
+
+Payloads are the weight list (`/api/cats/{cat_id}/weights/`), its columnar
+form and plot data for N records, built as the endpoints build them.
+Encoding uses the API's response classes. Decoding is timed with orjson and
+the stdlib json module (a stand-in for a typical client parser) against
+msgpack.unpackb.
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import date
+
+from benchmarks.bench_compression import cat_detail, plot_data, weight_columns
+from benchmarks.common import print_table
+
+import orjson
+
+from app.responses import FastJSONResponse, MsgPackResponse, msgpack
+
+
+def weight_rows(records: int) -> list:
+    rows = cat_detail(records)["weight_records"]
+    for row in rows:
+        row["date"] = date.fromisoformat(row["date"])  # as selected from the database
+    return rows
+
+
+def median_time(func, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", default="100,1000,10000",
+                        help="comma-separated record counts")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    if msgpack is None:
+        raise SystemExit("msgpack is not installed")
+
+    rows = []
+    for records in (int(r) for r in args.records.split(",")):
+        payloads = (("weights", weight_rows(records)), ("columnar", weight_columns(records)),
+                    ("plot", plot_data(records)))
+        for endpoint, payload in payloads:
+            json_body = FastJSONResponse(payload).body
+            msgpack_body = MsgPackResponse(payload).body
+            timings = [
+                median_time(lambda: FastJSONResponse(payload), args.repeats),
+                median_time(lambda: MsgPackResponse(payload), args.repeats),
+                median_time(lambda: orjson.loads(json_body), args.repeats),
+                median_time(lambda: json.loads(json_body), args.repeats),
+                median_time(lambda: msgpack.unpackb(msgpack_body), args.repeats),
+            ]
+            rows.append([endpoint, records, len(json_body), len(msgpack_body)]
+                        + [round(t * 1e6, 1) for t in timings])
+
+    print_table(["payload", "records", "json bytes", "msgpack bytes", "json enc us",
+                 "msgpack enc us", "orjson dec us", "stdlib json dec us", "msgpack dec us"],
+                rows)
+
+
+if __name__ == "__main__":
+    main()
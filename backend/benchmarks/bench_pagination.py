@@ -0,0 +1,89 @@
+"""Page fetch time at increasing depth: OFFSET (skip/limit) vs. keyset cursors.
+
+Seeds one cat with N weight records and times fetching a 100-record page
+that starts at several depths into the history, once with `skip` and once
+with the (date, id) cursor of the preceding row. Offset pages get slower
+with depth because every skipped row is still read; keyset pages seek
+straight to the position through idx_weight_cat_date.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.common import bench_database_url, print_table
+from benchmarks.seed import seed
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import crud_async, models
+from app.config import Settings
+from app.pool import build_async_engine, build_engine
+
+
+async def median_time(SessionLocal, fetch, repeats: int) -> float:
+    samples = []
+    async with SessionLocal() as db:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            await fetch(db)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def run(url: str, records: int, depths: list, limit: int, repeats: int) -> list:
+    config = Settings()
+    sync_engine = build_engine(url, config)
+    engine = build_async_engine(url, config)
+    SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    table = []
+    try:
+        _, (cat_id,) = seed(sync_engine, cats=1, records_per_cat=records)
+        async with SessionLocal() as db:
+            keys = (await db.execute(
+                select(models.WeightRecord.date, models.WeightRecord.id)
+                .where(models.WeightRecord.cat_id == cat_id)
+                .order_by(models.WeightRecord.date, models.WeightRecord.id)
+            )).all()
+
+        for depth in depths:
+            after = tuple(keys[depth - 1]) if depth else None
+
+            async def by_offset(db, depth=depth):
+                return await crud_async.get_weight_record_rows(db, cat_id, skip=depth,
+                                                               limit=limit)
+
+            async def by_cursor(db, after=after):
+                return await crud_async.get_weight_record_rows(db, cat_id, limit=limit,
+                                                               after=after)
+
+            async with SessionLocal() as db:
+                assert await by_offset(db) == await by_cursor(db)
+            offset = await median_time(SessionLocal, by_offset, repeats)
+            keyset = await median_time(SessionLocal, by_cursor, repeats)
+            table.append([depth, round(offset * 1000, 2), round(keyset * 1000, 2),
+                          f"{offset / keyset:.1f}x"])
+    finally:
+        await engine.dispose()
+        sync_engine.dispose()
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--depths", default="0,1000,10000,50000,99000")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    depths = [int(d) for d in args.depths.split(",")]
+    table = asyncio.run(run(bench_database_url(), args.records, depths, args.limit,
+                            args.repeats))
+    print(f"{args.records} records, {args.limit}-record pages")
+    print_table(["depth", "offset ms", "keyset ms", "speedup"], table)
+
+
+if __name__ == "__main__":
+    main()
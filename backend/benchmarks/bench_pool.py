@@ -0,0 +1,82 @@
+"""Throughput as the connection pool size varies.
+
+Simulates burst traffic: many worker threads each check out a connection, run a
+query, hold the connection for a short "request" duration and return it. Pool
+size and overflow come from the same build_engine() used by the application.
+"""
+import argparse
+import threading
+
+from benchmarks.common import bench_database_url, print_table, timer
+
+from sqlalchemy import text
+
+from app.config import Settings
+from app.pool import MonitoredQueuePool, PoolMonitor, build_engine
+
+
+def run(url: str, pool_size: int, workers: int, requests: int, hold: float) -> dict:
+    config = Settings()
+    config.DB_POOL_SIZE = pool_size
+    config.DB_MAX_OVERFLOW = 0
+    config.DB_POOL_TIMEOUT = 60.0
+    monitor = PoolMonitor()
+    overrides = {}
+    if url.startswith("sqlite"):
+        # build_engine leaves SQLite pooling alone; force a sized QueuePool here
+        overrides = {"poolclass": MonitoredQueuePool, "pool_size": pool_size,
+                     "max_overflow": 0, "pool_timeout": 60.0}
+    engine = build_engine(url, config, monitor=monitor, **overrides)
+    hold_sql = text("SELECT pg_sleep(:s)") if engine.dialect.name == "postgresql" else None
+
+    per_worker = requests // workers
+
+    def worker():
+        for _ in range(per_worker):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                if hold_sql is not None:
+                    conn.execute(hold_sql, {"s": hold})
+                else:
+                    threading.Event().wait(hold)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    with timer() as elapsed:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    engine.dispose()
+
+    stats = monitor.snapshot()
+    wait = stats["wait_time"]
+    total = per_worker * workers
+    return {
+        "pool_size": pool_size,
+        "req_per_s": round(total / elapsed[0], 1),
+        "avg_wait_ms": round(1000 * wait["sum"] / max(wait["count"], 1), 2),
+        "max_wait_ms": round(1000 * wait["max"], 2),
+        "peak_out": stats["peak_checked_out"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=640)
+    parser.add_argument("--hold", type=float, default=0.005,
+                        help="seconds each request holds its connection")
+    parser.add_argument("--sizes", default="1,2,5,10,20,40")
+    args = parser.parse_args()
+
+    url = bench_database_url()
+    rows = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        result = run(url, size, args.workers, args.requests, args.hold)
+        rows.append(list(result.values()))
+    print(f"{args.workers} workers, {args.requests} requests, {args.hold * 1000:.1f}ms hold")
+    print_table(["pool_size", "req/s", "avg_wait_ms", "max_wait_ms", "peak_out"], rows)
+
+
+if __name__ == "__main__":
+    main()
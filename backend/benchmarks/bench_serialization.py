@@ -0,0 +1,75 @@
+"""Serialization cost of weight-record lists: stdlib JSONResponse vs. orjson.
+
+Mirrors what FastAPI does for `response_model=List[WeightRecord]`: validate
+the rows into the response model, dump them to JSON-compatible Python data,
+then render the body with the response class. The render
+step is timed separately since it is the part the response class changes.
+"""
+import argparse
+import statistics
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import List
+
+from benchmarks.common import print_table
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app import schemas
+from app.responses import FastJSONResponse
+
+adapter = TypeAdapter(List[schemas.WeightRecord])
+
+
+def rows(count: int) -> list:
+    """ORM-like objects, as the CRUD layer returns them."""
+    start = date(1990, 1, 1)
+    return [
+        SimpleNamespace(id=i + 1, cat_id=1, date=start + timedelta(days=i),
+                        user_weight=round(70.0 + (i % 13) / 10, 1),
+                        combined_weight=round(74.5 + (i % 17) / 10, 1),
+                        cat_weight=round(4.5 + (i % 17) / 10 - (i % 13) / 10, 1))
+        for i in range(count)
+    ]
+
+
+def median_time(func, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", default="1000,10000",
+                        help="comma-separated list sizes")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    table = []
+    for count in (int(r) for r in args.records.split(",")):
+        data = rows(count)
+        encoded = adapter.dump_python(adapter.validate_python(data, from_attributes=True),
+                                      mode="json")
+        per_1k = 1000 / count
+        for name, response_class in (("json", JSONResponse), ("orjson", FastJSONResponse)):
+            def full():
+                models = adapter.validate_python(data, from_attributes=True)
+                response_class(adapter.dump_python(models, mode="json"))
+
+            render = median_time(lambda: response_class(encoded), args.repeats)
+            total = median_time(full, args.repeats)
+            table.append([count, name, len(response_class(encoded).body),
+                          round(render * 1e6 * per_1k, 1), round(total * 1e6 * per_1k, 1)])
+
+    print_table(["records", "response", "bytes", "render us/1k rows", "total us/1k rows"],
+                table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Write latency: add/commit/refresh (plus an ownership SELECT) vs. one RETURNING statement.
+
+Times the database work behind the cat create/update and weight record
+create endpoints. The "refresh" column reproduces the earlier crud code:
+the ownership lookup the endpoint ran first, the ORM flush, the commit and
+the SELECT that reloaded the row. The "returning" column is the current
+crud_async path, one INSERT/UPDATE ... RETURNING and the commit.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import bench_database_url, print_table
+from benchmarks.seed import seed
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import crud_async, models, schemas
+from app.config import Settings
+from app.pool import build_async_engine, build_engine
+
+
+def weight(n: int) -> schemas.WeightRecordCreate:
+    return schemas.WeightRecordCreate(date=date(1990, 1, 1) + timedelta(days=n % 9000),
+                                      user_weight=70.0, combined_weight=74.5)
+
+
+async def create_cat_refresh(db, user_id, cat_id, n):
+    db_cat = models.Cat(name=f"Cat {n}", target_weight=4.5, user_id=user_id)
+    db.add(db_cat)
+    await db.commit()
+    await db.refresh(db_cat)
+
+
+async def update_cat_refresh(db, user_id, cat_id, n):
+    db_cat = await crud_async.get_cat(db, cat_id, user_id)
+    db_cat.name = f"Cat {n}"
+    await db.commit()
+    await db.refresh(db_cat)
+
+
+async def create_weight_refresh(db, user_id, cat_id, n):
+    await crud_async.get_cat(db, cat_id, user_id)
+    record = weight(n)
+    db_record = models.WeightRecord(date=record.date, user_weight=record.user_weight,
+                                    combined_weight=record.combined_weight,
+                                    cat_weight=record.combined_weight - record.user_weight,
+                                    cat_id=cat_id)
+    db.add(db_record)
+    await db.commit()
+    await db.refresh(db_record)
+
+
+async def create_cat_returning(db, user_id, cat_id, n):
+    await crud_async.create_cat(db, schemas.CatCreate(name=f"Cat {n}", target_weight=4.5),
+                                user_id)
+
+
+async def update_cat_returning(db, user_id, cat_id, n):
+    await crud_async.update_cat(db, cat_id, schemas.CatCreate(name=f"Cat {n}", target_weight=4.5),
+                                user_id)
+
+
+async def create_weight_returning(db, user_id, cat_id, n):
+    await crud_async.create_weight_record(db, weight(n), cat_id, user_id=user_id)
+
+
+WRITES = {
+    "cat create": (create_cat_refresh, create_cat_returning, 2),
+    "cat update": (update_cat_refresh, update_cat_returning, 3),
+    "weight create": (create_weight_refresh, create_weight_returning, 3),
+}
+
+
+async def median_time(SessionLocal, write, user_id, cat_id, count: int) -> float:
+    samples = []
+    async with SessionLocal() as db:
+        for n in range(count):
+            start = time.perf_counter()
+            await write(db, user_id, cat_id, n)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def run(url: str, count: int) -> list:
+    config = Settings()
+    sync_engine = build_engine(url, config)
+    engine = build_async_engine(url, config)
+    SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    rows = []
+    try:
+        for name, (refresh, returning, statements) in WRITES.items():
+            user_id, cat_ids = seed(sync_engine, cats=1, records_per_cat=100)
+            before = await median_time(SessionLocal, refresh, user_id, cat_ids[0], count)
+            after = await median_time(SessionLocal, returning, user_id, cat_ids[0], count)
+            rows.append([name, statements, 1, round(before * 1e6), round(after * 1e6),
+                         f"{before / after:.1f}x"])
+    finally:
+        await engine.dispose()
+        sync_engine.dispose()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=500, help="writes per operation")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(bench_database_url(), args.count))
+    print_table(["write", "refresh statements", "returning statements", "refresh us",
+                 "returning us", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Shared helpers for the benchmark scripts."""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Sequence
+
+# Allow running as `python benchmarks/bench_x.py` as well as `python -m benchmarks.bench_x`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def bench_database_url() -> str:
+    """Database URL for benchmarks (BENCH_DATABASE_URL or a temporary SQLite file)."""
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if url:
+        return url
+    path = os.path.join(tempfile.gettempdir(), "cat_weight_tracker_bench.db")
+    return f"sqlite:///{path}"
+
+
+@contextmanager
+def timer() -> Iterator[List[float]]:
+    """Measure wall time of a block; the elapsed seconds are appended to the yielded list."""
+    result: List[float] = []
+    start = time.perf_counter()
+    yield result
+    result.append(time.perf_counter() - start)
+
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence[object]]) -> None:
+    """Print a simple fixed-width results table."""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
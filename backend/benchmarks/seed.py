@@ -0,0 +1,54 @@
+"""Seed a benchmark database with a user, cats and weight records."""
+from datetime import date, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import delete, insert
+from sqlalchemy.engine import Engine
+
+from app.models import Base, Cat, User, WeightRecord
+
+BENCH_USERNAME = "bench_user"
+
+
+def seed(engine: Engine, cats: int = 1, records_per_cat: int = 100) -> Tuple[int, List[int]]:
+    """Recreate the schema and insert a user with `cats` cats of `records_per_cat` records.
+
+    Returns:
+        The user id and the list of cat ids
+    """
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(delete(WeightRecord))
+        conn.execute(delete(Cat))
+        conn.execute(delete(User))
+        user_id = conn.execute(
+            insert(User).values(
+                username=BENCH_USERNAME,
+                email="bench@example.com",
+                hashed_password="not-a-real-hash",
+                is_active=True,
+            ).returning(User.id)
+        ).scalar_one()
+
+        cat_ids = []
+        start = date.today() - timedelta(days=records_per_cat)
+        for n in range(cats):
+            cat_id = conn.execute(
+                insert(Cat).values(name=f"Cat {n:04d}", target_weight=5.0, user_id=user_id)
+                .returning(Cat.id)
+            ).scalar_one()
+            cat_ids.append(cat_id)
+
+            rows = [
+                {
+                    "date": start + timedelta(days=i),
+                    "user_weight": 70.0,
+                    "combined_weight": 75.0 + (i % 10) / 10,
+                    "cat_weight": 5.0 + (i % 10) / 10,
+                    "cat_id": cat_id,
+                }
+                for i in range(records_per_cat)
+            ]
+            for offset in range(0, len(rows), 5000):
+                conn.execute(insert(WeightRecord), rows[offset:offset + 5000])
+    return user_id, cat_ids
@@ -4,11 +4,14 @@ import warnings
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
-from app.database import Base, get_db
+from app.cache import user_cache
+from app.database import Base, get_async_db, get_db
 from app.main import app
+from app.pool import to_async_url
 
 # Set test environment variables
 os.environ['REGISTRATION_ENABLED'] = 'true'
@@ -76,7 +79,17 @@ def client(db_session):
         finally:
             pass
 
+    async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+    AsyncTestingSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    user_cache.clear()
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
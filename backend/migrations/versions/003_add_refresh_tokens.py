@@ -0,0 +1,40 @@
+"""Add refresh_tokens table for rotating refresh tokens
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the refresh_tokens table and its lookup indexes."""
+    op.create_table('refresh_tokens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('token_hash', sa.String(64), nullable=False),
+        sa.Column('family_id', sa.String(32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('revoked_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('token_hash', name='refresh_tokens_token_hash_key')
+    )
+    op.create_index(op.f('ix_refresh_tokens_family_id'), 'refresh_tokens', ['family_id'])
+    op.create_index(op.f('ix_refresh_tokens_user_id'), 'refresh_tokens', ['user_id'])
+
+
+def downgrade():
+    """Drop the refresh_tokens table."""
+    op.drop_index(op.f('ix_refresh_tokens_user_id'), 'refresh_tokens')
+    op.drop_index(op.f('ix_refresh_tokens_family_id'), 'refresh_tokens')
+    op.drop_table('refresh_tokens')
@@ -1,17 +1,23 @@
+import logging
 import os
 import sys
-from datetime import timedelta
+from datetime import date, timedelta
+from typing import NamedTuple
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from app.auth import create_access_token, get_password_hash
-from app.database import Base, get_db
+from app.cache import user_cache
+from app.database import Base, get_async_db, get_async_sessionmaker, get_db
+from app.logging_config import ACCESS_LOGGER
 from app.main import app
-from app.models import User
+from app.models import Cat, User, WeightRecord
+from app.pool import to_async_url
 
 # Add the parent directory to sys.path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -97,7 +103,21 @@ def client(test_db, test_token):
         finally:
             pass
 
+    # Async handlers get their own connection to the same test database
+    async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+    AsyncTestingSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_sessionmaker] = lambda: AsyncTestingSessionLocal
+
+    # Each test recreates the database, so cached users from earlier tests are stale
+    user_cache.clear()
 
     with TestClient(app) as c:
         # Add authentication header to all requests
@@ -110,6 +130,68 @@ def client(test_db, test_token):
     app.dependency_overrides = {}
 
 
+class Cats(NamedTuple):
+    mine: int  # testuser's Whiskers
+    second: int  # testuser's Smokey
+    foreign: int  # demo's Felix
+
+
+@pytest.fixture
+def cats(test_db) -> Cats:
+    """IDs of two cats of the client's user (testuser) and one of another user."""
+    user = test_db.query(User).filter_by(username="testuser").first()
+    other = test_db.query(User).filter_by(username="demo").first()
+    created = [Cat(name="Whiskers", target_weight=4.5, user_id=user.id),
+               Cat(name="Smokey", target_weight=5.0, user_id=user.id),
+               Cat(name="Felix", target_weight=4.0, user_id=other.id)]
+    test_db.add_all(created)
+    test_db.commit()
+    return Cats(*(cat.id for cat in created))
+
+
+@pytest.fixture
+def make_cat(test_db):
+    """Factory for a cat with a weight history of (days_ago, cat_weight) pairs.
+
+    Records are inserted in the order given, each at a user weight of 70.0.
+    """
+    def make(name="Whiskers", history=(), username="testuser", target_weight=4.5):
+        user = test_db.query(User).filter_by(username=username).first()
+        cat = Cat(name=name, target_weight=target_weight, user_id=user.id)
+        test_db.add(cat)
+        test_db.flush()
+        test_db.add_all(
+            WeightRecord(date=date.today() - timedelta(days=days_ago), user_weight=70.0,
+                         combined_weight=70.0 + weight, cat_weight=weight, cat_id=cat.id)
+            for days_ago, weight in history
+        )
+        test_db.commit()
+        return cat
+
+    return make
+
+
+class ListHandler(logging.Handler):
+    """Keeps emitted records in memory."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def access_records():
+    """Access log records (structlog event dicts in record.msg) emitted during the test."""
+    handler = ListHandler()
+    logger = logging.getLogger(ACCESS_LOGGER)
+    logger.addHandler(handler)
+    yield handler.records
+    logger.removeHandler(handler)
+
+
 def create_test_user(db):
     """Create a test user for testing purposes."""
     test_user = User(
@@ -0,0 +1,69 @@
+import json
+import logging
+import queue
+
+from app import main
+from app.logging_config import NonBlockingQueueHandler, access_formatter
+from app.middleware import AccessLogMiddleware
+
+
+def access_middleware(monkeypatch, **kwargs):
+    """Swap in an access log middleware configured with kwargs."""
+    middleware = [m for m in main.app.user_middleware]
+    for index, entry in enumerate(middleware):
+        if entry.cls is AccessLogMiddleware:
+            middleware[index] = type(entry)(AccessLogMiddleware, **kwargs)
+    monkeypatch.setattr(main.app, "user_middleware", middleware)
+    monkeypatch.setattr(main.app, "middleware_stack", None)
+
+
+def test_one_json_line_per_request(client, access_records):
+    client.get("/cats/99999")
+
+    assert len(access_records) == 1
+    line = json.loads(access_formatter().format(access_records[0]))
+    assert line["event"] == "request"
+    assert line["method"] == "GET"
+    assert line["path"] == "/cats/99999"
+    assert line["route"] == "/cats/{cat_id}"
+    assert line["status"] == 404
+    assert line["level"] == "warning"
+    assert "timestamp" in line and line["duration_ms"] >= 0
+
+
+def test_successful_requests_are_sampled(client, access_records, monkeypatch):
+    access_middleware(monkeypatch, sample_rate=0.0, slow_threshold=60.0)
+
+    for _ in range(5):
+        assert client.get("/").status_code == 200
+    assert client.get("/cats/99999").status_code == 404
+
+    # Only the error is logged
+    assert [r.msg["status"] for r in access_records] == [404]
+
+
+def test_slow_requests_are_always_logged(client, access_records, monkeypatch):
+    access_middleware(monkeypatch, sample_rate=0.0, slow_threshold=0.0)
+
+    client.get("/")
+
+    assert len(access_records) == 1
+    assert access_records[0].msg["slow"] is True
+    assert access_records[0].msg["sample_rate"] == 1.0
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    logger = logging.getLogger("test.queue")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        logger.warning("first %s", "record")
+        logger.warning("second")
+    finally:
+        logger.removeHandler(handler)
+
+    assert handler.dropped == 1
+    # Formatting is deferred to the listener thread
+    record = handler.queue.get_nowait()
+    assert record.msg == "first %s" and record.args == ("record",)
@@ -0,0 +1,117 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Cat, WeightRecord
+
+
+def weight(days_ago=0, user_weight=70.0, combined_weight=74.5):
+    return {"date": (date.today() - timedelta(days=days_ago)).isoformat(),
+            "user_weight": user_weight, "combined_weight": combined_weight}
+
+
+def test_batch_runs_operations_in_order(client, test_db, cats):
+    cat_id, foreign_id = cats.mine, cats.foreign
+    response = client.post("/api/batch", json={"operations": [
+        {"op": "cat.create", "body": {"name": "Mittens", "target_weight": 5.0}},
+        {"op": "weight.create", "cat_id": cat_id, "body": weight(1)},
+        {"op": "weight.create", "cat_id": cat_id, "body": weight(0, combined_weight=60.0)},
+        {"op": "weight.create", "cat_id": foreign_id, "body": weight(0)},
+        {"op": "weight.list", "cat_id": cat_id},
+        {"op": "plot.read", "cat_id": cat_id},
+        {"op": "cat.read", "cat_id": 999},
+        {"op": "weight.delete", "record_id": 999},
+        {"op": "cat.list"},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["committed"] is True
+    statuses = [result["status"] for result in data["results"]]
+    assert statuses == [200, 200, 400, 404, 200, 200, 404, 404, 200]
+
+    created_cat, created_record = data["results"][0]["body"], data["results"][1]["body"]
+    assert created_cat["name"] == "Mittens" and created_cat["id"]
+    assert created_record["cat_weight"] == pytest.approx(4.5)
+    assert data["results"][2]["body"] == {
+        "detail": "Combined weight must be greater than user weight"}
+    assert data["results"][4]["body"] == [created_record]
+    assert data["results"][5]["body"]["weights"] == [pytest.approx(4.5)]
+    names = [cat["name"] for cat in data["results"][8]["body"]]
+    assert names == ["Mittens", "Smokey", "Whiskers"]
+
+    # Failed operations did not undo the successful ones
+    assert test_db.query(Cat).filter_by(name="Mittens").count() == 1
+    assert test_db.query(WeightRecord).filter_by(cat_id=cat_id).count() == 1
+    assert test_db.query(WeightRecord).filter_by(cat_id=foreign_id).count() == 0
+
+
+def test_atomic_batch_is_all_or_nothing(client, test_db, cats):
+    cat_id = cats.mine
+    operations = [
+        {"op": "cat.create", "body": {"name": "Mittens", "target_weight": 5.0}},
+        {"op": "weight.create", "cat_id": cat_id, "body": weight(1)},
+        {"op": "cat.delete", "cat_id": 999},
+        {"op": "weight.create", "cat_id": cat_id, "body": weight(0)},
+    ]
+    data = client.post("/batch", json={"operations": operations, "atomic": True}).json()
+    assert data["committed"] is False
+    assert [result["status"] for result in data["results"]] == [200, 200, 404, 424]
+    assert data["results"][3]["body"] == {"detail": "Not run: operation 2 failed"}
+    test_db.expire_all()
+    assert test_db.query(Cat).filter_by(name="Mittens").count() == 0
+    assert test_db.query(WeightRecord).count() == 0
+
+    del operations[2]
+    data = client.post("/batch", json={"operations": operations, "atomic": True}).json()
+    assert data["committed"] is True
+    assert [result["status"] for result in data["results"]] == [200, 200, 200]
+    assert test_db.query(Cat).filter_by(name="Mittens").count() == 1
+    assert test_db.query(WeightRecord).filter_by(cat_id=cat_id).count() == 2
+
+
+def test_atomic_batch_aborts_on_a_database_error(client, test_db, cats, monkeypatch):
+    cat_id = cats.mine
+    execute = AsyncSession.execute
+
+    async def failing_cat_list(self, statement, *args, **kwargs):
+        if "FROM cats" in str(statement) and "ORDER BY cats.name" in str(statement):
+            raise OperationalError(str(statement), {}, Exception("disk I/O error"))
+        return await execute(self, statement, *args, **kwargs)
+
+    # cat.list swallows the error (rollback, empty list); the batch must not commit
+    monkeypatch.setattr(AsyncSession, "execute", failing_cat_list)
+    data = client.post("/batch", json={"atomic": True, "operations": [
+        {"op": "cat.create", "body": {"name": "Mittens", "target_weight": 5.0}},
+        {"op": "cat.list"},
+        {"op": "weight.create", "cat_id": cat_id, "body": weight(0)},
+    ]}).json()
+    assert data["committed"] is False
+    assert [result["status"] for result in data["results"]] == [200, 500, 424]
+    assert data["results"][1]["body"] == {"detail": "Database error; batch rolled back"}
+    test_db.expire_all()
+    assert test_db.query(Cat).filter_by(name="Mittens").count() == 0
+    assert test_db.query(WeightRecord).count() == 0
+
+
+def test_batch_validation(client, cats, monkeypatch):
+    cat_id = cats.mine
+    data = client.post("/api/batch", json={"operations": [
+        {"op": "weight.list"},
+        {"op": "weight.create", "cat_id": cat_id, "body": {"date": "not-a-date"}},
+        {"op": "cat.create", "body": {"name": "x" * 51, "target_weight": 5.0}},
+    ]}).json()
+    assert [result["status"] for result in data["results"]] == [422, 422, 400]
+    assert data["results"][0]["body"] == {"detail": "cat_id is required for weight.list"}
+    assert {error["loc"][0] for error in data["results"][1]["body"]["detail"]} == {
+        "date", "user_weight", "combined_weight"}
+
+    # Unknown operations are rejected with the request
+    response = client.post("/api/batch", json={"operations": [{"op": "user.delete"}]})
+    assert response.status_code == 422
+
+    monkeypatch.setattr(settings, "BATCH_MAX_OPERATIONS", 2)
+    response = client.post("/api/batch", json={"operations": [{"op": "cat.list"}] * 3})
+    assert response.status_code == 400
@@ -1,5 +1,11 @@
 
-from app.models import Cat, User
+from datetime import date, timedelta
+
+from sqlalchemy.orm import selectinload
+
+from app import schemas
+from app.models import Cat, User, WeightRecord
+from app.query_stats import query_budget
 
 
 def test_create_cat(client, test_db):
@@ -89,7 +95,8 @@ def test_update_cat(client, test_db):
     assert data["name"] == "Mr. Whiskers"
     assert data["target_weight"] == 4.2
 
-    # Verify the cat was updated in the database
+    # Verify the cat was updated in the database (the API wrote through its own session)
+    test_db.expire_all()
     updated_cat = test_db.query(Cat).filter(Cat.id == cat.id).first()
     assert updated_cat.name == "Mr. Whiskers"
     assert updated_cat.target_weight == 4.2
@@ -112,3 +119,82 @@ def test_delete_cat(client, test_db):
     # Verify the cat was deleted from the database
     deleted_cat = test_db.query(Cat).filter(Cat.id == cat.id).first()
     assert deleted_cat is None
+
+
+def test_list_rows_match_schema_output(client, test_db):
+    # The row-based read path must produce exactly what response_model validation would
+    user = test_db.query(User).filter_by(username="testuser").first()
+    cat = Cat(name="Whiskers", target_weight=4.5, user_id=user.id)
+    test_db.add(cat)
+    test_db.commit()
+    # Out of date order, so neither insertion order nor its reverse passes
+    for days in (1, 2, 0):
+        test_db.add(WeightRecord(date=date.today() - timedelta(days=days), user_weight=70.0,
+                                 combined_weight=74.35 + days, cat_weight=4.35 + days,
+                                 cat_id=cat.id))
+    test_db.commit()
+    test_db.expire_all()
+    db_cat = test_db.query(Cat).options(selectinload(Cat.weight_records)).first()
+
+    expected_cat = schemas.Cat.model_validate(db_cat).model_dump(mode="json")
+    expected_detail = schemas.CatWithRecords.model_validate(db_cat).model_dump(mode="json")
+    expected_records = [schemas.WeightRecord.model_validate(r).model_dump(mode="json")
+                        for r in sorted(db_cat.weight_records, key=lambda r: (r.date, r.id))]
+
+    assert client.get("/cats/").json() == [expected_cat]
+    assert client.get("/api/auth/users/me/cats").json() == [expected_cat]
+    assert client.get(f"/api/cats/{cat.id}").json() == expected_detail
+    assert client.get(f"/api/cats/{cat.id}/weights/").json() == expected_records
+
+
+def test_cat_summary_is_bounded(client, test_db):
+    user = test_db.query(User).filter_by(username="testuser").first()
+    cat = Cat(name="Whiskers", target_weight=4.5, user_id=user.id)
+    empty = Cat(name="Mittens", target_weight=5.0, user_id=user.id)
+    small = Cat(name="Tom", target_weight=5.0, user_id=user.id)
+    test_db.add_all([cat, empty, small])
+    test_db.commit()
+    small_dates = [date.today() - timedelta(days=30 * i) for i in (2, 1, 0)]
+    test_db.add_all(
+        WeightRecord(date=day, user_weight=70.0, combined_weight=70.0 + weight,
+                     cat_weight=weight, cat_id=small.id)
+        for day, weight in zip(small_dates, [4.1, 4.2, 4.3])
+    )
+    start = date.today() - timedelta(days=999)
+    test_db.add_all(
+        WeightRecord(date=start + timedelta(days=i), user_weight=70.0,
+                     combined_weight=74.0 + (i % 2), cat_weight=4.0 + (i % 2), cat_id=cat.id)
+        for i in range(1000)
+    )
+    test_db.commit()
+    cat_id, empty_id, small_id = cat.id, empty.id, small.id
+
+    client.get("/auth/me")  # warm the user cache
+    # Cat with aggregates, latest records and series, whatever the history length
+    with query_budget(3):
+        response = client.get(f"/api/cats/{cat_id}",
+                              params={"view": "summary", "recent": 5, "points": 50})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["name"] == "Whiskers"
+    assert [r["date"] for r in data["recent_records"]] == [
+        (date.today() - timedelta(days=i)).isoformat() for i in range(5)]
+    assert data["stats"] == {
+        "count": 1000, "first_date": start.isoformat(), "last_date": date.today().isoformat(),
+        "min_weight": 4.0, "max_weight": 5.0, "mean_weight": 4.5}
+    # One record sampled on each of 50 evenly spaced dates
+    assert data["series"]["dates"] == [
+        (start + timedelta(days=round(k * 999 / 49))).isoformat() for k in range(50)]
+    assert set(data["series"]["weights"]) <= {4.0, 5.0}
+
+    capped = client.get(f"/cats/{cat_id}", params={"view": "summary", "points": 5000}).json()
+    assert len(capped["series"]["dates"]) == 200 and len(capped["recent_records"]) == 10
+    # No more records than points: the series is every record
+    small = client.get(f"/cats/{small_id}", params={"view": "summary", "points": 3}).json()
+    assert small["series"] == {"dates": [d.isoformat() for d in small_dates],
+                               "weights": [4.1, 4.2, 4.3]}
+
+    response = client.get(f"/cats/{empty_id}", params={"view": "summary"})
+    assert response.json()["stats"]["count"] == 0
+    assert response.json()["series"] == {"dates": [], "weights": []}
+    assert client.get("/cats/999", params={"view": "summary"}).status_code == 404
@@ -0,0 +1,74 @@
+import gzip
+import pytest
+
+from app.middleware import CompressionMiddleware, brotli, parse_accept_encoding
+
+
+@pytest.fixture
+def cat_with_history(make_cat):
+    # A year of daily records, oldest first
+    return make_cat(history=[(365 - i, 4.5 + i % 7 / 10) for i in range(365)])
+
+
+def test_accept_encoding_negotiation():
+    assert parse_accept_encoding("gzip;q=0.5, br , identity;q=0") == {
+        "gzip": 0.5, "br": 1.0, "identity": 0.0}
+
+    middleware = CompressionMiddleware(app=None)
+    assert middleware.negotiate(None) is None
+    assert middleware.negotiate("identity") is None
+    assert middleware.negotiate("gzip;q=0") is None
+    assert middleware.negotiate("deflate, gzip") == "gzip"
+    assert middleware.negotiate("*") == ("br" if brotli else "gzip")
+    assert middleware.negotiate("br;q=0.2, gzip;q=0.8") == "gzip"
+
+
+def test_large_plot_response_is_gzipped(client, cat_with_history):
+    response = client.get(f"/api/cats/{cat_with_history.id}/plot",
+                          headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()["dates"]) == 365
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli not installed")
+def test_brotli_preferred_when_accepted(client, cat_with_history):
+    response = client.get(f"/api/cats/{cat_with_history.id}",
+                          headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["content-encoding"] == "br"
+    assert len(response.json()["weight_records"]) == 365
+
+
+def test_small_and_unnegotiated_responses_are_not_compressed(client, cat_with_history):
+    small = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    plain = client.get(f"/api/cats/{cat_with_history.id}/plot",
+                       headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert len(plain.json()["weights"]) == 365
+
+
+def test_gzip_body_round_trips(client, cat_with_history):
+    # Stream the raw (still encoded) body to check the bytes on the wire
+    with client.stream("GET", f"/cats/{cat_with_history.id}/plot",
+                       headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw).startswith(b'{"cat_id"')
+
+
+@pytest.mark.parametrize("coding", ["gzip", "br"])
+def test_streamed_export_is_compressed_chunk_by_chunk(client, cat_with_history, coding):
+    if coding == "br" and brotli is None:
+        pytest.skip("brotli not installed")
+    with client.stream("GET", "/weights/export?format=ndjson",
+                       headers={"Accept-Encoding": coding}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == coding
+    assert "content-length" not in response.headers
+    body = gzip.decompress(raw) if coding == "gzip" else brotli.decompress(raw)
+    assert len(body.splitlines()) == 365
@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app import crud_async
+from app.models import User
+from app.query_stats import query_budget
+
+
+def test_dashboard_in_one_statement(client, test_db, make_cat):
+    user = test_db.query(User).filter_by(username="testuser").first()
+    tom = make_cat("Tom", [(60, 5.6), (35, 5.5), (10, 5.3), (1, 5.2)], target_weight=5.0)
+    amber = make_cat("Amber", [(5, 4.4)], target_weight=4.0)
+    kitten = make_cat("Bo", target_weight=3.0)
+    make_cat("Felix", [(1, 4.0)], username="demo", target_weight=4.0)
+
+    client.get("/auth/me")  # warm the user cache
+    with query_budget(1):
+        response = client.get("/api/auth/users/me/dashboard")
+    assert response.status_code == 200
+    assert response.json() == [
+        # No weigh-in older than 30 days: no change_30d
+        {"name": "Amber", "target_weight": 4.0, "id": amber.id, "user_id": user.id,
+         "last_date": (date.today() - timedelta(days=5)).isoformat(), "latest_weight": 4.4,
+         "target_delta": 0.4, "change_30d": None},
+        {"name": "Bo", "target_weight": 3.0, "id": kitten.id, "user_id": user.id,
+         "last_date": None, "latest_weight": None, "target_delta": None, "change_30d": None},
+        # Baseline is the newest record at least 30 days old (35 days ago)
+        {"name": "Tom", "target_weight": 5.0, "id": tom.id, "user_id": user.id,
+         "last_date": (date.today() - timedelta(days=1)).isoformat(), "latest_weight": 5.2,
+         "target_delta": 0.2, "change_30d": -0.3},
+    ]
+    assert client.get("/auth/users/me/dashboard").json() == response.json()
+
+
+def test_dashboard_seeks_each_cats_records(test_db):
+    if test_db.bind.dialect.name != "sqlite":
+        pytest.skip("EXPLAIN QUERY PLAN output is SQLite specific")
+    query = crud_async._dashboard_query(1, date(2024, 1, 1))
+    compiled = query.compile(test_db.bind, compile_kwargs={"literal_binds": True})
+    plan = " ".join(row[3] for row in test_db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+    assert "idx_cat_user_name (user_id=?)" in plan
+    assert "idx_weight_cat_date (cat_id=?)" in plan
+    assert "idx_weight_cat_date (cat_id=? AND date<?)" in plan
+    assert "SCAN" not in plan and "TEMP B-TREE" not in plan
@@ -0,0 +1,80 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app import crud_async, exports, plots
+
+
+@pytest.fixture
+def cat_with_history(make_cat):
+    # One record a day for the last 30 days
+    return make_cat(history=[(i, 4.5 + i / 10) for i in range(30)])
+
+
+def explain(test_db, query) -> str:
+    compiled = query.compile(test_db.bind, compile_kwargs={"literal_binds": True})
+    return " ".join(row[3] for row in test_db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+
+def test_weight_records_and_plot_filter_by_date(client, cat_with_history):
+    start = date.today() - timedelta(days=9)
+    end = date.today() - timedelta(days=5)
+    params = {"from": start.isoformat(), "to": end.isoformat()}
+    expected = [(start + timedelta(days=i)).isoformat() for i in range(5)]
+
+    records = client.get(f"/api/cats/{cat_with_history.id}/weights/", params=params).json()
+    assert [r["date"] for r in records] == expected
+
+    columns = client.get(f"/cats/{cat_with_history.id}/weights/",
+                         params={**params, "format": "columnar"}).json()
+    assert columns["date"] == expected
+
+    plot = client.get(f"/api/cats/{cat_with_history.id}/plot", params=params).json()
+    assert plot["dates"] == expected
+    assert len(plot["weights"]) == 5
+
+    # Open-ended ranges
+    recent = client.get(f"/cats/{cat_with_history.id}/plot",
+                        params={"from": end.isoformat()}).json()
+    assert len(recent["dates"]) == 6
+    older = client.get(f"/cats/{cat_with_history.id}/plot",
+                       params={"to": start.isoformat()}).json()
+    assert len(older["dates"]) == 21
+
+
+def test_export_filters_by_date(client, cat_with_history):
+    since = date.today() - timedelta(days=2)
+    response = client.get("/api/weights/export",
+                          params={"format": "ndjson", "from": since.isoformat()})
+    assert response.status_code == 200
+    dates = [json.loads(line)["date"] for line in response.text.splitlines()]
+    assert dates == [(since + timedelta(days=i)).isoformat() for i in range(3)]
+
+
+def test_inverted_date_range_is_rejected(client, cat_with_history):
+    today = date.today()
+    params = {"from": today.isoformat(), "to": (today - timedelta(days=1)).isoformat()}
+    for url in (f"/cats/{cat_with_history.id}/weights/", f"/api/cats/{cat_with_history.id}/plot",
+                "/weights/export"):
+        response = client.get(url, params=params)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "'from' must not be after 'to'"
+
+
+def test_date_ranges_are_index_range_scans(test_db):
+    if test_db.bind.dialect.name != "sqlite":
+        pytest.skip("EXPLAIN QUERY PLAN output is SQLite specific")
+    start, end = date(2024, 1, 1), date(2024, 3, 31)
+
+    plan = explain(test_db, plots.weight_history_query(1, start, end))
+    assert "idx_weight_cat_date (cat_id=? AND date>? AND date<?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+    plan = explain(test_db, crud_async._weight_records_query(
+        1, 0, 100, date_from=start, date_to=end))
+    assert "idx_weight_cat_date (cat_id=? AND date>? AND date<?)" in plan
+
+    plan = explain(test_db, exports.history_query(1, start, end))
+    assert "idx_weight_cat_date (cat_id=? AND date>? AND date<?)" in plan
@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+from app import exports
+from app.models import WeightRecord
+
+
+def daily(days):
+    """One weigh-in a day for the last ``days`` days, newest first."""
+    return [(i, 4.5 + i / 10) for i in range(days)]
+
+
+def test_csv_export_streams_all_records_in_batches(client, make_cat, monkeypatch):
+    monkeypatch.setattr(exports, "STREAM_BATCH_SIZE", 7)
+    whiskers = make_cat("Whiskers", daily(20)).id
+    mittens = make_cat("Mittens", daily(5)).id
+    make_cat("Felix", daily(3), username="demo")
+
+    with client.stream("GET", "/api/weights/export") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "text/csv; charset=utf-8"
+        assert 'filename="weights.csv"' in response.headers["content-disposition"]
+        body = b"".join(response.iter_bytes()).decode()
+
+    rows = list(csv.DictReader(io.StringIO(body)))
+    assert len(rows) == 25
+    assert [r["cat_id"] for r in rows] == [str(whiskers)] * 20 + [str(mittens)] * 5
+    assert rows[0]["cat_name"] == "Whiskers"
+    # Oldest first within each cat
+    assert rows[0]["date"] == str(date.today() - timedelta(days=19))
+    assert rows[-1]["date"] == str(date.today())
+
+
+def test_ndjson_export_and_csv_round_trip_through_import(client, test_db, make_cat):
+    cat_id = make_cat("Whiskers", daily(3)).id
+
+    response = client.get("/weights/export?format=ndjson")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["combined_weight"] for r in records] == [74.7, 74.6, 74.5]
+    assert set(records[0]) == {"cat_id", "cat_name", "id", "date", "user_weight",
+                               "combined_weight", "cat_weight"}
+
+    exported = client.get("/weights/export").content
+    test_db.query(WeightRecord).delete()
+    test_db.commit()
+    imported = client.post("/weights/import", content=exported,
+                           headers={"Content-Type": "text/csv"})
+    assert imported.json()["imported"] == 3
+    assert test_db.query(WeightRecord).filter_by(cat_id=cat_id).count() == 3
+
+
+def test_empty_csv_export_has_header(client):
+    assert client.get("/weights/export").text == ",".join(
+        column.key for column in exports.EXPORT_COLUMNS) + "\n"
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.hashing import PasswordHasher, PasswordHashingBusy, password_hasher
+
+
+class BlockingContext:
+    """Stands in for CryptContext; each call waits until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def hash(self, password):
+        self.release.wait(5)
+        return f"hashed-{password}"
+
+    def verify(self, plain_password, hashed_password):
+        self.release.wait(5)
+        return hashed_password == f"hashed-{plain_password}"
+
+
+def test_hasher_rejects_when_queue_is_full():
+    context = BlockingContext()
+    hasher = PasswordHasher(context, workers=1, queue_limit=1)
+
+    async def scenario():
+        running = asyncio.ensure_future(hasher.hash_async("a"))
+        queued = asyncio.ensure_future(hasher.verify_async("b", "hashed-b"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(PasswordHashingBusy):
+            await hasher.hash_async("c")
+        assert hasher.stats()["queued"] == 1
+        context.release.set()
+        return await running, await queued
+
+    assert asyncio.run(scenario()) == ("hashed-a", True)
+    stats = hasher.stats()
+    assert stats["pending"] == 0
+    assert stats["rejected"] == 1
+    assert stats["hash_latency"]["count"] == 1
+    assert stats["verify_latency"]["count"] == 1
+    assert stats["queue_wait"]["count"] == 2
+
+
+def test_hasher_sync_api_round_trip():
+    from app.hashing import pwd_context
+
+    hasher = PasswordHasher(pwd_context, workers=1, queue_limit=0)
+    hashed = hasher.hash("Secret123")
+    assert hasher.verify("Secret123", hashed) is True
+    assert hasher.verify("wrong", hashed) is False
+
+
+def test_login_returns_503_when_password_pool_is_full(client, test_db, monkeypatch):
+    monkeypatch.setattr(password_hasher, "_pending",
+                        password_hasher.workers + password_hasher.queue_limit)
+
+    response = client.post("/auth/login",
+                           data={"username": "testuser", "password": "testpassword"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_login_succeeds_through_password_pool(client, test_db):
+    before = password_hasher.stats()["verify_latency"]["count"]
+
+    response = client.post("/auth/login",
+                           data={"username": "testuser", "password": "testpassword"})
+
+    assert response.status_code == 200
+    assert password_hasher.stats()["verify_latency"]["count"] == before + 1
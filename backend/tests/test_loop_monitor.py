@@ -0,0 +1,49 @@
+import asyncio
+import inspect
+import time
+
+from app import auth, database
+from app.loop_monitor import LoopLagMonitor, route_label
+
+
+def test_monitor_reports_blocking_call_with_route():
+    monitor = LoopLagMonitor(interval=0.02, threshold=0.05)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)  # let the heartbeat settle
+        token = monitor.track({"method": "GET", "path": "/api/cats/1"})
+        time.sleep(0.2)  # a synchronous call blocking the loop
+        monitor.untrack(token)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+
+    stats = monitor.snapshot()
+    assert stats["stalls"] >= 1
+    assert stats["lag_max_ms"] >= 100
+    assert "GET /api/cats/1" in stats["recent_stalls"][0]["routes"]
+
+
+def test_monitor_ignores_lag_below_threshold():
+    monitor = LoopLagMonitor(interval=0.01, threshold=1.0)
+    monitor.record_lag(0.005)
+    stats = monitor.snapshot()
+    assert stats["samples"] == 1
+    assert stats["stalls"] == 0
+
+
+def test_route_label_prefers_route_template():
+    class Route:
+        path = "/api/cats/{cat_id}"
+
+    scope = {"method": "GET", "path": "/api/cats/42", "route": Route()}
+    assert route_label(scope) == "GET /api/cats/{cat_id}"
+    assert route_label({"method": "GET", "path": "/api/cats/42"}) == "GET /api/cats/42"
+
+
+def test_auth_dependency_uses_async_session():
+    db_param = inspect.signature(auth.get_current_user).parameters["db"]
+    assert db_param.default.dependency is database.get_async_db
+    assert inspect.iscoroutinefunction(auth.get_user_async)
@@ -0,0 +1,74 @@
+import re
+
+from app.config import settings
+from app.metrics import Counter, HistogramFamily, MetricFamily, MetricsRegistry, http_requests
+
+
+def sample(text, name, **labels):
+    """Value of the sample with exactly these labels, or None."""
+    rendered = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    selector = f"{name}{{{rendered}}}" if labels else name
+    match = re.search(rf"^{re.escape(selector)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("jobs_total", "Jobs run.", ("queue",)))
+    latency = registry.register(HistogramFamily("job_seconds", "Job time.", ("queue",),
+                                                buckets=(0.1, 1.0)))
+    registry.register_collector(lambda: [MetricFamily("up", "gauge", "Up.").add(1)])
+
+    counter.inc("a\"b")
+    counter.inc("a\"b", amount=2)
+    latency.labels("default").observe(0.5)
+
+    text = registry.render()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{queue="a\\"b"} 3' in text
+    assert sample(text, "job_seconds_bucket", queue="default", le="0.1") == 0
+    assert sample(text, "job_seconds_bucket", queue="default", le="1.0") == 1
+    assert sample(text, "job_seconds_bucket", queue="default", le="+Inf") == 1
+    assert sample(text, "job_seconds_count", queue="default") == 1
+    assert sample(text, "up") == 1
+
+
+def test_requests_labelled_by_route_template(client, monkeypatch):
+    before = http_requests.value("GET", "/api/cats/{cat_id}", "404")
+
+    for cat_id in (101, 102, 103):
+        assert client.get(f"/api/cats/{cat_id}").status_code == 404
+    client.get("/no/such/path")
+
+    assert http_requests.value("GET", "/api/cats/{cat_id}", "404") == before + 3
+
+    monkeypatch.setattr(settings, "INTERNAL_ENDPOINTS_ENABLED", True)
+    text = client.get("/metrics").text
+    assert sample(text, "http_requests_total",
+                  method="GET", route="/api/cats/{cat_id}", status="404") >= 3
+    assert sample(text, "http_requests_total",
+                  method="GET", route="unmatched", status="404") >= 1
+    assert sample(text, "http_request_duration_seconds_count",
+                  method="GET", route="/api/cats/{cat_id}") >= 3
+    # Raw paths never become labels
+    assert "/api/cats/101" not in text
+
+
+def test_metrics_include_runtime_gauges(client, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_ENDPOINTS_ENABLED", True)
+    client.post("/auth/login", data={"username": "testuser", "password": "testpassword"})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert sample(text, "http_requests_in_flight") == 1  # the scrape itself
+    assert sample(text, "threadpool_threads_limit") > 0
+    assert sample(text, "db_pool_checkouts_total", pool="sync") is not None
+    assert sample(text, "password_hash_duration_seconds_count", operation="verify") >= 1
+
+
+def test_metrics_endpoint_hidden_by_default(client, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_ENDPOINTS_ENABLED", False)
+    assert client.get("/metrics").status_code == 404
@@ -0,0 +1,40 @@
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app import main
+from app.middleware import SECURITY_HEADERS
+
+
+def test_middleware_stack_is_pure_asgi():
+    classes = [m.cls for m in main.app.user_middleware]
+    assert BaseHTTPMiddleware not in classes
+    # Security headers are outermost so they also cover rejections
+    assert classes[0].__name__ == "SecurityHeadersMiddleware"
+    assert classes[-1] is CORSMiddleware
+
+
+def test_security_headers_on_success_and_error(client):
+    for path in ("/", "/cats/99999"):
+        response = client.get(path)
+        for name, value in SECURITY_HEADERS:
+            assert response.headers[name.decode()] == value.decode()
+
+
+def test_declared_oversized_body_rejected(client, monkeypatch):
+    response = client.post("/cats/", content=b"{}",
+                           headers={"Content-Length": str(main.MAX_REQUEST_SIZE + 1),
+                                    "Content-Type": "application/json"})
+    assert response.status_code == 413
+    assert response.headers["x-frame-options"] == "DENY"
+
+
+def test_streamed_oversized_body_rejected(client):
+    def chunks():
+        chunk = b" " * (1024 * 1024)
+        for _ in range(main.MAX_REQUEST_SIZE // len(chunk) + 1):
+            yield chunk
+
+    # A generator body is sent chunked, without a Content-Length
+    response = client.post("/cats/", content=chunks(),
+                           headers={"Content-Type": "application/json"})
+    assert response.status_code == 413
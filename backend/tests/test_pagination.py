@@ -0,0 +1,74 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app import crud_async
+from app.models import Cat, User
+from app.pagination import CURSOR_HEADER, encode_cursor
+
+
+@pytest.fixture
+def cat_with_records(make_cat):
+    # Inserted newest first, with several records sharing a date
+    return make_cat(history=[(i // 3, 4.5) for i in range(25)])
+
+
+def collect(client, url, limit):
+    items, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit, "cursor": cursor} if cursor else {"limit": limit}
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        items += response.json()
+        pages += 1
+        cursor = response.headers.get(CURSOR_HEADER)
+        if cursor is None:
+            return items, pages
+
+
+def test_weight_records_keyset_pages_in_date_id_order(client, test_db, cat_with_records):
+    url = f"/api/cats/{cat_with_records.id}/weights/"
+    items, pages = collect(client, url, limit=10)
+
+    keys = [(r["date"], r["id"]) for r in items]
+    assert len(keys) == 25 and pages == 3
+    assert keys == sorted(keys)
+    # skip/limit still works and follows the same order
+    assert client.get(url, params={"skip": 10, "limit": 10}).json() == items[10:20]
+
+    columnar = client.get(url, params={"limit": 10, "format": "columnar"})
+    rows = client.get(url, params={"limit": 10})
+    assert columnar.headers[CURSOR_HEADER] == rows.headers[CURSOR_HEADER]
+
+
+def test_cats_keyset_pages_in_name_id_order(client, test_db):
+    user = test_db.query(User).filter_by(username="testuser").first()
+    test_db.add_all(Cat(name=name, target_weight=4.5, user_id=user.id)
+                    for name in ["Tom", "Amber", "Tom", "Milo", "Amber", "Zed", "Bo"])
+    test_db.commit()
+
+    items, pages = collect(client, "/api/cats/", limit=2)
+
+    assert [c["name"] for c in items] == ["Amber", "Amber", "Bo", "Milo", "Tom", "Tom", "Zed"]
+    assert [c["id"] for c in items if c["name"] == "Tom"] == sorted(
+        c["id"] for c in items if c["name"] == "Tom")
+    assert pages == 4
+
+
+def test_invalid_cursors_are_rejected(client, cat_with_records):
+    url = f"/cats/{cat_with_records.id}/weights/"
+    assert client.get(url, params={"cursor": "not-a-cursor"}).status_code == 400
+    # A cat cursor is not accepted for weight records
+    assert client.get(url, params={"cursor": encode_cursor("cat", "Tom", 1)}).status_code == 400
+    assert client.get("/cats/", params={"cursor": encode_cursor("cat", 1, 1)}).status_code == 400
+
+
+def test_keyset_queries_use_indexes_without_sorting(test_db):
+    if test_db.bind.dialect.name != "sqlite":
+        pytest.skip("EXPLAIN QUERY PLAN output is SQLite specific")
+    query = crud_async._weight_records_query(1, 0, 10, after=(date(2024, 1, 1), 5))
+    compiled = query.compile(test_db.bind, compile_kwargs={"literal_binds": True})
+    plan = " ".join(row[3] for row in test_db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+    assert "idx_weight_cat_date (cat_id=? AND date>?)" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.config import settings
+from app.pool import MonitoredQueuePool, PoolMonitor, build_engine
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    """A tiny instrumented pool (1 connection, no overflow) over a SQLite file."""
+    monitor = PoolMonitor()
+    engine = build_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        settings,
+        monitor=monitor,
+        poolclass=MonitoredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    yield engine, monitor
+    engine.dispose()
+
+
+def test_pool_monitor_counts_checkouts(pooled_engine):
+    engine, monitor = pooled_engine
+
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    stats = monitor.snapshot()
+    assert stats["checkouts"] == 3
+    assert stats["checkins"] == 3
+    assert stats["connects"] == 1
+    assert stats["checked_out"] == 0
+    assert stats["peak_checked_out"] == 1
+    assert stats["pool_size"] == 1
+    assert stats["wait_time"]["count"] == 3
+    assert stats["wait_time"]["buckets"][-1] == {"le": "+Inf", "count": 3}
+
+
+def test_pool_monitor_records_timeouts(pooled_engine):
+    engine, monitor = pooled_engine
+
+    with engine.connect():
+        assert monitor.snapshot()["checked_out"] == 1
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    stats = monitor.snapshot()
+    assert stats["timeouts"] == 1
+    assert stats["wait_time"]["max"] >= 0.05
+
+
+def test_pool_monitor_survives_dispose(pooled_engine):
+    engine, monitor = pooled_engine
+
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert engine.pool.monitor is monitor
+    assert monitor.snapshot()["checkouts"] == 1
+
+
+def test_pool_endpoint_hidden_by_default(client, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_ENDPOINTS_ENABLED", False)
+    response = client.get("/internal/pool")
+    assert response.status_code == 404
+
+
+def test_pool_endpoint_reports_stats(client, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_ENDPOINTS_ENABLED", True)
+    response = client.get("/internal/pool")
+    assert response.status_code == 200
+    data = response.json()
+    for engine_stats in (data["sync"], data["async"]):
+        assert "checkouts" in engine_stats
+        assert "wait_time" in engine_stats
+        assert "pool_size" in engine_stats
+
+
+def test_monitor_counts_checkouts_on_null_pool(tmp_path):
+    from sqlalchemy.pool import NullPool
+
+    monitor = PoolMonitor()
+    engine = build_engine(f"sqlite:///{tmp_path / 'null.db'}", settings,
+                          monitor=monitor, poolclass=NullPool)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    engine.dispose()
+
+    stats = monitor.snapshot()
+    assert stats["checkouts"] == 1
+    assert "pool_size" not in stats
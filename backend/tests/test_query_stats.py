@@ -0,0 +1,78 @@
+import logging
+from datetime import date, timedelta
+
+import pytest
+
+from app.config import settings
+from app.metrics import db_queries_per_request
+from app.models import Cat, User, WeightRecord
+from app.query_stats import QueryBudgetExceeded, fingerprint, query_budget
+
+
+@pytest.fixture
+def cat_with_records(test_db):
+    user = test_db.query(User).filter_by(username="testuser").first()
+    cat = Cat(name="Whiskers", target_weight=4.5, user_id=user.id)
+    test_db.add(cat)
+    test_db.commit()
+    test_db.add_all(
+        WeightRecord(date=date.today() - timedelta(days=i), user_weight=70.0,
+                     combined_weight=74.5, cat_weight=4.5, cat_id=cat.id)
+        for i in range(30)
+    )
+    test_db.commit()
+    return cat
+
+
+def test_fingerprint_normalises_literals_and_placeholders():
+    digest, text = fingerprint(
+        "SELECT *  FROM cats\n WHERE id IN (1, 2, 3) AND name = 'Tom' AND user_id = $1")
+    assert text == "SELECT * FROM cats WHERE id IN (?+) AND name = ? AND user_id = ?"
+    assert digest == fingerprint(
+        "SELECT * FROM cats WHERE id IN (?, ?) AND name = :name AND user_id = %(user_id)s")[0]
+
+
+def test_cat_detail_query_count_does_not_grow_with_records(client, cat_with_records):
+    cat_id = cat_with_records.id
+    client.get("/auth/me")  # warm the user cache
+
+    # Cat plus one selectin load for all records, not one query per record
+    with query_budget(2):
+        response = client.get(f"/api/cats/{cat_id}")
+    assert len(response.json()["weight_records"]) == 30
+
+
+def test_query_budget_reports_statements(client, cat_with_records):
+    cat_id = cat_with_records.id
+    with pytest.raises(QueryBudgetExceeded) as exc_info:
+        with query_budget(0):
+            client.get(f"/api/cats/{cat_id}/plot")
+    assert "budget is 0" in str(exc_info.value)
+    assert "SELECT weight_records." in str(exc_info.value)
+
+
+def test_request_query_stats_in_access_log_and_metrics(client, cat_with_records, access_records):
+    before = db_queries_per_request.labels("GET", "/api/cats/{cat_id}/plot").snapshot()["count"]
+
+    client.get(f"/api/cats/{cat_with_records.id}/plot")
+    # Sync handler: statements run on the threadpool are attributed too
+    client.put("/auth/me", json={"email": "changed@example.com"})
+
+    plot, profile = [r.msg for r in access_records]
+    assert plot["db_queries"] >= 2 and plot["db_time_ms"] >= 0
+    assert profile["db_queries"] >= 1
+    after = db_queries_per_request.labels("GET", "/api/cats/{cat_id}/plot").snapshot()["count"]
+    assert after == before + 1
+
+
+def test_slow_queries_logged_with_fingerprint(client, cat_with_records, caplog, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD", 1e-9)
+
+    with caplog.at_level(logging.WARNING, logger="app.query_stats"):
+        client.get(f"/api/cats/{cat_with_records.id}/weights/")
+
+    messages = [r.getMessage() for r in caplog.records if r.name == "app.query_stats"]
+    assert any("route=/api/cats/{cat_id}/weights/" in m and "FROM weight_records" in m
+               for m in messages)
+    # Bound values are never logged
+    assert not any(str(cat_with_records.id) + "," in m for m in messages)
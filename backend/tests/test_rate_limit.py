@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from app import rate_limit
+from app.rate_limit import (MemoryRateLimitBackend, RateLimiter,
+                            SQLiteRateLimitBackend, parse_route_limits)
+
+
+def test_sliding_window_blocks_and_recovers():
+    backend = MemoryRateLimitBackend()
+    for second in range(3):
+        assert backend.hit("ip:1", limit=3, window=60, now=1000 + second).allowed
+
+    rejected = backend.hit("ip:1", limit=3, window=60, now=1010)
+    assert not rejected.allowed
+    assert 0 < rejected.retry_after <= 60
+
+    # Well into the next window the previous window's weight has decayed
+    assert backend.hit("ip:1", limit=3, window=60, now=1080 + 50).allowed
+
+
+def test_sliding_window_weights_previous_window():
+    backend = MemoryRateLimitBackend()
+    for _ in range(10):
+        backend.hit("k", limit=10, window=60, now=60 * 10 + 59)
+
+    # 6s into the next window 90% of the previous window still counts: 9 + 1 fits
+    assert backend.hit("k", limit=10, window=60, now=60 * 11 + 6).allowed
+    assert not backend.hit("k", limit=10, window=60, now=60 * 11 + 6).allowed
+    # Halfway through only 5 of the previous requests count
+    assert backend.hit("k", limit=10, window=60, now=60 * 11 + 30).allowed
+
+
+def test_memory_backend_is_bounded_and_evicts_idle_keys():
+    backend = MemoryRateLimitBackend(max_keys=3)
+    for n in range(5):
+        backend.hit(f"ip:{n}", limit=10, window=60, now=1000)
+    assert backend.stats()["keys"] == 3
+    assert backend.stats()["evictions"] == 2
+
+    # Two full windows later the old keys carry no weight and are dropped
+    backend.hit("ip:new", limit=10, window=60, now=1000 + 180)
+    stats = backend.stats()
+    assert stats["keys"] == 1
+    assert stats["expirations"] == 3
+
+
+def test_sqlite_backend_shares_counts_between_instances(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    worker_a = SQLiteRateLimitBackend(path)
+    worker_b = SQLiteRateLimitBackend(path)
+
+    assert worker_a.hit("ip:1", limit=2, window=60, now=1000).allowed
+    assert worker_b.hit("ip:1", limit=2, window=60, now=1001).allowed
+    assert not worker_a.hit("ip:1", limit=2, window=60, now=1002).allowed
+    assert worker_b.stats()["keys"] == 1
+
+
+def test_rejected_request_consumes_no_limit(tmp_path):
+    for backend in (MemoryRateLimitBackend(), SQLiteRateLimitBackend(str(tmp_path / "rl.db"))):
+        hits = [("ip:1", 3), ("route:1", 1)]
+        assert all(r.allowed for r in backend.hit_many(hits, window=60, now=1000))
+        assert [r.allowed for r in backend.hit_many(hits, window=60, now=1001)] == [True, False]
+        # The rejected request did not count against the per-IP limit
+        assert backend.hit("ip:1", limit=3, window=60, now=1002).allowed
+        assert backend.hit("ip:1", limit=3, window=60, now=1003).allowed
+        assert not backend.hit("ip:1", limit=3, window=60, now=1004).allowed
+
+
+def test_route_rules_match_root_and_api_paths():
+    rules = parse_route_limits("POST /auth/login=5, GET /api/cats/{cat_id}=2, bogus")
+    assert [(r.method, r.template, r.limit) for r in rules] == [
+        ("POST", "/auth/login", 5), ("GET", "/cats/{cat_id}", 2)]
+    assert rules[1].pattern.match("/cats/7")
+    assert rules[1].pattern.match("/api/cats/7")
+    assert not rules[1].pattern.match("/api/cats/7/weights")
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    def install(**kwargs):
+        limiter = RateLimiter(MemoryRateLimitBackend(), **kwargs)
+        monkeypatch.setattr(rate_limit, "rate_limiter", limiter)
+        return limiter
+    return install
+
+
+def test_per_route_limit_returns_429_with_retry_after(client, limiter):
+    limiter(routes=parse_route_limits("GET /cats/=2"))
+
+    assert client.get("/cats/").status_code == 200
+    assert client.get("/api/cats/").status_code == 200  # shares the /cats/ bucket
+    response = client.get("/cats/")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    # Other routes are unaffected
+    assert client.get("/").status_code == 200
+
+
+def test_per_user_limit_keys_on_token_subject(client, limiter):
+    active = limiter(per_user=2)
+
+    assert client.get("/auth/me").status_code == 200
+    assert client.get("/auth/me").status_code == 200
+    assert client.get("/auth/me").status_code == 429
+    assert active.stats()["rejected"] == {"user": 1}
+
+    # Anonymous requests are not counted against the user limit
+    assert client.get("/", headers={"Authorization": ""}).status_code == 200
+
+
+def test_blocking_backend_runs_off_the_event_loop(client, monkeypatch, tmp_path):
+    on_loop = []
+
+    class RecordingBackend(SQLiteRateLimitBackend):
+        def hit_many(self, hits, window, now=None):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return super().hit_many(hits, window, now)
+
+    limiter = RateLimiter(RecordingBackend(str(tmp_path / "rl.db")), per_ip=1)
+    monkeypatch.setattr(rate_limit, "rate_limiter", limiter)
+
+    assert client.get("/").status_code == 200
+    assert client.get("/").status_code == 429
+    assert on_loop == [False, False]
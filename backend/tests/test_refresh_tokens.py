@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+from app import crud
+from app.auth import hash_refresh_token
+from app.models import RefreshToken, User
+
+
+def login(client, password="testpassword"):
+    response = client.post("/auth/login", data={"username": "testuser", "password": password})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_login_returns_refresh_token(client, test_db):
+    tokens = login(client)
+
+    assert tokens["refresh_token"]
+    assert tokens["expires_in"] == 30 * 60
+    stored = test_db.query(RefreshToken).one()
+    # Only the digest is stored
+    assert stored.token_hash == hash_refresh_token(tokens["refresh_token"])
+    assert stored.revoked_at is None
+
+
+def test_refresh_rotates_token(client, test_db):
+    tokens = login(client)
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed["access_token"]
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+
+    me = client.get("/auth/me",
+                    headers={"Authorization": f"Bearer {refreshed['access_token']}"})
+    assert me.status_code == 200
+    assert me.json()["username"] == "testuser"
+
+
+def test_refresh_does_not_verify_password(client, test_db):
+    from app.hashing import password_hasher
+
+    tokens = login(client)
+    verifies = password_hasher.stats()["verify_latency"]["count"]
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+    assert response.status_code == 200
+    assert password_hasher.stats()["verify_latency"]["count"] == verifies
+
+
+def test_reused_refresh_token_revokes_family(client, test_db):
+    tokens = login(client)
+    first = tokens["refresh_token"]
+    second = client.post("/auth/refresh", json={"refresh_token": first}).json()["refresh_token"]
+
+    # Replaying the rotated token is rejected and kills the newer token too
+    assert client.post("/auth/refresh", json={"refresh_token": first}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": second}).status_code == 401
+
+
+def test_expired_refresh_token_rejected(client, test_db):
+    tokens = login(client)
+    test_db.query(RefreshToken).update({"expires_at": datetime.utcnow() - timedelta(minutes=1)})
+    test_db.commit()
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+    assert crud.purge_refresh_tokens(test_db) == 1
+
+
+def test_logout_revokes_refresh_token(client, test_db):
+    tokens = login(client)
+
+    response = client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_password_change_revokes_refresh_tokens(client, test_db):
+    tokens = login(client)
+
+    response = client.put("/auth/me/password", json={
+        "current_password": "testpassword",
+        "new_password": "NewPassword123",
+    })
+    assert response.status_code == 200
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_deactivation_revokes_refresh_tokens(client, test_db):
+    tokens = login(client)
+
+    assert client.delete("/api/auth/me").status_code == 200
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+    test_db.expire_all()
+    assert test_db.query(User).filter_by(username="testuser").one().is_active is False
+
+
+def test_unknown_refresh_token_rejected(client, test_db):
+    response = client.post("/api/auth/refresh", json={"refresh_token": "not-a-real-token"})
+    assert response.status_code == 401
+    assert test_db.query(User).filter_by(username="testuser").first() is not None
@@ -0,0 +1,105 @@
+import json
+import math
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from fastapi.routing import APIRoute
+
+from app.main import app
+from app.models import Cat, User, WeightRecord
+from app.responses import FastJSONResponse, prefers_msgpack
+
+
+def test_api_routes_default_to_orjson():
+    routes = [r for r in app.routes if isinstance(r, APIRoute) and r.path != "/metrics"]
+    assert routes
+    assert all(r.response_class is FastJSONResponse for r in routes)
+
+
+def test_render_handles_dates_floats_and_fallback_types():
+    body = FastJSONResponse({
+        "day": date(2024, 2, 29),
+        "at": datetime(2024, 2, 29, 8, 30),
+        "weight": 4.3,
+        "bad": [math.nan, math.inf],
+        "decimal": Decimal("4.25"),
+        1: "int key",
+    }).body
+
+    assert json.loads(body) == {
+        "day": "2024-02-29",
+        "at": "2024-02-29T08:30:00",
+        "weight": 4.3,
+        "bad": [None, None],
+        "decimal": 4.25,
+        "1": "int key",
+    }
+
+
+def test_weight_records_round_trip(client, test_db):
+    user = test_db.query(User).filter_by(username="testuser").first()
+    cat = Cat(name="Whiskers", target_weight=4.5, user_id=user.id)
+    test_db.add(cat)
+    test_db.commit()
+    test_db.add(WeightRecord(date=date(2024, 2, 29), user_weight=70.1,
+                             combined_weight=74.4, cat_weight=4.3, cat_id=cat.id))
+    test_db.commit()
+
+    response = client.get(f"/api/cats/{cat.id}/weights/")
+
+    assert response.headers["content-type"] == "application/json"
+    [record] = response.json()
+    assert record["date"] == "2024-02-29"
+    assert record["user_weight"] == 70.1
+    assert record["cat_weight"] == 4.3
+    # Errors from the exception handlers use the same renderer
+    assert client.get("/api/cats/abc").json()["detail"] == "Validation error"
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, False),
+    ("*/*", False),
+    ("application/json", False),
+    ("application/msgpack", True),
+    ("application/x-msgpack", True),
+    ("application/msgpack, */*;q=0.5", True),
+    ("application/msgpack, application/json", False),
+    ("application/json;q=0.5, application/msgpack", True),
+    ("application/msgpack;q=0", False),
+])
+def test_prefers_msgpack(accept, expected):
+    assert prefers_msgpack(accept) is expected
+
+
+def test_msgpack_negotiation_and_request_bodies(client, test_db):
+    msgpack = pytest.importorskip("msgpack")
+    user = test_db.query(User).filter_by(username="testuser").first()
+    cat = Cat(name="Whiskers", target_weight=4.5, user_id=user.id)
+    test_db.add(cat)
+    test_db.commit()
+
+    response = client.post(
+        f"/api/cats/{cat.id}/weights/",
+        content=msgpack.packb({"date": "2024-02-29", "user_weight": 70.1,
+                               "combined_weight": 74.4}),
+        headers={"Content-Type": "application/msgpack"},
+    )
+    assert response.status_code == 200
+    assert response.json()["date"] == "2024-02-29"
+
+    accept = {"Accept": "application/msgpack"}
+    for path in ("/api/cats/", f"/api/cats/{cat.id}/weights/",
+                 f"/api/cats/{cat.id}/weights/?format=columnar", f"/api/cats/{cat.id}/plot"):
+        response = client.get(path, headers=accept)
+        assert response.headers["content-type"] == "application/msgpack"
+        assert "Accept" in response.headers["vary"]
+        assert msgpack.unpackb(response.content) == client.get(path).json()
+
+    invalid = client.post(f"/api/cats/{cat.id}/weights/", content=b"\xc1",
+                          headers={"Content-Type": "application/msgpack"})
+    assert invalid.status_code == 400
+    # Decoded bodies are validated like JSON ones
+    missing = client.post(f"/api/cats/{cat.id}/weights/", content=msgpack.packb({}),
+                          headers={"Content-Type": "application/x-msgpack"})
+    assert missing.status_code == 422
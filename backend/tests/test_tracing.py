@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from app.models import Cat, User
+from app.tracing import InMemoryExporter, JsonFileExporter, Tracer, parse_traceparent, tracer
+
+PARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = InMemoryExporter()
+    monkeypatch.setattr(tracer, "exporter", exporter)
+    monkeypatch.setattr(tracer, "sample_rate", 1.0)
+    return exporter
+
+
+def exported(exporter):
+    tracer.flush()
+    return {span["name"]: span for span in exporter.spans}
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(PARENT) == (
+        "0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331", True)
+    assert parse_traceparent(PARENT[:-2] + "00")[2] is False
+    for invalid in (None, "", "garbage", "01-" + PARENT[3:],
+                    "00-00000000000000000000000000000000-b7ad6b7169203331-01"):
+        assert parse_traceparent(invalid) is None
+
+
+def test_request_spans_cover_auth_crud_and_serialization(client, test_db, exporter):
+    user = test_db.query(User).filter_by(username="testuser").first()
+    cat = Cat(name="Whiskers", target_weight=4.5, user_id=user.id)
+    test_db.add(cat)
+    test_db.commit()
+
+    response = client.get(f"/api/cats/{cat.id}")
+
+    assert response.status_code == 200
+    spans = exported(exporter)
+    root = spans["GET /api/cats/{cat_id}"]
+    trace_id = root["trace_id"]
+    assert response.headers["traceparent"] == f"00-{trace_id}-{root['span_id']}-01"
+    assert root["attributes"]["http.status_code"] == 200
+    assert root["attributes"]["db.statements"] >= 2
+
+    route = spans["route"]
+    assert route["parent_id"] == root["span_id"]
+    endpoint = spans["endpoint read_cat_api"]
+    for name in ("auth.decode_token", "auth.get_user", "endpoint read_cat_api", "serialize"):
+        assert spans[name]["parent_id"] == route["span_id"], name
+    assert spans["auth.get_user"]["attributes"]["cache_hit"] is False
+    # The /api wrapper awaits the root handler, which loads the cat
+    assert spans["crud.get_cat_with_record_rows"]["parent_id"] == endpoint["span_id"]
+    assert {span["trace_id"] for span in spans.values()} == {trace_id}
+
+
+def test_incoming_traceparent_is_continued(client, exporter):
+    response = client.get("/", headers={"traceparent": PARENT})
+
+    root = exported(exporter)["GET /"]
+    assert root["trace_id"] == "0af7651916cd43dd8448eb211c80319c"
+    assert root["parent_id"] == "b7ad6b7169203331"
+    assert response.headers["traceparent"].startswith("00-0af7651916cd43dd8448eb211c80319c-")
+
+
+def test_unsampled_requests_export_nothing(client, exporter, monkeypatch):
+    monkeypatch.setattr(tracer, "sample_rate", 0.0)
+    response = client.get("/")
+    # Callers that decided not to sample are respected too
+    client.get("/", headers={"traceparent": PARENT[:-2] + "00"})
+
+    assert response.headers["traceparent"].endswith("-00")
+    assert exported(exporter) == {}
+
+
+def test_json_file_exporter_writes_one_line_per_span(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    local = Tracer(JsonFileExporter(str(path)), sample_rate=1.0)
+
+    root = local.start_trace("job")
+    local.end_trace(root)
+    local.flush()
+    local.set_exporter(None)
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["job"]
+    assert lines[0]["trace_id"] == root.trace.trace_id
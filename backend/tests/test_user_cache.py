@@ -0,0 +1,99 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import crud
+from app.cache import TTLCache, user_cache
+from app.models import User
+
+
+class UserQueryCounter:
+    """Counts SELECTs against the users table on every engine."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+            self.count += 1
+
+    def __enter__(self):
+        event.listen(Engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, "before_cursor_execute", self)
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+    now[0] += 4
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_ttl_cache_disabled_with_zero_ttl():
+    cache = TTLCache(maxsize=10, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_authenticated_requests_reuse_cached_user(client, test_db):
+    with UserQueryCounter() as counter:
+        for _ in range(5):
+            response = client.get("/auth/me")
+            assert response.status_code == 200
+
+    # One lookup to fill the cache, then four hits
+    assert counter.count == 1
+    assert user_cache.stats()["hits"] >= 4
+
+
+def test_profile_update_invalidates_cached_user(client, test_db):
+    assert client.get("/auth/me").json()["email"] == "test@example.com"
+
+    response = client.put("/auth/me", json={"email": "changed@example.com"})
+    assert response.status_code == 200
+
+    assert client.get("/auth/me").json()["email"] == "changed@example.com"
+
+
+def test_deactivation_takes_effect_immediately(client, test_db):
+    assert client.get("/auth/me").status_code == 200
+
+    response = client.delete("/auth/me")
+    assert response.status_code == 200
+    assert response.json() == {"detail": "Account deactivated"}
+
+    response = client.get("/auth/me")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_password_change_invalidates_cached_user(client, test_db):
+    assert client.get("/auth/me").status_code == 200
+    assert user_cache.get("testuser") is not None
+
+    user = test_db.query(User).filter_by(username="testuser").first()
+    assert crud.change_user_password(test_db, user.id, "testpassword", "NewPassword123")
+    assert user_cache.get("testuser") is None
@@ -0,0 +1,122 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from app import imports
+from app.models import WeightRecord
+from app.query_stats import query_budget
+
+
+def test_csv_import_for_one_cat(client, test_db, cats):
+    cat_id = cats.mine
+    start = date.today() - timedelta(days=500)
+    lines = ["date,user_weight,combined_weight"] + [
+        f"{start + timedelta(days=i)},70.0,{74.5 + (i % 5) / 10}" for i in range(500)]
+
+    client.get("/auth/me")  # warm the user cache
+    # One ownership query and one batched insert, independent of row count
+    with query_budget(3):
+        response = client.post(f"/api/weights/import?cat_id={cat_id}",
+                               content="\n".join(lines),
+                               headers={"Content-Type": "text/csv"})
+
+    assert response.status_code == 200
+    assert response.json() == {"imported": 500, "rejected": 0, "errors": []}
+    records = test_db.query(WeightRecord).filter_by(cat_id=cat_id).order_by(WeightRecord.date)
+    assert records.count() == 500
+    assert records.first().cat_weight == pytest.approx(4.5)
+
+
+def test_json_import_reports_row_errors_and_is_all_or_nothing(client, test_db, cats):
+    whiskers, smokey, foreign = cats
+    today = str(date.today())
+    rows = [
+        {"cat_id": whiskers, "date": today, "user_weight": 70.0, "combined_weight": 74.5},
+        {"cat_id": smokey, "date": today, "user_weight": 70.0, "combined_weight": 75.0},
+        {"cat_id": whiskers, "date": str(date.today() + timedelta(days=1)),
+         "user_weight": 70.0, "combined_weight": 74.5},
+        {"cat_id": smokey, "date": today, "user_weight": 70.0, "combined_weight": 69.0},
+        {"cat_id": foreign, "date": today, "user_weight": 70.0, "combined_weight": 74.0},
+        {"date": today, "user_weight": 70.0, "combined_weight": 74.0},
+        "not a row",
+    ]
+
+    response = client.post("/api/weights/import", json=rows)
+    assert response.status_code == 422
+    body = response.json()
+    assert body["imported"] == 0 and body["rejected"] == 5
+    errors = {error["index"]: error["errors"] for error in body["errors"]}
+    assert sorted(errors) == [2, 3, 4, 5, 6]
+    assert "future" in errors[2][0]
+    assert errors[3] == ["Combined weight must be greater than user weight"]
+    assert errors[4] == ["cat_id: Cat not found"]
+    assert errors[5] == ["cat_id: Field required"]
+    assert test_db.query(WeightRecord).count() == 0
+
+    response = client.post("/weights/import?partial=true", json=rows)
+    assert response.status_code == 200
+    assert response.json()["imported"] == 2 and response.json()["rejected"] == 5
+    assert {r.cat_id: r.cat_weight for r in test_db.query(WeightRecord)} == {
+        whiskers: pytest.approx(4.5), smokey: pytest.approx(5.0)}
+
+
+def test_import_rejects_unreadable_bodies(client, cats):
+    cat_id = cats.mine
+    assert client.post("/api/weights/import", content=b"{not json",
+                       headers={"Content-Type": "application/json"}).status_code == 400
+    assert client.post("/api/weights/import", json={"date": "2024-01-01"}).status_code == 400
+    response = client.post(f"/api/weights/import?cat_id={cat_id}", content="date,weight\n",
+                           headers={"Content-Type": "text/csv"})
+    assert response.status_code == 400
+    assert "user_weight" in response.json()["detail"]
+
+
+def test_import_rejects_inexact_cat_ids_and_extra_csv_fields(client, test_db, cats):
+    cat_id = cats.mine
+    today = date.today().isoformat()
+    row = {"date": today, "user_weight": 70.0, "combined_weight": 74.5}
+    rows = [dict(row, cat_id=cat_id + 0.9), dict(row, cat_id=True), dict(row, cat_id="1x"),
+            dict(row, cat_id=str(cat_id))]
+
+    response = client.post("/api/weights/import", json=rows)
+    assert response.status_code == 422
+    errors = {error["index"]: error["errors"] for error in response.json()["errors"]}
+    assert errors == {index: ["cat_id: Input should be a valid integer"] for index in (0, 1, 2)}
+
+    csv_body = f"date,user_weight,combined_weight\n{today},70.0,74.5,{cat_id}\n{today},70.0,74.5"
+    response = client.post(f"/api/weights/import?cat_id={cat_id}&partial=true", content=csv_body,
+                           headers={"Content-Type": "text/csv"})
+    assert response.json() == {"imported": 1, "rejected": 1, "errors": [
+        {"index": 0, "errors": ["Row has more fields than the header"]}]}
+    assert test_db.query(WeightRecord).count() == 1
+
+
+def test_import_applies_the_single_record_rules(client, cats):
+    cat_id = cats.mine
+    row = {"date": date.today().isoformat(), "user_weight": 600.0, "combined_weight": 604.5}
+    single = client.post(f"/api/cats/{cat_id}/weights/", json=row)
+    assert single.status_code == 400
+
+    response = client.post(f"/api/weights/import?cat_id={cat_id}", json=[row])
+    assert response.json()["errors"] == [{"index": 0, "errors": [single.json()["detail"]]}]
+
+
+def test_import_parses_rows_off_the_event_loop(client, cats, monkeypatch):
+    cat_id = cats.mine
+    on_loop = []
+    validate_rows = imports.validate_rows
+
+    def recording_validate_rows(rows, default_cat_id=None):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return validate_rows(rows, default_cat_id)
+
+    monkeypatch.setattr(imports, "validate_rows", recording_validate_rows)
+    response = client.post(f"/api/weights/import?cat_id={cat_id}", json=[
+        {"date": date.today().isoformat(), "user_weight": 70.0, "combined_weight": 74.5}])
+    assert response.json()["imported"] == 1
+    assert on_loop == [False]
@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, timedelta
 
 from app.models import Cat, User, WeightRecord
 
@@ -135,3 +135,33 @@ def test_get_plot_data(client, test_db):
     assert len(data["dates"]) == 1
     assert len(data["weights"]) == 1
     assert data["weights"][0] == 4.5
+
+
+def test_weight_records_columnar_format(client, test_db):
+    user = test_db.query(User).filter_by(username="testuser").first()
+    cat = Cat(name="Whiskers", target_weight=4.5, user_id=user.id)
+    test_db.add(cat)
+    test_db.commit()
+    for days, combined in ((2, 74.5), (1, 74.3), (0, 74.1)):
+        test_db.add(WeightRecord(date=date.today() - timedelta(days=days), user_weight=70.0,
+                                 combined_weight=combined, cat_weight=round(combined - 70, 1),
+                                 cat_id=cat.id))
+    test_db.commit()
+
+    rows = client.get(f"/api/cats/{cat.id}/weights/").json()
+    response = client.get(f"/api/cats/{cat.id}/weights/?format=columnar&skip=1")
+    assert response.status_code == 200
+    columns = response.json()
+    assert columns["cat_id"] == cat.id
+    for field in ("id", "date", "user_weight", "combined_weight", "cat_weight"):
+        assert columns[field] == [row[field] for row in rows[1:]]
+
+    assert client.get(f"/cats/{cat.id}/weights/?format=xml").status_code == 422
+
+    plot = client.get(f"/cats/{cat.id}/plot").json()
+    plot_columns = client.get(f"/api/cats/{cat.id}/plot?format=columnar").json()
+    assert plot_columns["date"] == plot["dates"]
+    assert plot_columns["cat_weight"] == plot["weights"]
+    assert plot_columns["user_weight"] == [70.0, 70.0, 70.0]
+    assert {k: plot_columns[k] for k in ("cat_id", "name", "target_weight")} == \
+        {k: plot[k] for k in ("cat_id", "name", "target_weight")}
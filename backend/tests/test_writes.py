@@ -0,0 +1,98 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User, WeightRecord
+from app.query_stats import query_budget
+
+
+def test_cat_writes_are_one_statement(client, cats):
+    cat_id, foreign_id = cats.mine, cats.foreign
+    client.get("/auth/me")  # warm the user cache
+
+    with query_budget(1):
+        response = client.post("/api/cats/", json={"name": "Mittens", "target_weight": 5.0})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Mittens" and response.json()["id"]
+
+    with query_budget(1):
+        response = client.put(f"/cats/{cat_id}", json={"name": "Tom", "target_weight": 5.5})
+    assert response.json() == {"name": "Tom", "target_weight": 5.5, "id": cat_id,
+                               "user_id": response.json()["user_id"]}
+
+    # Another user's cat is not found, and not changed
+    with query_budget(1):
+        response = client.put(f"/api/cats/{foreign_id}", json={"name": "Tom", "target_weight": 5.5})
+    assert response.status_code == 404
+
+
+def test_weight_record_create_checks_ownership_in_the_insert(client, test_db, cats):
+    cat_id, foreign_id = cats.mine, cats.foreign
+    body = {"date": date(2024, 1, 1).isoformat(), "user_weight": 70.0, "combined_weight": 74.5}
+    client.get("/auth/me")  # warm the user cache
+
+    with query_budget(1):
+        response = client.post(f"/api/cats/{cat_id}/weights/", json=body)
+    assert response.status_code == 200
+    assert response.json()["cat_weight"] == pytest.approx(4.5)
+    assert response.json()["cat_id"] == cat_id and response.json()["date"] == "2024-01-01"
+
+    # Only a rejected insert looks up whether the cat is owned
+    with query_budget(2):
+        response = client.post(f"/cats/{foreign_id}/weights/", json=body)
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Cat not found"}
+    assert test_db.query(WeightRecord).filter_by(cat_id=foreign_id).count() == 0
+
+
+def test_weight_record_insert_failure_is_not_a_404(client, test_db, cats, monkeypatch):
+    cat_id, foreign_id = cats.mine, cats.foreign
+    body = {"date": date(2024, 1, 1).isoformat(), "user_weight": 70.0, "combined_weight": 74.5}
+
+    async def failing_scalars(self, statement, *args, **kwargs):
+        raise OperationalError(str(statement), {}, Exception("database is locked"))
+
+    monkeypatch.setattr(AsyncSession, "scalars", failing_scalars)
+    response = client.post(f"/api/cats/{cat_id}/weights/", json=body)
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Failed to create weight record"}
+    assert client.post(f"/api/cats/{foreign_id}/weights/", json=body).status_code == 404
+
+    results = client.post("/api/batch", json={"operations": [
+        {"op": "weight.create", "cat_id": cat_id, "body": body},
+        {"op": "weight.create", "cat_id": foreign_id, "body": body},
+    ]}).json()["results"]
+    assert [result["status"] for result in results] == [500, 404]
+    assert test_db.query(WeightRecord).count() == 0
+
+
+def test_register_is_one_statement(client):
+    user = {"username": "newuser", "email": "new@example.com", "password": "TestPassword123"}
+    with query_budget(1):
+        response = client.post("/api/auth/register", json=user)
+    assert response.status_code == 200
+    assert response.json()["username"] == "newuser" and response.json()["is_active"] is True
+
+    # Only a rejected registration looks up which field is taken
+    response = client.post("/auth/register", json=dict(user, username="other"))
+    assert response.status_code == 409
+    assert "Email already registered" in response.json()["detail"]
+
+
+def test_profile_update_is_one_statement(client, test_db):
+    client.get("/auth/me")  # warm the user cache
+
+    with query_budget(1):
+        response = client.put("/auth/me", json={"email": "changed@example.com"})
+    assert response.status_code == 200
+    assert response.json()["email"] == "changed@example.com"
+    assert client.get("/auth/me").json()["email"] == "changed@example.com"
+
+    # Taken by another user: nothing is written
+    with query_budget(1):
+        response = client.put("/api/auth/me", json={"username": "demo"})
+    assert response.status_code == 400
+    test_db.expire_all()
+    assert test_db.query(User).filter_by(username="testuser").count() == 1